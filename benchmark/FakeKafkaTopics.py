@@ -0,0 +1,173 @@
+import os
+import sys
+import json
+import time
+import argparse
+
+# Stand-in for the kafka 1.0 bin/kafka-topics.sh, printing the same output without any cluster. Each topic is stored in
+# its own file of the state directory so that concurrent script runs don't need any lock. The JVM startup time of the
+# real script is simulated by sleeping before the command is handled
+STATE_DIRECTORY_VARIABLE = "FAKE_KAFKA_STATE_DIRECTORY"
+STARTUP_LATENCY_VARIABLE = "FAKE_KAFKA_STARTUP_LATENCY"
+BROKER_ID_LIST_VARIABLE = "FAKE_KAFKA_BROKER_ID_LIST"
+
+DEFAULT_STATE_DIRECTORY = os.path.join(os.path.dirname(os.path.abspath(__file__)), "state")
+DEFAULT_BROKER_ID_LIST = "0,1"
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def main(arguments):
+    """
+    Run a kafka-topics.sh command
+    :param arguments: The command line arguments, without the script name
+    :type arguments: list[str]
+    :return: The exit code
+    :rtype: int
+    """
+    time.sleep(float(os.environ.get(STARTUP_LATENCY_VARIABLE, "0")))
+
+    parser = argparse.ArgumentParser(prog="kafka-topics.sh")
+    parser.add_argument("--zookeeper", required=True)
+    parser.add_argument("--list", action="store_true")
+    parser.add_argument("--describe", action="store_true")
+    parser.add_argument("--create", action="store_true")
+    parser.add_argument("--delete", action="store_true")
+    parser.add_argument("--alter", action="store_true")
+    parser.add_argument("--topic")
+    parser.add_argument("--partitions", type=int)
+    parser.add_argument("--replication-factor", type=int)
+    parser.add_argument("--replica-assignment")
+    args = parser.parse_args(arguments)
+
+    state_directory = os.environ.get(STATE_DIRECTORY_VARIABLE, DEFAULT_STATE_DIRECTORY)
+    os.makedirs(state_directory, exist_ok=True)
+
+    try:
+        if args.list:
+            list_topics(state_directory)
+        elif args.describe:
+            describe_topics(state_directory, args.topic)
+        elif args.create:
+            create_topic(state_directory, args.topic, args.replication_factor, args.partitions,
+                         args.replica_assignment)
+        elif args.delete:
+            delete_topic(state_directory, args.topic)
+        elif args.alter:
+            alter_topic(state_directory, args.topic, args.partitions)
+        else:
+            raise ValueError("Command must include exactly one action: --list, --describe, --create, --alter or "
+                             "--delete")
+    except ValueError as e:
+        print("Error while executing topic command : %s" % str(e))
+        return 1
+    return 0
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def list_topics(state_directory):
+    for topic_name in sorted(_get_topic_names(state_directory)):
+        print(topic_name)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def describe_topics(state_directory, topic_name=None):
+    topic_names = sorted(_get_topic_names(state_directory)) if topic_name is None else [topic_name]
+    for name in topic_names:
+        replica_assignment = _load_topic(state_directory, name)
+        if replica_assignment is None:
+            continue
+        print("Topic:%s\tPartitionCount:%d\tReplicationFactor:%d\tConfigs:"
+              % (name, len(replica_assignment), len(replica_assignment[0])))
+        for partition, replicas in enumerate(replica_assignment):
+            replica_list = ",".join(str(replica) for replica in replicas)
+            print("\tTopic: %s\tPartition: %d\tLeader: %d\tReplicas: %s\tIsr: %s"
+                  % (name, partition, replicas[0], replica_list, replica_list))
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def create_topic(state_directory, topic_name, replication_factor, partitions, replica_assignment):
+    if replica_assignment is not None:
+        assignment = [[int(broker_id) for broker_id in replicas.split(":")]
+                      for replicas in replica_assignment.split(",")]
+    else:
+        broker_id_list = _get_broker_id_list()
+        if replication_factor > len(broker_id_list):
+            raise ValueError("Replication factor: %d larger than available brokers: %d."
+                             % (replication_factor, len(broker_id_list)))
+        assignment = _assign_replicas(broker_id_list, replication_factor, 0, partitions)
+
+    try:
+        # Exclusive creation, concurrent creations of the same topic fail like on a real cluster
+        with open(_get_topic_path(state_directory, topic_name), "x") as topic_file:
+            json.dump(assignment, topic_file)
+    except FileExistsError:
+        raise ValueError("Topic '%s' already exists." % topic_name)
+    print("Created topic \"%s\"." % topic_name)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def delete_topic(state_directory, topic_name):
+    try:
+        os.remove(_get_topic_path(state_directory, topic_name))
+    except FileNotFoundError:
+        raise ValueError("Topic %s does not exist on ZK path" % topic_name)
+    print("Topic %s is marked for deletion." % topic_name)
+    print("Note: This will have no impact if delete.topic.enable is not set to true.")
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def alter_topic(state_directory, topic_name, partitions):
+    replica_assignment = _load_topic(state_directory, topic_name)
+    if replica_assignment is None:
+        raise ValueError("Topic %s does not exist on ZK path" % topic_name)
+    if partitions <= len(replica_assignment):
+        raise ValueError("The number of partitions for a topic can only be increased")
+
+    print("WARNING: If partitions are increased for a topic that has a key, the partition logic or ordering of the "
+          "messages will be affected")
+    replica_assignment += _assign_replicas(_get_broker_id_list(), len(replica_assignment[0]), len(replica_assignment),
+                                           partitions)
+    temp_path = _get_topic_path(state_directory, topic_name) + ".tmp"
+    with open(temp_path, "w") as topic_file:
+        json.dump(replica_assignment, topic_file)
+    os.replace(temp_path, _get_topic_path(state_directory, topic_name))
+    print("Adding partitions succeeded!")
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+def _assign_replicas(broker_id_list, replication_factor, first_partition, partitions):
+    """Round robin replica assignment, the way kafka assigns the replicas of a new topic without rack awareness"""
+    return [[broker_id_list[(partition + replica) % len(broker_id_list)] for replica in range(replication_factor)]
+            for partition in range(first_partition, partitions)]
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+def _get_broker_id_list():
+    return [int(broker_id) for broker_id in os.environ.get(BROKER_ID_LIST_VARIABLE, DEFAULT_BROKER_ID_LIST).split(",")]
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+def _get_topic_names(state_directory):
+    return [file_name[:-len(".json")] for file_name in os.listdir(state_directory) if file_name.endswith(".json")]
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+def _get_topic_path(state_directory, topic_name):
+    return os.path.join(state_directory, topic_name + ".json")
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+def _load_topic(state_directory, topic_name):
+    """
+    :return: The replica list of each partition of the topic, None if the topic doesn't exist
+    :rtype: list[list[int]]
+    """
+    try:
+        with open(_get_topic_path(state_directory, topic_name)) as topic_file:
+            return json.load(topic_file)
+    except FileNotFoundError:
+        return None
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
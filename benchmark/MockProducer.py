@@ -0,0 +1,82 @@
+import json
+import time
+
+# Stand-in for confluent_kafka.Producer without any cluster. Every queued message is delivered on the next poll or
+# flush, calling the delivery callback the way librdkafka does, so that the Python side cost of producing is measured
+# alone
+
+
+class MockMessage(object):
+    """Delivered message, as given to the delivery callback"""
+
+    __slots__ = ("_topic", "_key", "_value")
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, topic, key, value):
+        self._topic = topic
+        self._key = key
+        self._value = value
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def topic(self):
+        return self._topic
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def key(self):
+        return self._key
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def value(self):
+        return self._value
+
+
+class MockProducer(object):
+    """Producer delivering every queued message on the next poll"""
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, config):
+        """
+        MockProducer constructor
+        :param config: The librdkafka properties, only the delivery and statistics ones are used
+        :type config: dict
+        """
+        self._on_delivery = config.get("on_delivery")
+        self._report_only_errors = config.get("delivery.report.only.error", False)
+        self._max_queued_count = config.get("queue.buffering.max.messages", 100000)
+        self._stats_cb = config.get("stats_cb")
+        self._statistics_interval = config.get("statistics.interval.ms", 0) / 1000.0
+        self._next_statistics_time = time.time() + self._statistics_interval
+        self._queue = []
+        self.sent_count = 0
+        self.delivery_callback_count = 0
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def produce(self, topic, value=None, key=None, partition=-1, on_delivery=None, timestamp=0, headers=None):
+        if len(self._queue) >= self._max_queued_count:
+            raise BufferError("Local: Queue full")
+        self._queue.append((topic, key, value, on_delivery))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def poll(self, timeout=None):
+        delivered_count = len(self._queue)
+        for topic, key, value, on_delivery in self._queue:
+            callback = on_delivery or self._on_delivery
+            if callback is not None and not self._report_only_errors:
+                self.delivery_callback_count += 1
+                callback(None, MockMessage(topic, key, value))
+        self.sent_count += delivered_count
+        del self._queue[:]
+
+        if self._stats_cb is not None and self._statistics_interval > 0 and time.time() >= self._next_statistics_time:
+            self._next_statistics_time = time.time() + self._statistics_interval
+            self._stats_cb(json.dumps({"txmsgs": self.sent_count, "msg_cnt": 0}))
+        return delivered_count
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def flush(self, timeout=None):
+        self.poll(0)
+        return 0
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __len__(self):
+        return len(self._queue)
@@ -0,0 +1,95 @@
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+
+REPOSITORY_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[0:0] = [REPOSITORY_PATH, os.path.join(REPOSITORY_PATH, "common"),
+                 os.path.join(REPOSITORY_PATH, "system_launcher")]
+
+from common.entities.kafka.Topic import Topic
+from common.entities.kafka.TopicConfig import TopicConfig
+from system_launcher.ReplicaPlacementPlanner import ReplicaPlacementPlanner
+
+PARTITIONS_PER_TOPIC = 10
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def run_scenario(partition_count, replication_factor, broker_count, added_broker_count):
+    """
+    Place topics on a cluster, then rebalance them after brokers were added to it
+    :param partition_count: The total number of partitions, spread over topics of 10 partitions
+    :type partition_count: int
+    :param replication_factor: The replication factor of every topic
+    :type replication_factor: int
+    :param broker_count: The number of brokers the topics are placed on
+    :type broker_count: int
+    :param added_broker_count: The number of brokers added before rebalancing, negative for removed brokers
+    :type added_broker_count: int
+    :return: The result of the scenario
+    :rtype: dict
+    """
+    start_time = time.perf_counter()
+    planner = ReplicaPlacementPlanner(list(range(broker_count)))
+    running_topics = []
+    for topic_index in range((partition_count + PARTITIONS_PER_TOPIC - 1) // PARTITIONS_PER_TOPIC):
+        topic_name = "bench-topic-%06d" % topic_index
+        replica_assignment = planner.place_topic(topic_name, replication_factor, PARTITIONS_PER_TOPIC)
+        running_topics.append(Topic(topic_name, replication_factor, PARTITIONS_PER_TOPIC,
+                                    [TopicConfig(partition, replicas[0], replicas, replicas)
+                                     for partition, replicas in replica_assignment.items()]))
+    place_seconds = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+    planner = ReplicaPlacementPlanner(list(range(broker_count + added_broker_count)), running_topics)
+    reassignment = planner.rebalance()
+    rebalance_seconds = time.perf_counter() - start_time
+
+    broker_loads = list(planner.get_broker_loads().values())
+    return {
+        "partition_count": len(running_topics) * PARTITIONS_PER_TOPIC,
+        "replication_factor": replication_factor,
+        "broker_count": broker_count,
+        "added_broker_count": added_broker_count,
+        "place_seconds": round(place_seconds, 3),
+        "rebalance_seconds": round(rebalance_seconds, 3),
+        "changed_partitions": len(reassignment.assignment),
+        "replica_spread": max(loads[0] for loads in broker_loads) - min(loads[0] for loads in broker_loads),
+        "leader_spread": max(loads[1] for loads in broker_loads) - min(loads[1] for loads in broker_loads)
+    }
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def format_result(result):
+    return "%d partition(s), %d broker(s) %+d: placed in %.3fs, rebalanced in %.3fs, %d partition(s) changed, " \
+           "replica spread %d, leader spread %d" % (
+               result["partition_count"], result["broker_count"], result["added_broker_count"],
+               result["place_seconds"], result["rebalance_seconds"], result["changed_partitions"],
+               result["replica_spread"], result["leader_spread"])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark the replica placement and rebalance as the number of "
+                                                 "partitions grows")
+    parser.add_argument("--partition-counts", default="2500,5000,10000,20000",
+                        help="Comma separated total numbers of partitions")
+    parser.add_argument("--replication-factor", type=int, default=3)
+    parser.add_argument("--broker-count", type=int, default=3)
+    parser.add_argument("--added-broker-count", type=int, default=3,
+                        help="Number of brokers added before rebalancing, negative for removed brokers")
+    parser.add_argument("--output", default=os.path.join(REPOSITORY_PATH, "placement_bench_output.txt"),
+                        help="File the results are written into, as json")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s: %(message)s")
+
+    benchmark_results = []
+    for scenario_partition_count in [int(count) for count in args.partition_counts.split(",")]:
+        benchmark_results.append(run_scenario(scenario_partition_count, args.replication_factor, args.broker_count,
+                                              args.added_broker_count))
+        print(format_result(benchmark_results[-1]))
+
+    with open(args.output, "w") as output_file:
+        json.dump({"results": benchmark_results}, output_file, indent=2)
@@ -0,0 +1,112 @@
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+
+REPOSITORY_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[0:0] = [REPOSITORY_PATH, os.path.join(REPOSITORY_PATH, "common")]
+
+from benchmark.MockProducer import MockProducer
+from common.IotProducer import IotProducer
+from common.RightsMatrix import RightsMatrix
+from common.entities.kafka.GroupId import GroupId
+from common.entities.kafka.KafkaRights import KafkaRights
+from common.entities.kafka.KafkaBroker import KafkaBroker
+
+BENCH_TOPIC = "bench-sensor"
+BENCH_GROUP_ID = GroupId("bench-devices", KafkaRights([], ["bench-*"]))
+BENCH_RIGHTS_MATRIX = RightsMatrix([BENCH_TOPIC])
+BENCH_RIGHTS_MATRIX.set_group(BENCH_GROUP_ID.name, [], ["bench-*"])
+BENCH_BROKER_LIST = [KafkaBroker("localhost", 9092, 0)]  # Only passed through to the mock producer
+
+# Ways of producing the messages of a run
+MODE_CALLBACK = "callback"  # Raw producer with a delivery callback per message and a poll per message
+MODE_PRODUCER = "producer"  # IotProducer.produce, one call per message
+MODE_PRODUCER_BATCH = "producer_batch"  # IotProducer.produce_batch, one call per batch of messages
+MODE_LIST = [MODE_CALLBACK, MODE_PRODUCER, MODE_PRODUCER_BATCH]
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def run_mode(mode, message_count, device_count, payload_size, batch_size):
+    """
+    Produce messages spread over devices with a mock producer
+    :param mode: The way of producing the messages
+    :type mode: str
+    :param message_count: The number of produced messages
+    :type message_count: int
+    :param device_count: The number of devices the messages are spread over
+    :type device_count: int
+    :param payload_size: The size in bytes of every message payload
+    :type payload_size: int
+    :param batch_size: The number of messages given to every produce_batch call
+    :type batch_size: int
+    :return: The result of the run
+    :rtype: dict
+    """
+    device_ids = ["device-%06d" % device_index for device_index in range(device_count)]
+    payload = b"x" * payload_size
+    messages = [(device_ids[message_index % device_count], payload) for message_index in range(message_count)]
+
+    start_time = time.perf_counter()
+    if mode == MODE_CALLBACK:
+        mock_producer = MockProducer({})
+        delivered_messages = []
+        for device_id, value in messages:
+            mock_producer.produce(BENCH_TOPIC, value, device_id,
+                                  on_delivery=lambda error, message: delivered_messages.append(message))
+            mock_producer.poll(0)
+        mock_producer.flush()
+    else:
+        producer = IotProducer(BENCH_GROUP_ID, BENCH_RIGHTS_MATRIX, BENCH_BROKER_LIST, producer_class=MockProducer)
+        mock_producer = producer._producer
+        if mode == MODE_PRODUCER:
+            for device_id, value in messages:
+                producer.produce(BENCH_TOPIC, device_id, value)
+        else:
+            for batch_start in range(0, message_count, batch_size):
+                producer.produce_batch(BENCH_TOPIC, messages[batch_start:batch_start + batch_size])
+        producer.flush()
+    wall_seconds = time.perf_counter() - start_time
+
+    return {
+        "mode": mode,
+        "message_count": message_count,
+        "device_count": device_count,
+        "payload_size": payload_size,
+        "wall_seconds": round(wall_seconds, 3),
+        "messages_per_second": int(message_count / wall_seconds) if wall_seconds > 0 else 0,
+        "delivery_callbacks": mock_producer.delivery_callback_count
+    }
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def format_result(result):
+    return "%s, %d message(s) over %d device(s): %.3fs, %d msg/s, %d delivery callback(s)" % (
+        result["mode"], result["message_count"], result["device_count"], result["wall_seconds"],
+        result["messages_per_second"], result["delivery_callbacks"])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark the Python side cost of producing device messages against "
+                                                 "a mock producer")
+    parser.add_argument("--message-count", type=int, default=1000000)
+    parser.add_argument("--device-count", type=int, default=10000)
+    parser.add_argument("--payload-size", type=int, default=128, help="Size in bytes of every message payload")
+    parser.add_argument("--batch-size", type=int, default=1000,
+                        help="Number of messages given to every produce_batch call")
+    parser.add_argument("--output", default=os.path.join(REPOSITORY_PATH, "producer_bench_output.txt"),
+                        help="File the results are written into, as json")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s: %(message)s")
+
+    benchmark_results = []
+    for benchmark_mode in MODE_LIST:
+        benchmark_results.append(run_mode(benchmark_mode, args.message_count, args.device_count, args.payload_size,
+                                          args.batch_size))
+        print(format_result(benchmark_results[-1]))
+
+    with open(args.output, "w") as output_file:
+        json.dump({"results": benchmark_results}, output_file, indent=2)
@@ -0,0 +1,207 @@
+import os
+import sys
+import json
+import time
+import shutil
+import asyncio
+import logging
+import argparse
+import tempfile
+
+REPOSITORY_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[0:0] = [REPOSITORY_PATH, os.path.join(REPOSITORY_PATH, "common"),
+                 os.path.join(REPOSITORY_PATH, "system_launcher")]
+
+from benchmark import FakeKafkaTopics
+from common.entities.Zookeeper import Zookeeper
+from common.entities.kafka.Topic import Topic
+from system_launcher.KafkaDriver import KafkaDriver, SCRIPT_EXITS
+from system_launcher.AsyncKafkaDriver import AsyncKafkaDriver
+from system_launcher.LastAppliedState import LastAppliedState
+from system_launcher.ReconciliationExecutor import ReconciliationExecutor, AsyncReconciliationExecutor
+from system_launcher.main import reconcile_topics, reconcile_topics_async
+
+FAKE_KAFKA_PATH = os.path.dirname(os.path.abspath(__file__))  # Holds the simulated bin/kafka-topics.sh
+
+# Reconciliation runs of a scenario, each one with a fresh kafka driver like a new launcher execution
+PASS_CREATE = "create"  # Every topic is missing from the cluster
+PASS_UNCHANGED_FULL = "unchanged_full"  # Nothing changed, every topic is compared (--full)
+PASS_UNCHANGED = "unchanged"  # Nothing changed since the last applied state
+PASS_ADD_PARTITIONS = "add_partitions"  # One more partition for every topic
+PASS_LIST = [PASS_CREATE, PASS_UNCHANGED_FULL, PASS_UNCHANGED, PASS_ADD_PARTITIONS]
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def run_scenario(topic_count, partition_count, replication_factor, broker_count, max_parallel_ops, use_async):
+    """
+    Run every reconciliation pass of a scenario against an empty simulated cluster
+    :param topic_count: The number of configured topics
+    :type topic_count: int
+    :param partition_count: The number of partitions of every topic
+    :type partition_count: int
+    :param replication_factor: The replication factor of every topic
+    :type replication_factor: int
+    :param broker_count: The number of simulated brokers
+    :type broker_count: int
+    :param max_parallel_ops: Maximum number of kafka scripts running at the same time
+    :type max_parallel_ops: int
+    :param use_async: Reconcile with the asynchronous kafka driver
+    :type use_async: bool
+    :return: The result of each pass
+    :rtype: list[dict]
+    """
+    broker_id_list = list(range(broker_count))
+    work_directory = tempfile.mkdtemp(prefix="kafka-iot-benchmark-")
+    os.environ[FakeKafkaTopics.STATE_DIRECTORY_VARIABLE] = os.path.join(work_directory, "state")
+    os.environ[FakeKafkaTopics.BROKER_ID_LIST_VARIABLE] = ",".join(str(broker_id) for broker_id in broker_id_list)
+    state_file_path = os.path.join(work_directory, "last_applied_state.json")
+
+    results = []
+    try:
+        for pass_name in PASS_LIST:
+            pass_partition_count = partition_count + 1 if pass_name == PASS_ADD_PARTITIONS else partition_count
+            config_topics = [Topic("bench-topic-%05d" % topic_index, replication_factor, pass_partition_count, [])
+                             for topic_index in range(topic_count)]
+            last_applied_state = LastAppliedState(state_file_path).load()
+
+            script_run_count = SCRIPT_EXITS.get_total()
+            start_time = time.perf_counter()
+            run_reconciliation(config_topics, broker_id_list, max_parallel_ops, use_async, last_applied_state,
+                               pass_name == PASS_UNCHANGED_FULL)
+            results.append({
+                "topic_count": topic_count,
+                "partition_count": partition_count,
+                "driver": "async" if use_async else "sync",
+                "pass": pass_name,
+                "wall_seconds": round(time.perf_counter() - start_time, 3),
+                "script_runs": int(SCRIPT_EXITS.get_total() - script_run_count)
+            })
+            print(format_result(results[-1]))
+    finally:
+        shutil.rmtree(work_directory, ignore_errors=True)
+    return results
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def run_reconciliation(config_topics, broker_id_list, max_parallel_ops, use_async, last_applied_state, full):
+    """
+    Run the topic reconciliation and the leader balance check the way main.py does, with a fresh kafka driver
+    :param config_topics: The configured topics
+    :type config_topics: list[Topic]
+    :param broker_id_list: The id of the simulated brokers
+    :type broker_id_list: list[int]
+    :param max_parallel_ops: Maximum number of kafka scripts running at the same time
+    :type max_parallel_ops: int
+    :param use_async: Reconcile with the asynchronous kafka driver
+    :type use_async: bool
+    :param last_applied_state: The state of the previous pass
+    :type last_applied_state: LastAppliedState
+    :param full: Reconcile every topic whatever the last applied state (--full)
+    :type full: bool
+    """
+    zookeeper = Zookeeper("localhost", 2181)  # Only passed through to the simulated script
+    if use_async:
+        kafka = AsyncKafkaDriver(FAKE_KAFKA_PATH, zookeeper, max_parallel_ops=max_parallel_ops)
+        topic_executor = AsyncReconciliationExecutor(kafka, broker_id_list)
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(reconcile_topics_async(kafka, topic_executor, config_topics, len(broker_id_list),
+                                                           False, last_applied_state, full))
+            loop.run_until_complete(topic_executor.balance_leaders(0.1, 100, 1))
+        finally:
+            loop.close()
+    else:
+        kafka = KafkaDriver(FAKE_KAFKA_PATH, zookeeper, max_parallel_ops=max_parallel_ops)
+        topic_executor = ReconciliationExecutor(kafka, broker_id_list)
+        reconcile_topics(kafka, topic_executor, config_topics, len(broker_id_list), False, last_applied_state, full)
+        topic_executor.balance_leaders(0.1, 100, 1)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def find_regressions(results, baseline_results, tolerance):
+    """
+    Compare the results with a baseline. A pass regresses when it runs more kafka scripts than the baseline or when it
+    is slower than the baseline beyond the tolerance
+    :param results: The benchmark results
+    :type results: list[dict]
+    :param baseline_results: The results of a previous benchmark
+    :type baseline_results: list[dict]
+    :param tolerance: The accepted wall time increase ratio
+    :type tolerance: float
+    :return: The regression descriptions
+    :rtype: list[str]
+    """
+    baseline_by_key = dict((get_result_key(result), result) for result in baseline_results)
+    regressions = []
+    for result in results:
+        baseline = baseline_by_key.get(get_result_key(result))
+        if baseline is None:
+            continue
+        if result["script_runs"] > baseline["script_runs"]:
+            regressions.append("%s: %d script run(s) instead of %d"
+                               % (describe_pass(result), result["script_runs"], baseline["script_runs"]))
+        if result["wall_seconds"] > baseline["wall_seconds"] * (1 + tolerance):
+            regressions.append("%s: %.3fs instead of %.3fs"
+                               % (describe_pass(result), result["wall_seconds"], baseline["wall_seconds"]))
+    return regressions
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def get_result_key(result):
+    return result["topic_count"], result["partition_count"], result["driver"], result["pass"]
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def describe_pass(result):
+    return "%d topic(s) x %d partition(s), %s driver, %s pass" % (
+        result["topic_count"], result["partition_count"], result["driver"], result["pass"])
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def format_result(result):
+    return "%s: %.3fs, %d script run(s)" % (describe_pass(result), result["wall_seconds"], result["script_runs"])
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark the topic reconciliation against a simulated "
+                                                 "kafka-topics.sh")
+    parser.add_argument("--topic-counts", default="10,100,1000,10000",
+                        help="Comma separated numbers of configured topics")
+    parser.add_argument("--partition-counts", default="1,10",
+                        help="Comma separated numbers of partitions per topic")
+    parser.add_argument("--replication-factor", type=int, default=2)
+    parser.add_argument("--broker-count", type=int, default=3)
+    parser.add_argument("--startup-latency", type=float, default=0.0,
+                        help="Seconds slept by every kafka-topics.sh run, a real one spends ~1s starting its JVM")
+    parser.add_argument("--max-parallel-ops", type=int, default=8)
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="Reconcile with the asynchronous kafka driver")
+    parser.add_argument("--output", default=os.path.join(REPOSITORY_PATH, "bench_output.txt"),
+                        help="File the results are written into, as json")
+    parser.add_argument("--baseline", help="Results of a previous benchmark, the run fails if it regressed")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Accepted wall time increase ratio over the baseline")
+    args = parser.parse_args()
+
+    # The reconciliation logs are left out, only its warnings and errors are printed along with the results
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s: %(message)s")
+    os.environ[FakeKafkaTopics.STARTUP_LATENCY_VARIABLE] = str(args.startup_latency)
+
+    benchmark_results = []
+    for scenario_topic_count in [int(count) for count in args.topic_counts.split(",")]:
+        for scenario_partition_count in [int(count) for count in args.partition_counts.split(",")]:
+            benchmark_results += run_scenario(scenario_topic_count, scenario_partition_count, args.replication_factor,
+                                              args.broker_count, args.max_parallel_ops, args.use_async)
+
+    with open(args.output, "w") as output_file:
+        json.dump({"startup_latency": args.startup_latency, "max_parallel_ops": args.max_parallel_ops,
+                   "results": benchmark_results}, output_file, indent=2)
+
+    if args.baseline is not None:
+        with open(args.baseline) as baseline_file:
+            benchmark_regressions = find_regressions(benchmark_results, json.load(baseline_file)["results"],
+                                                     args.tolerance)
+        for regression in benchmark_regressions:
+            logging.error("Regression: %s", regression)
+        if len(benchmark_regressions) > 0:
+            sys.exit(1)
@@ -0,0 +1,3 @@
+#!/bin/sh
+# Simulated kafka-topics.sh, see benchmark/FakeKafkaTopics.py
+exec "${PYTHON:-python3}" "$(dirname "$0")/../FakeKafkaTopics.py" "$@"
@@ -0,0 +1,266 @@
+import time
+import logging
+import threading
+import collections
+import concurrent.futures
+from common.KafkaIotException import KafkaIotException
+from common.Metrics import METRICS
+
+try:
+    from confluent_kafka import Consumer, KafkaError, TopicPartition
+except ImportError:  # confluent-kafka is optional, a consumer class must be given when it is not installed
+    Consumer = None
+
+logger = logging.getLogger(__name__)
+
+CONSUMER_MESSAGES = METRICS.counter("kafka_iot_consumer_messages_total", "Messages handled by application and topic")
+CONSUMER_BATCH_SECONDS = METRICS.histogram("kafka_iot_consumer_batch_seconds",
+                                           "Time to handle a batch of messages of a partition by application")
+CONSUMER_HANDLER_ERRORS = METRICS.counter("kafka_iot_consumer_handler_errors_total",
+                                          "Batches of messages the handler failed on by application")
+CONSUMER_COMMITS = METRICS.counter("kafka_iot_consumer_commits_total", "Asynchronous offset commits by application")
+
+# Consumed message given to the handler, made of plain values so that it can be sent to a worker process
+ConsumedMessage = collections.namedtuple("ConsumedMessage", ("topic", "partition", "offset", "key", "value",
+                                                             "timestamp"))
+
+
+class AppConsumer(object):
+    """Batch consumer of an application, subscribed to the declared topics its group id can read. Messages are polled
+    in batches and split by partition, each partition being always handled by the same single worker of a thread or
+    process pool so that its messages are handled in order while the partitions are handled in parallel. The offsets
+    of the handled batches are committed asynchronously on an interval rather than once per message"""
+
+    DEFAULT_BATCH_SIZE = 500
+    DEFAULT_POLL_TIMEOUT = 1.0
+    DEFAULT_WORKER_COUNT = 4
+    DEFAULT_COMMIT_INTERVAL = 5.0
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, app, broker_list, rights_matrix, handler, batch_size=DEFAULT_BATCH_SIZE,
+                 poll_timeout=DEFAULT_POLL_TIMEOUT, worker_count=DEFAULT_WORKER_COUNT, use_processes=False,
+                 commit_interval=DEFAULT_COMMIT_INTERVAL, config=None, consumer_class=None):
+        """
+        AppConsumer constructor
+        :param app: The application, consuming as its group id
+        :type app: Application
+        :param broker_list: Kafka brokers used to bootstrap the consumer connection
+        :type broker_list: list[KafkaBroker]
+        :param rights_matrix: The compiled rights, the declared topics the group id can read are subscribed to
+        :type rights_matrix: RightsMatrix
+        :param handler: Called with the messages of a partition in order, must be a module level function when run
+        in worker processes. The messages are committed once it returns
+        :type handler: function[list[ConsumedMessage]]
+        :param batch_size: Maximum number of messages polled at once
+        :type batch_size: int
+        :param poll_timeout: Maximum time in seconds to wait for a batch of messages
+        :type poll_timeout: float
+        :param worker_count: Number of workers handling the partitions
+        :type worker_count: int
+        :param use_processes: Handle the messages in worker processes instead of threads, for CPU bound handlers
+        :type use_processes: bool
+        :param commit_interval: Time in seconds between two offset commits
+        :type commit_interval: float
+        :param config: Additional librdkafka properties, overriding the default ones
+        :type config: dict
+        :param consumer_class: Class the consumer is built with, confluent_kafka.Consumer if None
+        :type consumer_class: type
+        """
+        if consumer_class is None:
+            if Consumer is None:
+                raise KafkaIotException("confluent-kafka is not installed, messages can't be consumed")
+            consumer_class = Consumer
+
+        self.app = app
+        self.topic_names = rights_matrix.get_readable_topics(app.group_id.name)
+        if len(self.topic_names) == 0:
+            raise KafkaIotException("Group id %s of application %s can't read any declared topic"
+                                    % (app.group_id.name, app.name))
+
+        self._handler = handler
+        self._batch_size = batch_size
+        self._poll_timeout = poll_timeout
+        self._commit_interval = commit_interval
+        executor_class = concurrent.futures.ProcessPoolExecutor if use_processes else \
+            concurrent.futures.ThreadPoolExecutor
+        self._workers = [executor_class(max_workers=1) for _ in range(worker_count)]
+        self._max_pending_count = worker_count * 2  # Batches handled or waiting for a worker before polling again
+
+        self._lock = threading.Lock()
+        self._pending_futures = set()
+        self._handled_offsets = {}  # Next offset to commit by (topic, partition), once its batches are handled
+        self._failure = None  # First handler error, stopping the consumption
+        self._stopped = threading.Event()
+
+        consumer_config = {
+            "bootstrap.servers": ",".join("%s:%d" % (broker.host, broker.port) for broker in broker_list),
+            "group.id": app.group_id.name,
+            "client.id": app.name,
+            "enable.auto.commit": False,
+            "on_commit": self._on_commit
+        }
+        consumer_config.update(config or {})
+        self._consumer = consumer_class(consumer_config)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def run(self, max_batch_count=None):
+        """
+        Consume until stopped, the handled offsets being committed before returning
+        :param max_batch_count: Number of polled batches before returning, endless if None
+        :type max_batch_count: int
+        """
+        logger.info("Application %s consuming topic(s) [%s] as group id %s...", self.app.name,
+                    ", ".join(self.topic_names), self.app.group_id.name)
+        self._consumer.subscribe(self.topic_names, on_revoke=self._on_revoke)
+        next_commit_time = time.time() + self._commit_interval
+        batch_index = 0
+        try:
+            while not self._stopped.is_set() and (max_batch_count is None or batch_index < max_batch_count):
+                self._raise_failure()
+                self._wait_for_workers(self._max_pending_count - 1)
+                self._dispatch(self._consumer.consume(num_messages=self._batch_size, timeout=self._poll_timeout))
+                batch_index += 1
+                if time.time() >= next_commit_time:
+                    self.commit()
+                    next_commit_time = time.time() + self._commit_interval
+            self._wait_for_workers(0)
+            self._raise_failure()
+        finally:
+            self.commit(asynchronous=False)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def stop(self):
+        """
+        Make run return once the batch being polled is handled, can be called from another thread
+        """
+        self._stopped.set()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def close(self):
+        """
+        Stop the workers and leave the consumer group
+        """
+        for worker in self._workers:
+            worker.shutdown(wait=True)
+        self._consumer.close()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def commit(self, asynchronous=True):
+        """
+        Commit the offsets of the handled batches, if any since the last commit
+        :param asynchronous: Return without waiting for the commit result, the errors being logged
+        :type asynchronous: bool
+        """
+        with self._lock:
+            handled_offsets = self._handled_offsets
+            self._handled_offsets = {}
+        if len(handled_offsets) == 0:
+            return
+
+        CONSUMER_COMMITS.inc(app=self.app.name)
+        offsets = [TopicPartition(topic, partition, offset) for (topic, partition), offset in handled_offsets.items()]
+        try:
+            self._consumer.commit(offsets=offsets, asynchronous=asynchronous)
+        except Exception as e:  # Only a synchronous commit raises, the next one includes these offsets again
+            logger.error("Offset commit of application %s failed: %s", self.app.name, e)
+            with self._lock:
+                for partition_key, offset in handled_offsets.items():
+                    self._handled_offsets.setdefault(partition_key, offset)
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _dispatch(self, messages):
+        """
+        Split a polled batch by partition and hand each partition batch to the worker of the partition
+        :param messages: The polled messages
+        :type messages: list[confluent_kafka.Message]
+        """
+        partition_batches = collections.OrderedDict()
+        for message in messages:
+            error = message.error()
+            if error is not None:
+                if error.code() != KafkaError._PARTITION_EOF:
+                    logger.error("Application %s consumption error: %s", self.app.name, error.str())
+                continue
+            partition_batches.setdefault((message.topic(), message.partition()), []).append(
+                ConsumedMessage(message.topic(), message.partition(), message.offset(), message.key(),
+                                message.value(), message.timestamp()[1]))
+
+        for partition_key, partition_batch in partition_batches.items():
+            worker = self._workers[hash(partition_key) % len(self._workers)]
+            future = worker.submit(_handle_batch, self._handler, partition_batch)
+            future.partition_key = partition_key
+            future.next_offset = partition_batch[-1].offset + 1
+            future.message_count = len(partition_batch)
+            with self._lock:
+                self._pending_futures.add(future)
+            future.add_done_callback(self._on_batch_handled)
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _on_batch_handled(self, future):
+        """
+        Record the offset of a handled batch. The batches of a partition complete in order as they share a worker,
+        and a failed batch stops the offsets of its partition from moving forward
+        """
+        error = future.exception()
+        with self._lock:
+            self._pending_futures.discard(future)
+            if error is None and self._failure is None:
+                self._handled_offsets[future.partition_key] = future.next_offset
+            elif error is not None and self._failure is None:
+                self._failure = error
+
+        topic, partition = future.partition_key
+        if error is None:
+            CONSUMER_MESSAGES.inc(future.message_count, app=self.app.name, topic=topic)
+            CONSUMER_BATCH_SECONDS.observe(future.result(), app=self.app.name)
+        else:
+            CONSUMER_HANDLER_ERRORS.inc(app=self.app.name)
+            logger.error("Application %s failed to handle messages of %s partition %d from offset %d: %s",
+                         self.app.name, topic, partition, future.next_offset - future.message_count, error)
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _wait_for_workers(self, max_pending_count):
+        """
+        Wait until at most max_pending_count batches are pending
+        """
+        while True:
+            with self._lock:
+                pending_futures = list(self._pending_futures)
+            if len(pending_futures) <= max_pending_count:
+                return
+            concurrent.futures.wait(pending_futures, return_when=concurrent.futures.FIRST_COMPLETED)
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _raise_failure(self):
+        if self._failure is not None:
+            raise KafkaIotException("Application %s stopped consuming on a handler error: %s"
+                                    % (self.app.name, self._failure))
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _on_revoke(self, consumer, partitions):
+        """
+        Rebalance callback: the batches of the revoked partitions are handled and committed before another member of
+        the group gets them
+        """
+        self._wait_for_workers(0)
+        self.commit(asynchronous=False)
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _on_commit(self, error, partitions):
+        """
+        Commit callback, served by the consume calls
+        """
+        if error is not None:
+            logger.error("Offset commit of application %s failed: %s", self.app.name, error)
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+def _handle_batch(handler, messages):
+    """
+    Run the handler on the messages of a partition, in a worker thread or process
+    :return: The time in seconds spent handling the messages
+    :rtype: float
+    """
+    start_time = time.perf_counter()
+    handler(messages)
+    return time.perf_counter() - start_time
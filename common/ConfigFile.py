@@ -1,12 +1,51 @@
+import os
+import json
 from common.KafkaIotException import KafkaIotException
 
+try:
+    import yaml
+except ImportError:  # PyYAML is optional, only json config files can be loaded when it is not installed
+    yaml = None
+
+_PARSE_ERRORS = (OSError, ValueError) if yaml is None else (OSError, ValueError, yaml.YAMLError)
+
+# Parsed content of the config files by absolute path, along with the modification time and size it was parsed at.
+# Loading an unchanged file again, e.g. from several ConfigFile instances, only costs a stat
+_PARSE_CACHE = {}
+
 
 class ConfigFile(object):
-    """Python config file reader"""
+    """Python config file reader. The config is either given as a dict or loaded from a json or yaml file over this
+    dict, the file being reloaded when it changes. The loaded content is shared, it must not be modified"""
 
     # ------------------------------------------------------------------------------------------------------------------
-    def __init__(self, config_content):
+    def __init__(self, config_content=None, file_path=None, schema=None):
+        """
+        Config file constructor
+        :param config_content: The config content, or the default values of a loaded file, whose content is deep merged
+        over it: a dict of the file only replaces the values it gives
+        :type config_content: dict
+        :param file_path: The json or yaml (.yml, .yaml) config file
+        :type file_path: str
+        :param schema: The schema whose default values complete the loaded content, so that its optional fields can be
+        read without being given
+        :type schema: common.ConfigSchema.ConfigSchema
+        """
+        self._file_path = None if file_path is None else os.path.abspath(file_path)
+        self._file_signature = None  # (modification time, size) of the loaded file
+        self._accessors = {}  # Compiled accessor by search string
+        self._schema = schema
+        self._default_content = config_content
         self._config_content = config_content
+        if self._file_path is not None:
+            self._file_signature, file_content = _load_config_file(self._file_path)
+            self._config_content = self._merge_defaults(file_content)
+        self._config_content = self._complete(self._config_content)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @property
+    def file_path(self):
+        return self._file_path
 
     # ------------------------------------------------------------------------------------------------------------------
     def get(self, search_string=None):
@@ -19,20 +58,154 @@ class ConfigFile(object):
         if search_string is None:
             return self._config_content
 
-        if isinstance(search_string, str):
-            param_array = search_string.split(".")
-            performed_param_str = None
-            ret = self._config_content
+        accessor = self._accessors.get(search_string)
+        if accessor is None:
+            if not isinstance(search_string, str):
+                raise KafkaIotException("Given parameter for search_string must be a string! %s given instead" %
+                                        str(type(search_string)))
+            accessor = _compile_accessor(search_string)
+            self._accessors[search_string] = accessor
+
+        try:
+            return accessor(self._config_content)
+        except (KeyError, TypeError):
+            raise KafkaIotException("Can't find param %s in config file" % _find_missing_param(self._config_content,
+                                                                                                search_string))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def has_changed(self):
+        """
+        :return: True if the config file was modified since it was loaded, False for a config given as a dict
+        :rtype: bool
+        """
+        return self._file_path is not None and _get_file_signature(self._file_path) != self._file_signature
 
-            for param in param_array:
-                performed_param_str = performed_param_str + "." + param if performed_param_str is not None else param
-                if param in ret:
-                    ret = ret[param]
-                else:
-                    raise KafkaIotException("Can't find param %s in config file" % performed_param_str)
+    # ------------------------------------------------------------------------------------------------------------------
+    def reload(self, check=None):
+        """
+        Load the config file again if it was modified since it was loaded
+        :param check: Called with the new content before it replaces the current one, an exception raised by the check
+        keeps the current content
+        :type check: function
+        :return: The names of the top level sections whose content changed, added and removed sections included
+        :rtype: list[str]
+        """
+        if not self.has_changed():
+            return []
+
+        previous_content = self._config_content
+        file_signature, file_content = _load_config_file(self._file_path)
+        config_content = self._complete(self._merge_defaults(file_content))
+        if check is not None:
+            check(config_content)
+        self._file_signature, self._config_content = file_signature, config_content
+        return sorted(section for section in set(previous_content) | set(self._config_content)
+                      if previous_content.get(section) != self._config_content.get(section))
 
-            return ret
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _merge_defaults(self, file_content):
+        """
+        :return: The loaded file content deep merged over the default content given to the constructor
+        :rtype: dict
+        """
+        if self._default_content is None:
+            return file_content
+        return _deep_merge(self._default_content, file_content)
 
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _complete(self, config_content):
+        """
+        :return: The config content with the default values of the schema, as a new dict since a loaded content is
+        shared
+        :rtype: dict
+        """
+        if self._schema is None or config_content is None:
+            return config_content
+        return self._schema.apply_defaults(config_content)
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+def _compile_accessor(search_string):
+    """
+    :return: A function getting the value of the search string from a config content, the search string being split
+    once instead of on every get
+    :rtype: function
+    """
+    params = tuple(search_string.split("."))
+
+    def accessor(config_content):
+        for param in params:
+            config_content = config_content[param]
+        return config_content
+
+    return accessor
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+def _deep_merge(base_content, overriding_content):
+    """
+    :return: A new dict with the values of both contents, the overriding ones winning except for two dicts, which are
+    merged the same way. Lists and other values are replaced as a whole. Neither content is modified
+    :rtype: dict
+    """
+    merged_content = dict(base_content)
+    for key, value in overriding_content.items():
+        base_value = base_content.get(key)
+        if isinstance(base_value, dict) and isinstance(value, dict):
+            merged_content[key] = _deep_merge(base_value, value)
         else:
-            raise KafkaIotException("Given parameter for search_string must be a string! %s given instead" %
-                                    str(type(search_string)))
+            merged_content[key] = value
+    return merged_content
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+def _find_missing_param(config_content, search_string):
+    """
+    :return: The search string prefix up to the first param which can't be found
+    :rtype: str
+    """
+    performed_param_str = None
+    for param in search_string.split("."):
+        performed_param_str = performed_param_str + "." + param if performed_param_str is not None else param
+        if not isinstance(config_content, dict) or param not in config_content:
+            break
+        config_content = config_content[param]
+    return performed_param_str
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+def _get_file_signature(file_path):
+    try:
+        file_stat = os.stat(file_path)
+    except OSError as e:
+        raise KafkaIotException("Can't read config file %s: %s" % (file_path, str(e)))
+    return file_stat.st_mtime_ns, file_stat.st_size
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+def _load_config_file(file_path):
+    """
+    Parse a config file, or get it from the parse cache if it was not modified since it was parsed
+    :return: The (modification time, size) signature of the file and its content
+    :rtype: tuple
+    """
+    file_signature = _get_file_signature(file_path)
+    cached_entry = _PARSE_CACHE.get(file_path)
+    if cached_entry is not None and cached_entry[0] == file_signature:
+        return cached_entry
+
+    is_yaml = file_path.endswith((".yml", ".yaml"))
+    if is_yaml and yaml is None:
+        raise KafkaIotException("PyYAML is required to load the yaml config file %s" % file_path)
+
+    try:
+        with open(file_path) as config_file:
+            config_content = yaml.safe_load(config_file) if is_yaml else json.load(config_file)
+    except _PARSE_ERRORS as e:
+        raise KafkaIotException("Can't parse config file %s: %s" % (file_path, str(e)))
+    if not isinstance(config_content, dict):
+        raise KafkaIotException("Config file %s must contain a dictionary, %s found instead"
+                                % (file_path, type(config_content).__name__))
+
+    _PARSE_CACHE[file_path] = file_signature, config_content
+    return file_signature, config_content
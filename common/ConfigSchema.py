@@ -0,0 +1,278 @@
+import copy
+from common.KafkaIotException import KafkaIotException
+
+NUMBER = (int, float)
+
+
+class ConfigSchema(object):
+    """Declarative configuration schema. A configuration is validated in a single traversal: the declared lists are
+    indexed into sets while they are visited and the cross references are resolved against these sets at the end, so
+    that every violation is reported at once"""
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, root):
+        """
+        Config schema constructor
+        :param root: The schema of the whole configuration
+        :type root: Dict
+        """
+        self._root = root
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def validate(self, config):
+        """
+        :param config: The configuration content
+        :type config: dict
+        :return: The violations, empty if the configuration is valid
+        :rtype: list[str]
+        """
+        context = _ValidationContext()
+        self._root.validate(config, None, context)
+        context.resolve_references()
+        return context.violations
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def check(self, config):
+        """
+        Raise an exception listing every violation if the configuration is not valid
+        :param config: The configuration content
+        :type config: dict
+        """
+        violations = self.validate(config)
+        if len(violations) > 0:
+            raise KafkaIotException("%d configuration violation(s):\n%s" % (len(violations), "\n".join(violations)))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def apply_defaults(self, config):
+        """
+        :param config: The configuration content, left unchanged
+        :type config: dict
+        :return: The configuration content where the missing optional fields having a default value are set to it
+        :rtype: dict
+        """
+        return self._root.apply_defaults(config)
+
+
+class Value(object):
+    """Scalar value"""
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, types, minimum=None, maximum=None, choices=None, nullable=False, reference=None,
+                 is_unreferenced=None):
+        """
+        Value schema constructor
+        :param types: The accepted type(s), bool is only accepted if given explicitly
+        :type types: type | tuple[type]
+        :param minimum: The minimum value, inclusive
+        :type minimum: float
+        :param maximum: The maximum value, inclusive
+        :type maximum: float
+        :param choices: The accepted values, compared case insensitively for strings
+        :type choices: tuple[str]
+        :param nullable: Whether None is accepted
+        :type nullable: bool
+        :param reference: Name of the index the value must belong to, see List
+        :type reference: str
+        :param is_unreferenced: Predicate of the values accepted without being in the referenced index
+        :type is_unreferenced: function
+        """
+        self._types = types if isinstance(types, tuple) else (types,)
+        self._minimum = minimum
+        self._maximum = maximum
+        self._choices = None if choices is None else frozenset(choice.upper() for choice in choices)
+        self._nullable = nullable
+        self._reference = reference
+        self._is_unreferenced = is_unreferenced
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def validate(self, value, path, context):
+        if value is None:
+            if not self._nullable:
+                context.add_violation(path, "null value not allowed")
+            return
+        if not isinstance(value, self._types) or (isinstance(value, bool) and bool not in self._types):
+            context.add_violation(path, "%s expected, %s given" % (" or ".join(value_type.__name__ for value_type
+                                                                                in self._types),
+                                                                   type(value).__name__))
+            return
+
+        if self._minimum is not None and value < self._minimum:
+            context.add_violation(path, "%s is lower than the minimum %s" % (value, self._minimum))
+        if self._maximum is not None and value > self._maximum:
+            context.add_violation(path, "%s is greater than the maximum %s" % (value, self._maximum))
+        if self._choices is not None and str(value).upper() not in self._choices:
+            context.add_violation(path, "\"%s\" is not one of %s" % (value, ", ".join(sorted(self._choices))))
+        if self._reference is not None and (self._is_unreferenced is None or not self._is_unreferenced(value)):
+            context.add_reference(path, self._reference, value)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def apply_defaults(self, value):
+        return value
+
+
+class Dict(object):
+    """Dictionary with known fields"""
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, fields, optional=()):
+        """
+        Dict schema constructor
+        :param fields: The schema of each field by field name
+        :type fields: dict[str, Value | Dict | Map | List]
+        :param optional: The names of the fields which can be missing, or the default value of each of them by field
+        name. A dict default is completed with the defaults of its own fields
+        :type optional: tuple[str] | dict[str, object]
+        """
+        self._fields = fields
+        self._optional = frozenset(optional)
+        self._defaults = optional if isinstance(optional, dict) else {}
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def validate(self, value, path, context):
+        if not isinstance(value, dict):
+            context.add_violation(path, "dict expected, %s given" % type(value).__name__)
+            return
+        for field_name, field_schema in self._fields.items():
+            if field_name in value:
+                field_schema.validate(value[field_name], (path, field_name), context)
+            elif field_name not in self._optional:
+                context.add_violation((path, field_name), "required field missing")
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def apply_defaults(self, value):
+        if not isinstance(value, dict):
+            return value
+        completed_value = dict(value)
+        for field_name, field_schema in self._fields.items():
+            if field_name in value:
+                completed_value[field_name] = field_schema.apply_defaults(value[field_name])
+            elif field_name in self._defaults:
+                completed_value[field_name] = field_schema.apply_defaults(copy.deepcopy(self._defaults[field_name]))
+        return completed_value
+
+
+class Map(object):
+    """Dictionary with free keys and values of a same schema"""
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, values):
+        """
+        Map schema constructor
+        :param values: The schema of every value
+        :type values: Value | Dict | Map | List
+        """
+        self._values = values
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def validate(self, value, path, context):
+        if not isinstance(value, dict):
+            context.add_violation(path, "dict expected, %s given" % type(value).__name__)
+            return
+        for key, item in value.items():
+            self._values.validate(item, (path, str(key)), context)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def apply_defaults(self, value):
+        if not isinstance(value, dict):
+            return value
+        return {key: self._values.apply_defaults(item) for key, item in value.items()}
+
+
+class List(object):
+    """List of items of a same schema, optionally indexed by one of their fields"""
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, items, unique_field=None, index=None, min_length=0):
+        """
+        List schema constructor
+        :param items: The schema of every item
+        :type items: Value | Dict | Map | List
+        :param unique_field: The item field whose values must be unique, the value itself for scalar items
+        :type unique_field: str
+        :param index: Name of the index collecting the unique field values, which values can reference
+        :type index: str
+        :param min_length: The minimum number of items
+        :type min_length: int
+        """
+        self._items = items
+        self._unique_field = unique_field
+        self._index = index
+        self._min_length = min_length
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def validate(self, value, path, context):
+        if not isinstance(value, list):
+            context.add_violation(path, "list expected, %s given" % type(value).__name__)
+            return
+        if len(value) < self._min_length:
+            context.add_violation(path, "at least %d item(s) expected, %d given" % (self._min_length, len(value)))
+
+        unique_values = context.create_index(self._index, path)
+        for item_index, item in enumerate(value):
+            item_path = (path, item_index)
+            self._items.validate(item, item_path, context)
+            if self._unique_field is not None and isinstance(item, dict) and item.get(self._unique_field) is not None:
+                unique_value = item[self._unique_field]
+                try:
+                    if unique_value in unique_values:
+                        context.add_violation((item_path, self._unique_field),
+                                              "\"%s\" is declared several times" % unique_value)
+                    unique_values.add(unique_value)
+                except TypeError:  # Unhashable, so wrongly typed: already reported by the item schema
+                    pass
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def apply_defaults(self, value):
+        if not isinstance(value, list):
+            return value
+        return [self._items.apply_defaults(item) for item in value]
+
+
+class _ValidationContext(object):
+    """State of a validation: the violations found so far, the indexes and the references to be resolved"""
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self):
+        self.violations = []
+        self._indexes = {}  # Set of the indexed values by index name
+        self._index_paths = {}  # Path of the indexed list by index name
+        self._references = []  # (path, index name, value) triples
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def add_violation(self, path, message):
+        self.violations.append("%s: %s" % (_format_path(path), message))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def add_reference(self, path, index_name, value):
+        self._references.append((path, index_name, value))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def create_index(self, index_name, path):
+        """
+        :return: The set to be filled with the indexed values, a throwaway set for an unnamed index
+        :rtype: set
+        """
+        if index_name is None:
+            return set()
+        self._index_paths[index_name] = path
+        return self._indexes.setdefault(index_name, set())
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def resolve_references(self):
+        for path, index_name, value in self._references:
+            if value not in self._indexes.get(index_name, ()):
+                self.add_violation(path, "\"%s\" is not declared in %s"
+                                   % (value, _format_path(self._index_paths.get(index_name, (None, index_name)))))
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+def _format_path(path):
+    """
+    Paths are built as (parent path, field name or item index) pairs while validating, and only formatted for the
+    violations: (((None, "KAFKA"), "TOPIC_LIST"), 3) gives KAFKA.TOPIC_LIST[3]
+    """
+    components = []
+    while path is not None:
+        path, component = path
+        components.append("[%d]" % component if isinstance(component, int) else "." + component)
+    return "".join(reversed(components)).lstrip(".")
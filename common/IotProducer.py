@@ -0,0 +1,215 @@
+import json
+import time
+import logging
+from common.KafkaIotException import KafkaIotException
+from common.Metrics import METRICS
+
+try:
+    from confluent_kafka import Producer
+except ImportError:  # confluent-kafka is optional, a producer instance must be given when it is not installed
+    Producer = None
+
+logger = logging.getLogger(__name__)
+
+PRODUCER_REJECTED = METRICS.counter("kafka_iot_producer_rejected_total",
+                                    "Messages rejected because the group id has no write right on their topic")
+PRODUCER_DELIVERY_ERRORS = METRICS.counter("kafka_iot_producer_delivery_errors_total",
+                                           "Messages which could not be delivered by topic and error")
+PRODUCER_SENT_MESSAGES = METRICS.gauge("kafka_iot_producer_sent_messages",
+                                       "Messages sent to the brokers since the producer started, from its statistics")
+PRODUCER_QUEUED_MESSAGES = METRICS.gauge("kafka_iot_producer_queued_messages",
+                                         "Messages waiting in the producer queue, from its statistics")
+
+
+class IotProducer(object):
+    """Device message producer of a group id. Messages are keyed by device id and partitioned with the java client
+    hash, so that the messages of a device land in the same partition in order. Batching and compression are left to
+    librdkafka, and only the failed deliveries reach Python: the delivered messages are counted from the periodic
+    producer statistics instead of one callback per message"""
+
+    DEFAULT_LINGER_MS = 5
+    DEFAULT_BATCH_SIZE = 1048576
+    DEFAULT_COMPRESSION = "lz4"
+    DEFAULT_STATISTICS_INTERVAL_MS = 15000
+    DEFAULT_POLL_INTERVAL = 1000
+    DEFAULT_QUEUE_FULL_TIMEOUT = 30
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, group_id, rights_matrix, broker_list, linger_ms=DEFAULT_LINGER_MS, batch_size=DEFAULT_BATCH_SIZE,
+                 compression=DEFAULT_COMPRESSION, statistics_interval_ms=DEFAULT_STATISTICS_INTERVAL_MS,
+                 poll_interval=DEFAULT_POLL_INTERVAL, queue_full_timeout=DEFAULT_QUEUE_FULL_TIMEOUT, config=None,
+                 producer_class=None):
+        """
+        IotProducer constructor
+        :param group_id: The group id the messages are produced for, only its writable topics are accepted
+        :type group_id: GroupId
+        :param rights_matrix: The compiled rights, the group id being declared in it
+        :type rights_matrix: RightsMatrix
+        :param broker_list: Kafka brokers used to bootstrap the producer connection
+        :type broker_list: list[KafkaBroker]
+        :param linger_ms: Time in milliseconds messages are held to be sent in a single batch
+        :type linger_ms: int
+        :param batch_size: Maximum size in bytes of a batch of messages sent to a partition
+        :type batch_size: int
+        :param compression: Compression codec of the batches: none, gzip, snappy, lz4 or zstd
+        :type compression: str
+        :param statistics_interval_ms: Time in milliseconds between two producer statistics, 0 to disable them
+        :type statistics_interval_ms: int
+        :param poll_interval: Number of produced messages between two servings of the delivery errors
+        :type poll_interval: int
+        :param queue_full_timeout: Time in seconds a message waits for room in a full producer queue before failing
+        :type queue_full_timeout: float
+        :param config: Additional librdkafka properties, overriding the ones above
+        :type config: dict
+        :param producer_class: Class the producer is built with, confluent_kafka.Producer if None
+        :type producer_class: type
+        """
+        if producer_class is None:
+            if Producer is None:
+                raise KafkaIotException("confluent-kafka is not installed, messages can't be produced")
+            producer_class = Producer
+
+        self.group_id = group_id
+        self._rights_matrix = rights_matrix
+        self._poll_interval = poll_interval
+        self._queue_full_timeout = queue_full_timeout
+        self._unpolled_count = 0
+        self._writable_topics = {}  # Write right by topic name, filled on the first message of each topic
+
+        producer_config = {
+            "bootstrap.servers": ",".join("%s:%d" % (broker.host, broker.port) for broker in broker_list),
+            "client.id": group_id.name,
+            "linger.ms": linger_ms,
+            "batch.size": batch_size,
+            "compression.type": compression,
+            "partitioner": "murmur2_random",  # Same partition as the java clients for a device id
+            "delivery.report.only.error": True,
+            "on_delivery": self._on_delivery_error
+        }
+        if statistics_interval_ms > 0:
+            producer_config["statistics.interval.ms"] = statistics_interval_ms
+            producer_config["stats_cb"] = self._on_statistics
+        producer_config.update(config or {})
+        self._producer = producer_class(producer_config)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def produce(self, topic_name, device_id, value, timestamp=None, partition=None):
+        """
+        Queue a device message, it is sent with the next batch of its partition
+        :param topic_name: The topic name, the group id must have a write right on it
+        :type topic_name: str
+        :param device_id: The device id, used as message key
+        :type device_id: str
+        :param value: The message payload
+        :type value: bytes
+        :param timestamp: The message creation time in milliseconds since epoch, the current time if None
+        :type timestamp: int
+        :param partition: The partition, overriding the device id one if set
+        :type partition: int
+        """
+        self._check_write_right(topic_name)
+        self._queue(topic_name, device_id, value, timestamp, partition)
+        self._unpolled_count += 1
+        if self._unpolled_count >= self._poll_interval:
+            self.poll()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def produce_batch(self, topic_name, messages):
+        """
+        Queue device messages of a topic, the write right being checked once
+        :param topic_name: The topic name, the group id must have a write right on it
+        :type topic_name: str
+        :param messages: The (device id, payload) couples
+        :type messages: collections.Iterable[(str, bytes)]
+        """
+        self._check_write_right(topic_name)
+        for device_id, value in messages:
+            self._queue(topic_name, device_id, value)
+        self.poll()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def poll(self, timeout=0):
+        """
+        Serve the delivery errors and the statistics
+        :param timeout: Maximum time in seconds to wait for an event
+        :type timeout: float
+        """
+        self._unpolled_count = 0
+        self._producer.poll(timeout)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def flush(self, timeout=None):
+        """
+        Wait for the queued messages to be delivered
+        :param timeout: Maximum time in seconds to wait, endless if None
+        :type timeout: float
+        :return: The number of messages still queued
+        :rtype: int
+        """
+        self._unpolled_count = 0
+        remaining_count = self._producer.flush() if timeout is None else self._producer.flush(timeout)
+        if remaining_count > 0:
+            logger.warning("%d message(s) of group id %s are still queued after flushing", remaining_count,
+                           self.group_id.name)
+        return remaining_count
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def can_write(self, topic_name):
+        """
+        :param topic_name: The topic name
+        :type topic_name: str
+        :return: True if the group id has a write right on the topic
+        :rtype: bool
+        """
+        writable = self._writable_topics.get(topic_name)
+        if writable is None:
+            writable = self._rights_matrix.can_write(self.group_id.name, topic_name)
+            self._writable_topics[topic_name] = writable
+        return writable
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _check_write_right(self, topic_name):
+        if not self.can_write(topic_name):
+            PRODUCER_REJECTED.inc(group_id=self.group_id.name, topic=topic_name)
+            raise KafkaIotException("Group id %s has no write right on topic %s" % (self.group_id.name, topic_name))
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _queue(self, topic_name, device_id, value, timestamp=None, partition=None):
+        """
+        Queue a message, waiting for the delivery of the queued ones while the producer queue is full
+        """
+        deadline = None
+        while True:
+            try:
+                if timestamp is None and partition is None:
+                    self._producer.produce(topic_name, value, device_id)
+                else:
+                    self._producer.produce(topic_name, value, device_id, timestamp=timestamp or 0,
+                                           partition=-1 if partition is None else partition)
+                return
+            except BufferError:
+                now = time.time()
+                if deadline is None:
+                    deadline = now + self._queue_full_timeout
+                elif now >= deadline:
+                    raise KafkaIotException("Producer queue of group id %s still full after %s second(s)"
+                                            % (self.group_id.name, self._queue_full_timeout))
+                self.poll(min(0.1, deadline - now))
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _on_delivery_error(self, error, message):
+        """
+        Delivery report callback, only called for the failed messages
+        """
+        PRODUCER_DELIVERY_ERRORS.inc(group_id=self.group_id.name, topic=message.topic(), error=error.name())
+        logger.error("Message of device %s can't be delivered to topic %s: %s", message.key(), message.topic(),
+                     error.str())
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _on_statistics(self, statistics_json):
+        """
+        Statistics callback, the librdkafka statistics being a json document
+        """
+        statistics = json.loads(statistics_json)
+        PRODUCER_SENT_MESSAGES.set(statistics.get("txmsgs", 0), group_id=self.group_id.name)
+        PRODUCER_QUEUED_MESSAGES.set(statistics.get("msg_cnt", 0), group_id=self.group_id.name)
@@ -1,21 +1,71 @@
 import os
+import json
+import queue
+import atexit
 import logging
-from logging.handlers import RotatingFileHandler
+import collections
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 from common.Utils import expand_var_and_user
 from common.KafkaIotException import KafkaIotException
 
+LOG_FORMAT_TEXT = "TEXT"
+LOG_FORMAT_JSON = "JSON"
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Format each log record as a single line json object"""
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, app_name):
+        """
+        Json lines formatter constructor
+        :param app_name: The application name added to every record
+        :type app_name: str
+        """
+        super().__init__()
+        self._app_name = app_name
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def format(self, record):
+        log_entry = collections.OrderedDict([
+            ("time", self.formatTime(record)),
+            ("level", record.levelname),
+            ("app", self._app_name),
+            ("logger", record.name),
+            ("message", record.getMessage())
+        ])
+        if record.exc_info:
+            log_entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(log_entry)
 
-# ----------------------------------------------------------------------------------------------------------------------
-def init_logger(log_level, log_location, app_name):
-    # Getting log level
-    log_level = _define_log_level(log_level)
 
+# ----------------------------------------------------------------------------------------------------------------------
+def init_logger(log_level, log_location, app_name, log_format=LOG_FORMAT_TEXT, logger_levels=None):
+    """
+    Set the root logger up. Log records are queued by the logging threads and written into the log file and the
+    console by a single background thread, stopped at exit once every queued record has been written
+    :param log_level: The root log level: debug, info, warning, error, critical
+    :type log_level: str
+    :param log_location: The directory of the log file
+    :type log_location: str
+    :param app_name: The application name, part of every record and of the log file name
+    :type app_name: str
+    :param log_format: TEXT or JSON, one json object per line
+    :type log_format: str
+    :param logger_levels: Log level by logger name, overriding the root level for a module or a dedicated logger
+    :type logger_levels: dict[str, str]
+    :return: The listener writing the queued records
+    :rtype: QueueListener
+    """
     # Modify logger log level
+    set_log_levels(log_level, logger_levels)
     logger = logging.getLogger()
-    logger.setLevel(log_level)
 
     # Set file formatter
-    formatter = logging.Formatter("%(asctime)s :: %(levelname)s :: " + app_name + " ::  %(message)s")
+    if isinstance(log_format, str) and log_format.upper() == LOG_FORMAT_JSON:
+        formatter = JsonLinesFormatter(app_name)
+    else:
+        formatter = logging.Formatter("%(asctime)s :: %(levelname)s :: " + app_name + " ::  %(message)s")
     log_filename = "%s_log.txt" % app_name
     log_location = expand_var_and_user(log_location)
 
@@ -23,24 +73,50 @@ def init_logger(log_level, log_location, app_name):
         log_file_path = os.path.join(log_location, log_filename)
         need_roll = os.path.isfile(log_file_path)
 
-        # Redirect logs into a log file
+        # Redirect logs into a log file. Levels are filtered by the loggers, so that a logger level can be lower than
+        # the root one
         file_handler = RotatingFileHandler(log_file_path, backupCount=10, maxBytes=2*1024*1024)
-        file_handler.setLevel(log_level)
         file_handler.setFormatter(formatter)
         if need_roll:
             file_handler.doRollover()
-        logger.addHandler(file_handler)
 
         # Redirect logs into the user console
         stream_handler = logging.StreamHandler()
-        stream_handler.setLevel(log_level)
         stream_handler.setFormatter(formatter)
-        logger.addHandler(stream_handler)
+
+        # The logging threads only enqueue the records, the file and console writes are done by the listener thread
+        log_queue = queue.Queue(-1)
+        logger.addHandler(QueueHandler(log_queue))
+        queue_listener = QueueListener(log_queue, file_handler, stream_handler)
+        queue_listener.start()
+        atexit.register(queue_listener.stop)
+        return queue_listener
     else:
         raise KafkaIotException("Log directory: %s does not exist, create it before relaunching the program" %
                                 log_location)
 
 
+# ----------------------------------------------------------------------------------------------------------------------
+def set_log_levels(log_level, logger_levels=None, previous_logger_levels=None):
+    """
+    Set the root log level and the logger levels, which can be done again while running without touching the handlers
+    :param log_level: The root log level: debug, info, warning, error, critical
+    :type log_level: str
+    :param logger_levels: Log level by logger name, overriding the root level for a module or a dedicated logger
+    :type logger_levels: dict[str, str]
+    :param previous_logger_levels: The logger levels set before, the loggers missing from logger_levels get the root
+    level back
+    :type previous_logger_levels: dict[str, str]
+    """
+    logging.getLogger().setLevel(_define_log_level(log_level))
+    logger_levels = logger_levels or {}
+    for logger_name in (previous_logger_levels or {}):
+        if logger_name not in logger_levels:
+            logging.getLogger(logger_name).setLevel(logging.NOTSET)
+    for logger_name, logger_level in logger_levels.items():
+        logging.getLogger(logger_name).setLevel(_define_log_level(logger_level))
+
+
 # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
 def _define_log_level(log_level):
     """
@@ -0,0 +1,439 @@
+import os
+import time
+import bisect
+import asyncio
+import logging
+import functools
+import threading
+import collections
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from common.Utils import expand_var_and_user
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+DEFAULT_SIZE_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+class _Metric(object):
+    """Metric family, one value per label set"""
+
+    TYPE = None
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, name, help_text):
+        """
+        Metric constructor
+        :param name: The metric name
+        :type name: str
+        :param help_text: The metric description
+        :type help_text: str
+        """
+        self.name = name
+        self.help_text = help_text
+        self._lock = threading.Lock()
+        self._values = collections.OrderedDict()  # Value by sorted label couples
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def to_prometheus_text(self):
+        """
+        :return: The metric in the prometheus text exposition format
+        :rtype: str
+        """
+        lines = ["# HELP %s %s" % (self.name, self.help_text), "# TYPE %s %s" % (self.name, self.TYPE)]
+        with self._lock:
+            for label_key, value in self._values.items():
+                lines += self._format_value(label_key, value)
+        return "\n".join(lines) + "\n"
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _format_value(self, label_key, value):
+        raise NotImplementedError()
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    @staticmethod
+    def _label_key(labels):
+        return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    @staticmethod
+    def _format_labels(label_key):
+        if len(label_key) == 0:
+            return ""
+        return "{%s}" % ",".join("%s=\"%s\"" % (name, value.replace("\\", "\\\\").replace("\"", "\\\"")
+                                                .replace("\n", "\\n"))
+                                 for name, value in label_key)
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    @staticmethod
+    def _format_number(number):
+        if isinstance(number, float) and number == float("inf"):
+            return "+Inf"
+        return repr(number) if isinstance(number, float) else str(number)
+
+
+class Counter(_Metric):
+    """Monotonic counter"""
+
+    TYPE = "counter"
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def inc(self, amount=1, **labels):
+        """
+        Increase the counter of a label set
+        :param amount: The increment, positive
+        :type amount: float
+        :param labels: The label values by label name
+        """
+        label_key = _Metric._label_key(labels)
+        with self._lock:
+            self._values[label_key] = self._values.get(label_key, 0) + amount
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def get(self, **labels):
+        with self._lock:
+            return self._values.get(_Metric._label_key(labels), 0)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def get_total(self):
+        """
+        :return: The sum of the counters of every label set
+        :rtype: float
+        """
+        with self._lock:
+            return sum(self._values.values())
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _format_value(self, label_key, value):
+        return ["%s%s %s" % (self.name, _Metric._format_labels(label_key), _Metric._format_number(value))]
+
+
+class Gauge(_Metric):
+    """Value which can go up and down"""
+
+    TYPE = "gauge"
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def set(self, value, **labels):
+        """
+        Set the value of a label set
+        :param value: The value
+        :type value: float
+        :param labels: The label values by label name
+        """
+        label_key = _Metric._label_key(labels)
+        with self._lock:
+            self._values[label_key] = value
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def remove(self, **labels):
+        """
+        Stop exporting a label set, e.g. once the process it describes is gone
+        :param labels: The label values by label name
+        """
+        with self._lock:
+            self._values.pop(_Metric._label_key(labels), None)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def get(self, **labels):
+        with self._lock:
+            return self._values.get(_Metric._label_key(labels))
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _format_value(self, label_key, value):
+        return ["%s%s %s" % (self.name, _Metric._format_labels(label_key), _Metric._format_number(value))]
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in fixed cumulative buckets, with their sum and count"""
+
+    TYPE = "histogram"
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, name, help_text, buckets=DEFAULT_LATENCY_BUCKETS):
+        """
+        Histogram constructor
+        :param name: The metric name
+        :type name: str
+        :param help_text: The metric description
+        :type help_text: str
+        :param buckets: The bucket upper bounds, increasing
+        :type buckets: tuple[float]
+        """
+        super().__init__(name, help_text)
+        self.buckets = tuple(sorted(buckets))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def observe(self, value, **labels):
+        """
+        Record a value for a label set
+        :param value: The observed value
+        :type value: float
+        :param labels: The label values by label name
+        """
+        label_key = _Metric._label_key(labels)
+        bucket_index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            bucket_counts, value_sum, count = self._values.get(label_key, ([0] * (len(self.buckets) + 1), 0.0, 0))
+            bucket_counts[bucket_index] += 1
+            self._values[label_key] = (bucket_counts, value_sum + value, count + 1)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def time(self, **labels):
+        """
+        Measure the wall time of a block or a function, synchronous or coroutine
+        :param labels: The label values by label name
+        :rtype: Timer
+        """
+        return Timer(self, labels)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def get_count(self, **labels):
+        with self._lock:
+            return self._values.get(_Metric._label_key(labels), (None, 0.0, 0))[2]
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _format_value(self, label_key, value):
+        bucket_counts, value_sum, count = value
+        lines = []
+        cumulative_count = 0
+        for upper_bound, bucket_count in zip(self.buckets + (float("inf"),), bucket_counts):
+            cumulative_count += bucket_count
+            lines.append("%s_bucket%s %d" % (self.name, _Metric._format_labels(
+                label_key + (("le", _Metric._format_number(float(upper_bound))),)), cumulative_count))
+        lines.append("%s_sum%s %s" % (self.name, _Metric._format_labels(label_key), _Metric._format_number(value_sum)))
+        lines.append("%s_count%s %d" % (self.name, _Metric._format_labels(label_key), count))
+        return lines
+
+
+class Timer(object):
+    """Record the wall time of a block into a histogram, usable as a context manager or a decorator"""
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, histogram, labels):
+        """
+        Timer constructor
+        :param histogram: The histogram recording the wall time in seconds
+        :type histogram: Histogram
+        :param labels: The label values by label name
+        :type labels: dict[str, str]
+        """
+        self._histogram = histogram
+        self._labels = labels
+        self._start_time = None
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def start(self):
+        """
+        Start measuring, for blocks which can't be wrapped in a with statement
+        :return: The timer itself
+        :rtype: Timer
+        """
+        self._start_time = time.perf_counter()
+        return self
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def stop(self):
+        """
+        Record the wall time elapsed since the timer start
+        :return: The elapsed time in seconds
+        :rtype: float
+        """
+        elapsed_time = time.perf_counter() - self._start_time
+        self._histogram.observe(elapsed_time, **self._labels)
+        return elapsed_time
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __enter__(self):
+        return self.start()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+        return False
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __call__(self, function):
+        histogram, labels = self._histogram, self._labels
+
+        if asyncio.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def timed_coroutine(*args, **kwargs):
+                with Timer(histogram, labels):
+                    return await function(*args, **kwargs)
+            return timed_coroutine
+
+        @functools.wraps(function)
+        def timed_function(*args, **kwargs):
+            with Timer(histogram, labels):
+                return function(*args, **kwargs)
+        return timed_function
+
+
+class MetricsRegistry(object):
+    """Set of metrics exported together"""
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = collections.OrderedDict()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def counter(self, name, help_text):
+        """
+        Get a counter, registering it on first call
+        :param name: The metric name, ending with _total
+        :type name: str
+        :param help_text: The metric description
+        :type help_text: str
+        :rtype: Counter
+        """
+        return self._register(Counter, name, help_text)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def gauge(self, name, help_text):
+        """
+        Get a gauge, registering it on first call
+        :param name: The metric name
+        :type name: str
+        :param help_text: The metric description
+        :type help_text: str
+        :rtype: Gauge
+        """
+        return self._register(Gauge, name, help_text)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def histogram(self, name, help_text, buckets=DEFAULT_LATENCY_BUCKETS):
+        """
+        Get a histogram, registering it on first call
+        :param name: The metric name
+        :type name: str
+        :param help_text: The metric description
+        :type help_text: str
+        :param buckets: The bucket upper bounds
+        :type buckets: tuple[float]
+        :rtype: Histogram
+        """
+        return self._register(Histogram, name, help_text, buckets)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def to_prometheus_text(self):
+        """
+        :return: Every metric in the prometheus text exposition format
+        :rtype: str
+        """
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "".join(metric.to_prometheus_text() for metric in metrics)
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _register(self, metric_class, name, *args):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = metric_class(name, *args)
+            return metric
+
+
+class MetricsExporter(object):
+    """Expose a metrics registry through a prometheus HTTP endpoint and/or a file dumped periodically"""
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, registry, port=None, file_path=None, dump_interval=15):
+        """
+        Metrics exporter constructor
+        :param registry: The exported metrics
+        :type registry: MetricsRegistry
+        :param port: Port of the HTTP endpoint serving the metrics on every path, no endpoint if None
+        :type port: int
+        :param file_path: Path of the file the metrics are dumped into, no dump if None
+        :type file_path: str
+        :param dump_interval: Time in seconds between two file dumps
+        :type dump_interval: float
+        """
+        self._registry = registry
+        self._port = port
+        self._file_path = None if file_path is None else expand_var_and_user(file_path)
+        self._dump_interval = dump_interval
+        self._http_server = None
+        self._stop_event = threading.Event()
+        self._threads = []
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def start(self):
+        """
+        Start serving the metrics and dumping them periodically, in daemon threads
+        """
+        if self._port is not None:
+            self._http_server = HTTPServer(("", self._port), _make_metrics_handler(self._registry))
+            self._start_thread("metrics-http", self._http_server.serve_forever)
+            logger.info("Metrics served on port %d", self._port)
+
+        if self._file_path is not None:
+            self._start_thread("metrics-dump", self._dump_periodically)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def stop(self):
+        """
+        Stop the exporter threads, the metrics are dumped a last time
+        """
+        self._stop_event.set()
+        if self._http_server is not None:
+            self._http_server.shutdown()
+            self._http_server.server_close()
+        for thread in self._threads:
+            thread.join()
+        self.dump()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def dump(self):
+        """
+        Write the metrics into the dump file, the previous file is replaced atomically
+        """
+        if self._file_path is None:
+            return
+        temp_file_path = self._file_path + ".tmp"
+        with open(temp_file_path, "w") as metrics_file:
+            metrics_file.write(self._registry.to_prometheus_text())
+        os.replace(temp_file_path, self._file_path)
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _dump_periodically(self):
+        while not self._stop_event.wait(self._dump_interval):
+            try:
+                self.dump()
+            except IOError as e:
+                logger.warning("Metrics can't be dumped into %s: %s", self._file_path, e)
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _start_thread(self, name, target):
+        thread = threading.Thread(name=name, target=target, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+
+# ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+def _make_metrics_handler(registry):
+    """
+    Build an HTTP request handler serving the metrics of a registry
+    :param registry: The served metrics
+    :type registry: MetricsRegistry
+    :rtype: type
+    """
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            content = registry.to_prometheus_text().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+
+        def log_message(self, log_format, *args):
+            logger.debug("Metrics endpoint >>> " + log_format, *args)
+
+    return MetricsHandler
+
+
+# Registry shared by the whole process
+METRICS = MetricsRegistry()
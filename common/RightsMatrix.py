@@ -0,0 +1,278 @@
+import re
+import fnmatch
+import logging
+from common.KafkaIotException import KafkaIotException
+
+logger = logging.getLogger(__name__)
+
+READ = 0
+WRITE = 1
+
+# Kafka topic names are made of [a-zA-Z0-9._-], so the glob special characters can't be part of a topic name
+_PATTERN_CHARACTERS = frozenset("*?[")
+
+
+class RightsMatrix(object):
+    """Effective read and write permissions of every group id. Topic names are interned into ids and the topics a rule
+    allows are held in a bitset indexed by these ids, so that a permission check is a dict lookup and a bit test. A rule
+    is a list of topic names and glob patterns ("*" for every topic, "sensor-*"...). Groups, topics and the inherited
+    rule can be changed one at a time, only the affected bitsets being recomputed"""
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, topic_names=()):
+        """
+        Rights matrix constructor
+        :param topic_names: The declared topics
+        :type topic_names: list[str]
+        """
+        self._topic_ids = {}  # Interned id by topic name
+        self._topic_names = []  # Topic name by id, None once the topic is removed
+        self._inherited_rules = (_TopicRule(()), _TopicRule(()))  # Read and write rules every group id gets
+        self._group_rules = {}  # Read and write rules by group id name
+        self._app_group_names = {}  # Group id name by application name
+        for topic_name in topic_names:
+            self.add_topic(topic_name)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def add_topic(self, topic_name):
+        """
+        Intern a topic and set its bit in the bitset of every rule it matches
+        :param topic_name: The topic name
+        :type topic_name: str
+        """
+        if topic_name in self._topic_ids:
+            return
+        topic_id = len(self._topic_names)
+        self._topic_ids[topic_name] = topic_id
+        self._topic_names.append(topic_name)
+        for rule in self._get_rules():
+            if rule.matches(topic_name):
+                rule.set_bit(topic_id)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def remove_topic(self, topic_name):
+        """
+        :param topic_name: The topic name
+        :type topic_name: str
+        """
+        topic_id = self._topic_ids.pop(topic_name, None)
+        if topic_id is None:
+            return
+        self._topic_names[topic_id] = None
+        for rule in self._get_rules():
+            rule.clear_bit(topic_id)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def set_inheritance(self, read, write):
+        """
+        Set the rights every group id inherits
+        :param read: Topic names and patterns with read access
+        :type read: list[str]
+        :param write: Topic names and patterns with write access
+        :type write: list[str]
+        """
+        self._inherited_rules = (self._compile_rule(read), self._compile_rule(write))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def set_group(self, group_name, read, write):
+        """
+        Add a group id or replace its rights
+        :param group_name: The group id name
+        :type group_name: str
+        :param read: Topic names and patterns with read access, on top of the inherited ones
+        :type read: list[str]
+        :param write: Topic names and patterns with write access, on top of the inherited ones
+        :type write: list[str]
+        """
+        self._group_rules[group_name] = (self._compile_rule(read), self._compile_rule(write))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def remove_group(self, group_name):
+        """
+        :param group_name: The group id name
+        :type group_name: str
+        """
+        self._group_rules.pop(group_name, None)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def set_application(self, app_name, group_name):
+        """
+        :param app_name: The application name
+        :type app_name: str
+        :param group_name: The name of the group id the application uses
+        :type group_name: str
+        """
+        self._app_group_names[app_name] = group_name
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def get_application_group(self, app_name):
+        """
+        :param app_name: The application name
+        :type app_name: str
+        :return: The name of the group id the application uses
+        :rtype: str
+        """
+        if app_name not in self._app_group_names:
+            raise KafkaIotException("Application \"%s\" is not declared" % app_name)
+        return self._app_group_names[app_name]
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def can_read(self, group_name, topic_name):
+        """
+        :param group_name: The group id name, an undeclared group id has no right
+        :type group_name: str
+        :param topic_name: The topic name, an undeclared topic is matched against the rules
+        :type topic_name: str
+        :rtype: bool
+        """
+        return self._is_allowed(group_name, topic_name, READ)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def can_write(self, group_name, topic_name):
+        """
+        :param group_name: The group id name, an undeclared group id has no right
+        :type group_name: str
+        :param topic_name: The topic name, an undeclared topic is matched against the rules
+        :type topic_name: str
+        :rtype: bool
+        """
+        return self._is_allowed(group_name, topic_name, WRITE)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def get_readable_topics(self, group_name):
+        """
+        :param group_name: The group id name
+        :type group_name: str
+        :return: The declared topics the group id can read
+        :rtype: list[str]
+        """
+        return self._get_allowed_topics(group_name, READ)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def get_writable_topics(self, group_name):
+        """
+        :param group_name: The group id name
+        :type group_name: str
+        :return: The declared topics the group id can write
+        :rtype: list[str]
+        """
+        return self._get_allowed_topics(group_name, WRITE)
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _compile_rule(self, topic_list):
+        """
+        :return: The rule of a topic list, with the bitset of the declared topics it matches
+        :rtype: _TopicRule
+        """
+        rule = _TopicRule(topic_list)
+        if rule.pattern is None:
+            # Exact names only, no need to go through every topic
+            for topic_name in rule.names:
+                topic_id = self._topic_ids.get(topic_name)
+                if topic_id is not None:
+                    rule.set_bit(topic_id)
+        else:
+            for topic_name, topic_id in self._topic_ids.items():
+                if rule.matches(topic_name):
+                    rule.set_bit(topic_id)
+        return rule
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _get_rules(self):
+        yield from self._inherited_rules
+        for group_rules in self._group_rules.values():
+            yield from group_rules
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _is_allowed(self, group_name, topic_name, access):
+        group_rules = self._group_rules.get(group_name)
+        if group_rules is None:
+            return False
+        rule = group_rules[access]
+        inherited_rule = self._inherited_rules[access]
+
+        topic_id = self._topic_ids.get(topic_name)
+        if topic_id is None:
+            return rule.matches(topic_name) or inherited_rule.matches(topic_name)
+        return rule.test_bit(topic_id) or inherited_rule.test_bit(topic_id)
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _get_allowed_topics(self, group_name, access):
+        group_rules = self._group_rules.get(group_name)
+        if group_rules is None:
+            return []
+        rule = group_rules[access]
+        inherited_rule = self._inherited_rules[access]
+        return [topic_name for topic_id, topic_name in enumerate(self._topic_names)
+                if topic_name is not None and (rule.test_bit(topic_id) or inherited_rule.test_bit(topic_id))]
+
+
+class _TopicRule(object):
+    """Topic names and patterns of a right, along with the bitset of the declared topics they match"""
+
+    __slots__ = ("names", "pattern", "bits")
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, topic_list):
+        self.names = frozenset(topic for topic in topic_list if not is_topic_pattern(topic))
+        patterns = [fnmatch.translate(topic) for topic in topic_list if is_topic_pattern(topic)]
+        self.pattern = re.compile("|".join(patterns)) if len(patterns) > 0 else None
+        self.bits = bytearray()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def matches(self, topic_name):
+        return topic_name in self.names or (self.pattern is not None and self.pattern.match(topic_name) is not None)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def set_bit(self, topic_id):
+        byte_index = topic_id >> 3
+        if byte_index >= len(self.bits):
+            self.bits.extend(bytes(byte_index + 1 - len(self.bits)))
+        self.bits[byte_index] |= 1 << (topic_id & 7)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def clear_bit(self, topic_id):
+        byte_index = topic_id >> 3
+        if byte_index < len(self.bits):
+            self.bits[byte_index] &= ~(1 << (topic_id & 7)) & 0xFF
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def test_bit(self, topic_id):
+        byte_index = topic_id >> 3
+        return byte_index < len(self.bits) and self.bits[byte_index] & (1 << (topic_id & 7)) != 0
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def is_topic_pattern(topic):
+    """
+    :param topic: A topic name or a glob pattern, as used in the kafka rights
+    :type topic: str
+    :return: True if the topic is a glob pattern
+    :rtype: bool
+    """
+    return not _PATTERN_CHARACTERS.isdisjoint(topic)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def compile_rights(config_rights_inheritance, config_group_id_list, config_app_list, topic_names):
+    """
+    Compile the rights of the system configuration
+    :param config_rights_inheritance: KAFKA.KAFKA_RIGHTS_INHERITANCE
+    :type config_rights_inheritance: dict
+    :param config_group_id_list: KAFKA.GROUP_ID_LIST
+    :type config_group_id_list: list[dict]
+    :param config_app_list: APP_LIST
+    :type config_app_list: list[dict]
+    :param topic_names: The declared topics
+    :type topic_names: list[str]
+    :rtype: RightsMatrix
+    """
+    rights_matrix = RightsMatrix(topic_names)
+    rights_matrix.set_inheritance(config_rights_inheritance["READ"], config_rights_inheritance["WRITE"])
+    for config_group_id in config_group_id_list:
+        rights_matrix.set_group(config_group_id["NAME"], config_group_id["KAFKA_RIGHTS"]["READ"],
+                                config_group_id["KAFKA_RIGHTS"]["WRITE"])
+    for config_app in config_app_list:
+        rights_matrix.set_application(config_app["NAME"], config_app["GROUP_ID"])
+    logger.debug("Rights of %d group id(s) compiled over %d topic(s)", len(config_group_id_list), len(topic_names))
+    return rights_matrix
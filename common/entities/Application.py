@@ -1,25 +1,39 @@
 import logging
 
+logger = logging.getLogger(__name__)
+
 
 class Application(object):
     """Application"""
 
     # ------------------------------------------------------------------------------------------------------------------
-    def __init__(self, name, group_id):
+    def __init__(self, name, group_id, command=None, replicas=1, cpu_affinity=None):
         """
         Application constructor
         :param name: Application name
         :type name: str
         :param group_id: Group id of the given application
         :type group_id: GroupId
+        :param command: Command line starting a process of the application, the application is not run if None
+        :type command: list[str]
+        :param replicas: Number of processes of the application
+        :type replicas: int
+        :param cpu_affinity: CPUs the processes are pinned to, one CPU per process taken in turn. No pinning if None
+        :type cpu_affinity: list[int]
         """
         self.name = name
         self.group_id = group_id
-        logging.debug("Application loaded %s" % str(self))
+        self.command = command
+        self.replicas = replicas
+        self.cpu_affinity = cpu_affinity
+        logger.debug("Application loaded %s", self)
 
     # ------------------------------------------------------------------------------------------------------------------
     def __str__(self):
-        return "{name: [%s], group id: [%s]}" % (
+        return "{name: [%s], group id: [%s], command: %s, replicas: %d, cpu affinity: %s}" % (
             self.name,
-            str(self.group_id)
+            str(self.group_id),
+            self.command,
+            self.replicas,
+            self.cpu_affinity
         )
@@ -1,6 +1,8 @@
 class GenericHost(object):
     """Generic host"""
 
+    __slots__ = ("host", "port")
+
     # ------------------------------------------------------------------------------------------------------------------
     def __init__(self, host, port):
         """
@@ -1,10 +1,14 @@
 from common.entities.GenericHost import GenericHost
 import logging
 
+logger = logging.getLogger(__name__)
+
 
 class Zookeeper(GenericHost):
     """Zookeeper"""
 
+    __slots__ = ()
+
     # ------------------------------------------------------------------------------------------------------------------
     def __init__(self, host, port):
         """
@@ -15,7 +19,7 @@ class Zookeeper(GenericHost):
         :type port: int
         """
         super(Zookeeper, self).__init__(host, port)
-        logging.debug("Zookeeper loaded %s" % str(self))
+        logger.debug("Zookeeper loaded %s", self)
 
     # ------------------------------------------------------------------------------------------------------------------
     def __str__(self):
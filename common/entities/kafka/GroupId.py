@@ -1,9 +1,13 @@
 import logging
 
+logger = logging.getLogger(__name__)
+
 
 class GroupId(object):
     """Group id"""
 
+    __slots__ = ("name", "kafka_rights")
+
     # ------------------------------------------------------------------------------------------------------------------
     def __init__(self, name, kafka_rights):
         """
@@ -15,7 +19,7 @@ class GroupId(object):
         """
         self.name = name
         self.kafka_rights = kafka_rights
-        logging.debug("Group id loaded %s" % str(self))
+        logger.debug("Group id loaded %s", self)
 
     # ------------------------------------------------------------------------------------------------------------------
     def __str__(self):
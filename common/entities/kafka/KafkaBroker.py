@@ -1,10 +1,14 @@
 from common.entities.GenericHost import GenericHost
 import logging
 
+logger = logging.getLogger(__name__)
+
 
 class KafkaBroker(GenericHost):
     """Kafka broker"""
 
+    __slots__ = ("id_number",)
+
     # ------------------------------------------------------------------------------------------------------------------
     def __init__(self, host, port, id_number):
         """
@@ -13,10 +17,12 @@ class KafkaBroker(GenericHost):
         :type host: str
         :param port: Kafka broker port
         :type port: int
+        :param id_number: Kafka broker id
+        :type id_number: int
         """
         super(KafkaBroker, self).__init__(host, port)
         self.id_number = id_number
-        logging.debug("Kafka broker loaded %s" % str(self))
+        logger.debug("Kafka broker loaded %s", self)
 
     # ------------------------------------------------------------------------------------------------------------------
     def __str__(self):
@@ -1,5 +1,7 @@
 import logging
 
+logger = logging.getLogger(__name__)
+
 
 class KafkaRights(object):
     """Kafka rights"""
@@ -23,7 +25,7 @@ class KafkaRights(object):
             self.write.update(["*"])
         else:
             self.write.update(write)
-        logging.debug("Kafka rights loaded %s" % str(self))
+        logger.debug("Kafka rights loaded %s", self)
 
     # ------------------------------------------------------------------------------------------------------------------
     def extend(self, kafka_rights):
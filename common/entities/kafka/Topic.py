@@ -1,11 +1,15 @@
 import logging
 
+logger = logging.getLogger(__name__)
+
 
 class Topic(object):
     """Topic"""
 
+    __slots__ = ("name", "replication_factor", "partition_number", "config", "configs")
+
     # ------------------------------------------------------------------------------------------------------------------
-    def __init__(self, name, replication_factor, partition_number, config):
+    def __init__(self, name, replication_factor, partition_number, config, configs=None):
         """
         Topic constructor
         :param name: Topic name
@@ -16,19 +20,24 @@ class Topic(object):
         :type partition_number: int
         :param config: Topic config
         :type config: list[Config]
+        :param configs: Topic level broker configs (retention.ms, cleanup.policy...) by config name. None if they are
+        not managed
+        :type configs: dict[str, str]
         """
         self.name = name
         self.replication_factor = replication_factor
         self.partition_number = partition_number
         self.config = config
-        logging.debug("Topic loaded %s" % str(self))
+        self.configs = configs
+        logger.debug("Topic loaded %s", self)
 
     # ------------------------------------------------------------------------------------------------------------------
     def __str__(self):
-        return "{name: %s, replication factor: %d, partition number: %d, config: %s%s}" % (
+        return "{name: %s, replication factor: %d, partition number: %d, configs: %s, config: %s%s}" % (
             self.name,
             self.replication_factor,
             self.partition_number,
+            self.configs,
             "\n" if len(self.config) > 0 else "",
             "\n".join(str(conf) for conf in self.config)
         )
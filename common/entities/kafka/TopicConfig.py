@@ -1,9 +1,13 @@
 import logging
 
+logger = logging.getLogger(__name__)
+
 
 class TopicConfig(object):
     """Topic config"""
 
+    __slots__ = ("partition", "leader", "replicas", "isr")
+
     # ------------------------------------------------------------------------------------------------------------------
     def __init__(self, partition, leader, replicas, isr):
         """
@@ -13,15 +17,16 @@ class TopicConfig(object):
         :param leader: Topic config kafka broker leader
         :type leader: int
         :param replicas: Topic config replicas on kafka broker
-        :type replicas: list[int]
+        :type replicas: list[int] | tuple[int]
         :param isr: Topic config in sync replicas
-        :type isr: list[int]
+        :type isr: list[int] | tuple[int]
         """
         self.partition = partition
         self.leader = leader
-        self.replicas = replicas
-        self.isr = isr
-        logging.debug("Topic config loaded %s" % str(self))
+        # Immutable and lighter than lists, small broker ids are shared int objects
+        self.replicas = tuple(replicas)
+        self.isr = tuple(isr)
+        logger.debug("Topic config loaded %s", self)
 
     # ------------------------------------------------------------------------------------------------------------------
     def __str__(self):
@@ -0,0 +1,156 @@
+import re
+import collections
+
+TOPIC = "Topic"
+GROUP = "Group"
+READ = "Read"
+WRITE = "Write"
+
+
+class Acl(collections.namedtuple("Acl", ["principal", "resource_type", "resource_name", "operation"])):
+    """Allow ACL on a literal resource, from any host"""
+
+    __slots__ = ()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __str__(self):
+        return "%s %s on %s:%s" % (self.principal, self.operation, self.resource_type, self.resource_name)
+
+
+class AclBatch(object):
+    """ACLs of a same principal and operation applied with a single kafka-acls.sh invocation"""
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, principal, operation, resources):
+        """
+        Acl batch constructor
+        :param principal: The principal, e.g. User:app-1
+        :type principal: str
+        :param operation: The operation: Read or Write
+        :type operation: str
+        :param resources: The (resource type, resource name) couples
+        :type resources: list[(str, str)]
+        """
+        self.principal = principal
+        self.operation = operation
+        self.resources = resources
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def get_acls(self):
+        """
+        :rtype: list[Acl]
+        """
+        return [Acl(self.principal, resource_type, resource_name, self.operation)
+                for resource_type, resource_name in self.resources]
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def to_script_arguments(self):
+        """
+        :return: The kafka-acls.sh arguments selecting the ACLs of the batch, to be completed with the action
+        :rtype: list[str]
+        """
+        arguments = ["--allow-principal", self.principal, "--allow-host", "*", "--operation", self.operation]
+        for resource_type, resource_name in self.resources:
+            arguments += ["--topic" if resource_type == TOPIC else "--group", resource_name]
+        return arguments
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __str__(self):
+        return "%s %s on [%s]" % (self.principal, self.operation,
+                                  ", ".join("%s:%s" % resource for resource in self.resources))
+
+
+class AclPlan(object):
+    """ACLs to be added and removed to turn the cluster ACLs into the configured ones"""
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, config_acls, running_acls, managed_principals):
+        """
+        Acl plan constructor
+        :param config_acls: The ACLs the configuration grants
+        :type config_acls: set[Acl]
+        :param running_acls: The ACLs of the cluster
+        :type running_acls: set[Acl]
+        :param managed_principals: The principals whose ACLs are managed, the ACLs of other principals are left as is
+        :type managed_principals: set[str]
+        """
+        self.to_add = sorted(config_acls - running_acls)
+        self.to_remove = sorted(acl for acl in running_acls - config_acls if acl.principal in managed_principals)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def is_empty(self):
+        return len(self.to_add) == 0 and len(self.to_remove) == 0
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __str__(self):
+        return "%d ACL(s) to add, %d ACL(s) to remove" % (len(self.to_add), len(self.to_remove))
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def get_group_id_acls(group_id_list, rights_matrix, principal_prefix):
+    """
+    Get the ACLs granting their rights to the group ids. Each group id has its own principal, shared by the
+    applications using it, which can read and write its topics and consume with the group id itself. A "*" right gives
+    an ACL on every topic, the other patterns are resolved into the declared topics they match
+    :param group_id_list: The group ids
+    :type group_id_list: list[GroupId]
+    :param rights_matrix: The compiled rights
+    :type rights_matrix: RightsMatrix
+    :param principal_prefix: Prefix of the group id name making the principal, e.g. User:
+    :type principal_prefix: str
+    :rtype: set[Acl]
+    """
+    acls = set()
+    for group_id in group_id_list:
+        principal = principal_prefix + group_id.name
+        acls.add(Acl(principal, GROUP, group_id.name, READ))
+        for operation, rights, get_allowed_topics in [
+                (READ, group_id.kafka_rights.read, rights_matrix.get_readable_topics),
+                (WRITE, group_id.kafka_rights.write, rights_matrix.get_writable_topics)]:
+            topic_names = ["*"] if "*" in rights else get_allowed_topics(group_id.name)
+            acls.update(Acl(principal, TOPIC, topic_name, operation) for topic_name in topic_names)
+    return acls
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def get_acl_batches(acl_list, batch_size):
+    """
+    Group ACLs into batches of a same principal and operation
+    :param acl_list: The ACLs
+    :type acl_list: list[Acl]
+    :param batch_size: Maximum number of resources per batch
+    :type batch_size: int
+    :rtype: list[AclBatch]
+    """
+    resources_by_key = collections.OrderedDict()
+    for acl in acl_list:
+        resources_by_key.setdefault((acl.principal, acl.operation), []).append((acl.resource_type, acl.resource_name))
+
+    batch_size = max(1, batch_size)
+    return [AclBatch(principal, operation, resources[index:index + batch_size])
+            for (principal, operation), resources in resources_by_key.items()
+            for index in range(0, len(resources), batch_size)]
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def parse_acl_list_output(output_lines):
+    """
+    Parse the output of kafka-acls.sh --list. Only the read and write allow ACLs on topics and groups from any host are
+    kept, the other ones are never managed
+    :param output_lines: The output lines of the script
+    :type output_lines: list[str]
+    :rtype: set[Acl]
+    """
+    acls = set()
+    resource = None
+    for line in output_lines:
+        matches = re.search(r"Current ACLs for resource `(\w+):(.+)`", line)
+        if matches is not None:
+            resource = matches.groups()
+            continue
+        matches = re.search(r"(\S+) has (\w+) permission for operations: (\w+) from hosts: (\S+)", line)
+        if matches is not None and resource is not None and resource[0] in (TOPIC, GROUP):
+            principal, permission, operation, host = matches.groups()
+            if permission == "Allow" and host == "*" and operation in (READ, WRITE):
+                acls.add(Acl(principal, resource[0], resource[1], operation))
+    return acls
@@ -0,0 +1,318 @@
+import logging
+from system_launcher.KafkaDriver import KafkaDriver
+from system_launcher.AclPlan import Acl, TOPIC, GROUP, READ, WRITE
+from common.KafkaIotException import KafkaIotException
+from common.entities.kafka.Topic import Topic
+from common.entities.kafka.TopicConfig import TopicConfig
+
+try:
+    from confluent_kafka import KafkaException
+    from confluent_kafka.admin import AdminClient, NewTopic, NewPartitions, ConfigResource, ConfigSource
+except ImportError:  # confluent-kafka is optional, the script based driver is used when it is not installed
+    AdminClient = None
+
+try:
+    from confluent_kafka import AclBinding, AclBindingFilter, AclOperation, AclPermissionType, ResourceType, \
+        ResourcePatternType
+except ImportError:  # The admin client only manages ACLs from confluent-kafka 1.9, kafka-acls.sh is used otherwise
+    AclBinding = None
+
+logger = logging.getLogger(__name__)
+
+
+class AdminClientKafkaDriver(KafkaDriver):
+    """Kafka driving through a confluent kafka AdminClient connection"""
+
+    DEFAULT_TIMEOUT = 30
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, kafka_path, zookeeper, broker_list, timeout=DEFAULT_TIMEOUT,
+                 metadata_ttl=KafkaDriver.DEFAULT_METADATA_TTL, max_parallel_ops=1):
+        """
+        AdminClientKafkaDriver Constructor
+        :param kafka_path: Path to Kafka install folder (used by the operations that still need kafka scripts)
+        :param zookeeper: Zookeeper info
+        :type zookeeper: Zookeeper
+        :param broker_list: Kafka brokers used to bootstrap the admin client connection
+        :type broker_list: list[KafkaBroker]
+        :param timeout: Timeout in seconds of every admin client request
+        :type timeout: float
+        :param metadata_ttl: Time in seconds the cluster metadata snapshot is kept before being fetched again
+        :type metadata_ttl: float
+        :param max_parallel_ops: Maximum number of kafka scripts running at the same time for multi topic operations
+        :type max_parallel_ops: int
+        """
+        super(AdminClientKafkaDriver, self).__init__(kafka_path, zookeeper, metadata_ttl, max_parallel_ops)
+
+        if AdminClient is None:
+            raise KafkaIotException("confluent-kafka is not installed, the admin client kafka driver can't be used")
+
+        self._timeout = timeout
+        self._bootstrap_servers = ",".join("%s:%d" % (broker.host, broker.port) for broker in broker_list)
+        self._admin_client = AdminClient({"bootstrap.servers": self._bootstrap_servers})
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _do_describe_topics(self, topic_name_list=None):
+        """
+        Describe topics on the cluster with a single metadata request and a single config request
+        :param topic_name_list: Only describe these topics when set, every topic is described otherwise
+        :type topic_name_list: list[str]
+        :return: The topic information by topic name
+        :rtype: dict[str, Topic]
+        """
+        topic_metadata = self._list_topic_metadata()
+        topic_name_list = sorted(topic_metadata.keys()) if topic_name_list is None else topic_name_list
+        topic_name_list = [topic_name for topic_name in topic_name_list if topic_name in topic_metadata]
+        topic_configs = self._describe_topic_configs(topic_name_list)
+        return {topic_name: AdminClientKafkaDriver._metadata_to_topic(topic_metadata[topic_name],
+                                                                      topic_configs[topic_name])
+                for topic_name in topic_name_list}
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _do_create_topics(self, topic_list):
+        """
+        Create topics on the cluster with a single admin client request
+        :param topic_list: The topics to be created
+        :type topic_list: list[Topic]
+        :return: For each topic name, None if the topic has been created, the raised exception otherwise
+        :rtype: dict[str, KafkaIotException]
+        """
+        new_topics = [AdminClientKafkaDriver._topic_to_new_topic(topic) for topic in topic_list]
+        futures = self._admin_client.create_topics(new_topics, operation_timeout=self._timeout,
+                                                   request_timeout=self._timeout)
+        return AdminClientKafkaDriver._collect_results("CREATE TOPIC", futures)
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _do_delete_topics(self, topic_name_list):
+        """
+        Delete topics on the cluster with a single admin client request
+        :param topic_name_list: The name of the topics to delete
+        :type topic_name_list: list[str]
+        :return: For each topic name, None if the topic has been deleted, the raised exception otherwise
+        :rtype: dict[str, KafkaIotException]
+        """
+        futures = self._admin_client.delete_topics(list(topic_name_list), operation_timeout=self._timeout,
+                                                   request_timeout=self._timeout)
+        return AdminClientKafkaDriver._collect_results("DELETE TOPIC", futures)
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _do_create_partitions(self, partition_numbers):
+        """
+        Increase the partition number of topics on the cluster with a single admin client request
+        :param partition_numbers: New partition number to be applied for each topic name
+        :type partition_numbers: dict[str, int]
+        :return: For each topic name, None if the partitions have been created, the raised exception otherwise
+        :rtype: dict[str, KafkaIotException]
+        """
+        new_partitions = [NewPartitions(topic_name, partition_number)
+                          for topic_name, partition_number in partition_numbers.items()]
+        futures = self._admin_client.create_partitions(new_partitions, operation_timeout=self._timeout,
+                                                       request_timeout=self._timeout)
+        return AdminClientKafkaDriver._collect_results("ALTER TOPIC PARTITION", futures)
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _do_alter_topic_configs(self, config_changes):
+        """
+        Alter topic configs on the cluster with a single admin client request. The request replaces every override of
+        a topic, which is what the configured configs are
+        :param config_changes: The config changes, one per topic
+        :type config_changes: list[TopicConfigChange]
+        :return: For each topic name, None if its configs have been altered, the raised exception otherwise
+        :rtype: dict[str, KafkaIotException]
+        """
+        resources = [ConfigResource(ConfigResource.Type.TOPIC, config_change.topic_name,
+                                    set_config=config_change.configs) for config_change in config_changes]
+        futures = self._admin_client.alter_configs(resources, request_timeout=self._timeout)
+        return AdminClientKafkaDriver._collect_results("ALTER TOPIC CONFIG", dict(
+            (resource.name, futures[resource]) for resource in resources))
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _do_list_acls(self):
+        """
+        List the ACLs of the cluster with a single admin client request
+        :rtype: set[Acl]
+        """
+        if AclBinding is None:
+            return super(AdminClientKafkaDriver, self)._do_list_acls()
+
+        acl_filter = AclBindingFilter(ResourceType.ANY, None, ResourcePatternType.ANY, None, None, AclOperation.ANY,
+                                      AclPermissionType.ALLOW)
+        try:
+            acl_bindings = self._admin_client.describe_acls(acl_filter, request_timeout=self._timeout).result()
+        except KafkaException as e:
+            raise KafkaIotException("Error when attempting to list ACLs: %s" % str(e))
+
+        acls = set()
+        for acl_binding in acl_bindings:
+            acl = AdminClientKafkaDriver._acl_binding_to_acl(acl_binding)
+            if acl_binding.resource_pattern_type == ResourcePatternType.LITERAL and acl_binding.host == "*" and \
+                    acl.resource_type in (TOPIC, GROUP) and acl.operation in (READ, WRITE):
+                acls.add(acl)
+        return acls
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _do_create_acls(self, acl_list, batch_size):
+        """
+        Add ACLs on the cluster with a single admin client request, the batch size only applies to kafka-acls.sh
+        :param acl_list: The ACLs to add
+        :type acl_list: list[Acl]
+        :param batch_size: Maximum number of resources per kafka-acls.sh invocation
+        :type batch_size: int
+        :return: For each ACL description, None if the ACL has been added, the raised exception otherwise
+        :rtype: dict[str, KafkaIotException]
+        """
+        if AclBinding is None:
+            return super(AdminClientKafkaDriver, self)._do_create_acls(acl_list, batch_size)
+
+        acl_bindings = [AdminClientKafkaDriver._acl_to_acl_binding(acl, AclBinding) for acl in acl_list]
+        futures = self._admin_client.create_acls(acl_bindings, request_timeout=self._timeout)
+        return AdminClientKafkaDriver._collect_results("ADD ACLS", dict(
+            (str(acl), futures[acl_binding]) for acl, acl_binding in zip(acl_list, acl_bindings)))
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _do_delete_acls(self, acl_list, batch_size):
+        """
+        Remove ACLs from the cluster with a single admin client request, the batch size only applies to kafka-acls.sh
+        :param acl_list: The ACLs to remove
+        :type acl_list: list[Acl]
+        :param batch_size: Maximum number of resources per kafka-acls.sh invocation
+        :type batch_size: int
+        :return: For each ACL description, None if the ACL has been removed, the raised exception otherwise
+        :rtype: dict[str, KafkaIotException]
+        """
+        if AclBinding is None:
+            return super(AdminClientKafkaDriver, self)._do_delete_acls(acl_list, batch_size)
+
+        acl_filters = [AdminClientKafkaDriver._acl_to_acl_binding(acl, AclBindingFilter) for acl in acl_list]
+        futures = self._admin_client.delete_acls(acl_filters, request_timeout=self._timeout)
+        return AdminClientKafkaDriver._collect_results("REMOVE ACLS", dict(
+            (str(acl), futures[acl_filter]) for acl, acl_filter in zip(acl_list, acl_filters)))
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _list_topic_metadata(self):
+        """
+        Fetch the metadata of every topic in a single request
+        :return: The topic metadata by topic name
+        :rtype: dict[str, confluent_kafka.admin.TopicMetadata]
+        """
+        try:
+            return self._admin_client.list_topics(timeout=self._timeout).topics
+        except KafkaException as e:
+            raise KafkaIotException("Error when attempting to fetch cluster metadata: %s" % str(e))
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _describe_topic_configs(self, topic_name_list):
+        """
+        Fetch the configs overridden on topics in a single request
+        :param topic_name_list: The name of the topics
+        :type topic_name_list: list[str]
+        :return: The config values by config name, by topic name
+        :rtype: dict[str, dict[str, str]]
+        """
+        if len(topic_name_list) == 0:
+            return {}
+
+        resources = [ConfigResource(ConfigResource.Type.TOPIC, topic_name) for topic_name in topic_name_list]
+        futures = self._admin_client.describe_configs(resources, request_timeout=self._timeout)
+        topic_configs = {}
+        for resource in resources:
+            try:
+                config_entries = futures[resource].result()
+            except KafkaException as e:
+                raise KafkaIotException("Error when attempting to describe topic \"%s\" configs: %s"
+                                        % (resource.name, str(e)))
+            topic_configs[resource.name] = {config_name: config_entry.value
+                                            for config_name, config_entry in config_entries.items()
+                                            if config_entry.source == ConfigSource.DYNAMIC_TOPIC_CONFIG.value}
+        return topic_configs
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    @staticmethod
+    def _collect_results(title, futures):
+        """
+        Wait for every admin client future and convert failures into kafka iot exceptions
+        :param title: Title to identify the operation in logs
+        :type title: str
+        :param futures: Admin client futures by topic name, or by ACL description
+        :type futures: dict[str, concurrent.futures.Future]
+        :return: For each topic name, None if the operation succeeded, the raised exception otherwise
+        :rtype: dict[str, KafkaIotException]
+        """
+        errors = {}
+        for topic_name, future in futures.items():
+            try:
+                future.result()
+                errors[topic_name] = None
+                logger.debug("Admin client >>> %s >>> %s done", title, topic_name)
+            except KafkaException as e:
+                errors[topic_name] = KafkaIotException("%s failed for \"%s\": %s" % (title, topic_name, str(e)))
+                logger.debug("Admin client >>> %s >>> %s failed: %s", title, topic_name, e)
+        return errors
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    @staticmethod
+    def _metadata_to_topic(topic_metadata, topic_configs):
+        """
+        Convert admin client topic metadata into a topic
+        :param topic_metadata: The admin client topic metadata
+        :type topic_metadata: confluent_kafka.admin.TopicMetadata
+        :param topic_configs: The configs overridden on the topic by config name
+        :type topic_configs: dict[str, str]
+        :return: The topic information
+        :rtype: Topic
+        """
+        topic_config = []
+        for partition_id in sorted(topic_metadata.partitions.keys()):
+            partition = topic_metadata.partitions[partition_id]
+            topic_config.append(TopicConfig(
+                partition=partition.id,
+                leader=partition.leader,
+                replicas=partition.replicas,
+                isr=partition.isrs
+            ))
+
+        replication_factor = len(topic_config[0].replicas) if len(topic_config) > 0 else 0
+        return Topic(topic_metadata.topic, replication_factor, len(topic_config), topic_config, topic_configs)
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    @staticmethod
+    def _topic_to_new_topic(topic):
+        """
+        Convert a topic to be created into an admin client new topic
+        :param topic: The topic to be created, its config gives the replicas of each partition if not empty
+        :type topic: Topic
+        :rtype: NewTopic
+        """
+        if len(topic.config) == 0:
+            return NewTopic(topic.name, num_partitions=topic.partition_number,
+                            replication_factor=topic.replication_factor, config=topic.configs or {})
+        return NewTopic(topic.name, num_partitions=topic.partition_number,
+                        replica_assignment=[list(topic_config.replicas) for topic_config in
+                                            sorted(topic.config, key=lambda conf: conf.partition)],
+                        config=topic.configs or {})
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    @staticmethod
+    def _acl_binding_to_acl(acl_binding):
+        """
+        Convert an admin client ACL binding into an ACL, ResourceType.TOPIC becoming Topic and AclOperation.READ Read
+        :param acl_binding: The admin client ACL binding
+        :type acl_binding: AclBinding
+        :rtype: Acl
+        """
+        return Acl(acl_binding.principal, acl_binding.restype.name.capitalize(), acl_binding.name,
+                   acl_binding.operation.name.capitalize())
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    @staticmethod
+    def _acl_to_acl_binding(acl, binding_class):
+        """
+        Convert an ACL into an admin client ACL binding or an ACL binding filter matching it exactly
+        :param acl: The ACL
+        :type acl: Acl
+        :param binding_class: AclBinding or AclBindingFilter
+        :type binding_class: type
+        :rtype: AclBinding | AclBindingFilter
+        """
+        return binding_class(ResourceType[acl.resource_type.upper()], acl.resource_name, ResourcePatternType.LITERAL,
+                             acl.principal, "*", AclOperation[acl.operation.upper()], AclPermissionType.ALLOW)
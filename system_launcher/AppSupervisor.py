@@ -0,0 +1,327 @@
+import os
+import time
+import logging
+import threading
+import subprocess
+from common.Metrics import METRICS
+from common.KafkaIotException import KafkaIotException
+
+try:
+    import psutil
+except ImportError:  # psutil is optional, the processes are supervised without resource sampling when not installed
+    psutil = None
+
+_PSUTIL_ERRORS = () if psutil is None else (psutil.Error,)
+
+logger = logging.getLogger(__name__)
+
+APP_RESTARTS = METRICS.counter("kafka_iot_app_restarts_total", "Application processes restarted after exiting")
+APP_CPU_PERCENT = METRICS.gauge("kafka_iot_app_cpu_percent", "CPU usage of an application process since the "
+                                                             "previous sample, 100 for a fully used CPU")
+APP_RSS_BYTES = METRICS.gauge("kafka_iot_app_rss_bytes", "Resident memory of an application process")
+APP_OPEN_FDS = METRICS.gauge("kafka_iot_app_open_fds", "Open file descriptors of an application process")
+APP_SAMPLE_SECONDS = METRICS.histogram("kafka_iot_app_sample_seconds", "Time to sample every application process")
+
+
+class AppReplica(object):
+    """A process of an application, started again with an exponential backoff when it exits"""
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, app, index):
+        """
+        App replica constructor
+        :param app: The application
+        :type app: Application
+        :param index: Index of the replica among the processes of the application
+        :type index: int
+        """
+        self.app = app
+        self.index = index
+        self.cpu = None if app.cpu_affinity is None else app.cpu_affinity[index % len(app.cpu_affinity)]
+        self.process = None
+        self.start_time = None
+        self.next_start_time = 0.0  # Time from which the replica can be started again
+        self.backoff = 0.0  # Delay before the next restart, doubled on each exit of an unstable process
+        self._ps_process = None  # Kept between samples so that the CPU usage is measured since the previous sample
+        self._growth_counts = [0, 0]  # Consecutive samples for which the rss and the fd count grew
+        self._last_usage = (0, 0)  # Last sampled rss and fd count
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @property
+    def labels(self):
+        return {"app": self.app.name, "replica": self.index}
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def start(self):
+        """
+        Start the process, pinned to its CPU if any. The application name, group id and replica index are given
+        through the KAFKA_IOT_APP_NAME, KAFKA_IOT_GROUP_ID and KAFKA_IOT_APP_REPLICA environment variables
+        """
+        env = dict(os.environ, KAFKA_IOT_APP_NAME=self.app.name, KAFKA_IOT_GROUP_ID=self.app.group_id.name,
+                   KAFKA_IOT_APP_REPLICA=str(self.index))
+        try:
+            self.process = subprocess.Popen(self.app.command, env=env)
+        except OSError as e:
+            raise KafkaIotException("Application %s replica %d can't be started: %s" % (self.app.name, self.index,
+                                                                                      str(e)))
+        self.start_time = time.time()
+        self._ps_process = None
+        self._growth_counts = [0, 0]
+        self._last_usage = (0, 0)
+
+        try:
+            if psutil is not None:
+                self._ps_process = psutil.Process(self.process.pid)
+                self._ps_process.cpu_percent(None)  # The first sample then gets the usage since the start
+            if self.cpu is not None:
+                if self._ps_process is not None:
+                    self._ps_process.cpu_affinity([self.cpu])
+                else:
+                    os.sched_setaffinity(self.process.pid, [self.cpu])
+        except (AttributeError, OSError, ValueError) + _PSUTIL_ERRORS as e:  # Exited already or pinning unsupported
+            if self.cpu is not None:
+                logger.warning("Application %s replica %d can't be pinned to CPU %d: %s", self.app.name,
+                               self.index, self.cpu, e)
+        logger.info("Application %s replica %d started, pid %d%s", self.app.name, self.index, self.process.pid,
+                    "" if self.cpu is None else ", CPU %d" % self.cpu)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def check(self, now, initial_backoff, max_backoff, stable_time):
+        """
+        Detect the exit of the process and schedule its restart
+        :param now: The current time
+        :type now: float
+        :param initial_backoff: Delay in seconds before restarting a process which exited after running stable_time
+        :type initial_backoff: float
+        :param max_backoff: Maximum delay in seconds before restarting a process
+        :type max_backoff: float
+        :param stable_time: Time in seconds after which a process is considered stable, its backoff being reset
+        :type stable_time: float
+        :return: True if the process just exited
+        :rtype: bool
+        """
+        if self.process is None:
+            return False
+        return_code = self.process.poll()
+        if return_code is None:
+            return False
+
+        run_time = now - self.start_time
+        self.backoff = initial_backoff if run_time >= stable_time else \
+            min(max_backoff, max(initial_backoff, self.backoff * 2))
+        self.next_start_time = now + self.backoff
+        logger.warning("Application %s replica %d exited with code %d after %.1f second(s), restarting in %.1f "
+                       "second(s)", self.app.name, self.index, return_code, run_time, self.backoff)
+        self.stop_sampling()
+        self.process = None
+        return True
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def sample(self, cpu_warning_percent, growth_samples):
+        """
+        Sample the CPU usage, resident memory and open file descriptors of the process. The values are read in a
+        single pass over the process information
+        :param cpu_warning_percent: CPU usage from which the process is reported as overloaded, None to disable
+        :type cpu_warning_percent: float
+        :param growth_samples: Number of consecutive samples with a growing rss or fd count from which the process is
+        reported as leaking
+        :type growth_samples: int
+        """
+        if self._ps_process is None or self.process is None:
+            return
+        try:
+            with self._ps_process.oneshot():
+                cpu_percent = self._ps_process.cpu_percent(None)
+                rss = self._ps_process.memory_info().rss
+                fd_count = self._ps_process.num_fds() if hasattr(self._ps_process, "num_fds") else \
+                    self._ps_process.num_handles()
+        except _PSUTIL_ERRORS:  # Exited since the last check
+            return
+
+        APP_CPU_PERCENT.set(cpu_percent, **self.labels)
+        APP_RSS_BYTES.set(rss, **self.labels)
+        APP_OPEN_FDS.set(fd_count, **self.labels)
+
+        if cpu_warning_percent is not None and cpu_percent >= cpu_warning_percent:
+            logger.warning("Application %s replica %d uses %.0f%% of a CPU", self.app.name, self.index, cpu_percent)
+        for usage_index, (usage_name, usage) in enumerate([("resident memory", rss), ("open fd count", fd_count)]):
+            if usage > self._last_usage[usage_index]:
+                self._growth_counts[usage_index] += 1
+                if self._growth_counts[usage_index] == growth_samples:
+                    logger.warning("Application %s replica %d %s grew over %d consecutive samples, now %d",
+                                   self.app.name, self.index, usage_name, growth_samples, usage)
+            elif usage < self._last_usage[usage_index]:
+                self._growth_counts[usage_index] = 0
+        self._last_usage = (rss, fd_count)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def stop_sampling(self):
+        self._ps_process = None
+        for gauge in [APP_CPU_PERCENT, APP_RSS_BYTES, APP_OPEN_FDS]:
+            gauge.remove(**self.labels)
+
+
+class AppSupervisor(object):
+    """Run the declared applications as a pool of processes from a background thread. Exited processes are started
+    again with an exponential backoff and, with psutil, the CPU usage, resident memory and open file descriptors of
+    every process are sampled periodically so that slow or leaking applications show up"""
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, check_interval, sample_interval, initial_backoff, max_backoff, stable_time, stop_timeout,
+                 cpu_warning_percent=None, growth_samples=30):
+        """
+        App supervisor constructor
+        :param check_interval: Time in seconds between two checks of the processes
+        :type check_interval: float
+        :param sample_interval: Time in seconds between two resource samples
+        :type sample_interval: float
+        :param initial_backoff: Delay in seconds before restarting a process which exited after running stable_time
+        :type initial_backoff: float
+        :param max_backoff: Maximum delay in seconds before restarting a process
+        :type max_backoff: float
+        :param stable_time: Time in seconds after which a process is considered stable, its backoff being reset
+        :type stable_time: float
+        :param stop_timeout: Time in seconds given to the processes to exit once terminated, before being killed
+        :type stop_timeout: float
+        :param cpu_warning_percent: CPU usage from which a process is reported as overloaded, None to disable
+        :type cpu_warning_percent: float
+        :param growth_samples: Number of consecutive samples with a growing rss or fd count from which a process is
+        reported as leaking
+        :type growth_samples: int
+        """
+        self._check_interval = check_interval
+        self._sample_interval = sample_interval
+        self._initial_backoff = initial_backoff
+        self._max_backoff = max_backoff
+        self._stable_time = stable_time
+        self._stop_timeout = stop_timeout
+        self._cpu_warning_percent = cpu_warning_percent
+        self._growth_samples = growth_samples
+
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._replicas = {}  # Replicas by application name
+        self._next_sample_time = 0.0
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def update(self, app_list):
+        """
+        Set the applications to be run. The processes of the removed or modified applications are stopped, the new
+        and modified applications are started on the next check
+        :param app_list: The applications, the ones without a command are ignored
+        :type app_list: list[Application]
+        """
+        app_by_name = dict((app.name, app) for app in app_list if app.command is not None)
+        with self._lock:
+            for app_name, replicas in list(self._replicas.items()):
+                app = app_by_name.get(app_name)
+                if app is None or not AppSupervisor._is_same_app(app, replicas[0].app):
+                    logger.info("Stopping application %s", app_name)
+                    self._stop_replicas(replicas)
+                    del self._replicas[app_name]
+            for app_name, app in app_by_name.items():
+                if app_name not in self._replicas:
+                    self._replicas[app_name] = [AppReplica(app, index) for index in range(app.replicas)]
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def start(self):
+        """
+        Start supervising from a background thread
+        """
+        if psutil is None:
+            logger.info("psutil is not installed, application resources are not sampled")
+        if self._thread is None:
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name="app-supervisor", daemon=True)
+            self._thread.start()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def join(self):
+        """
+        Wait until the supervision is stopped, the wait is interruptible
+        """
+        while self._thread is not None and self._thread.is_alive():
+            self._thread.join(self._check_interval or 1)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def stop(self):
+        """
+        Stop supervising and stop every process
+        """
+        if self._thread is not None:
+            self._stop_event.set()
+            self._thread.join()
+            self._thread = None
+        with self._lock:
+            for replicas in self._replicas.values():
+                self._stop_replicas(replicas)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def check(self, now=None):
+        """
+        Start the processes which are not running and due, and sample them if the sample interval elapsed
+        :param now: The current time, time.time() if None
+        :type now: float
+        """
+        now = time.time() if now is None else now
+        with self._lock:
+            replica_list = [replica for replicas in self._replicas.values() for replica in replicas]
+            for replica in replica_list:
+                if replica.check(now, self._initial_backoff, self._max_backoff, self._stable_time):
+                    APP_RESTARTS.inc(app=replica.app.name)
+                if replica.process is None and now >= replica.next_start_time:
+                    try:
+                        replica.start()
+                    except KafkaIotException as e:
+                        replica.backoff = min(self._max_backoff, max(self._initial_backoff, replica.backoff * 2))
+                        replica.next_start_time = now + replica.backoff
+                        logger.error("%s, retrying in %.1f second(s)", e, replica.backoff)
+
+            if psutil is not None and now >= self._next_sample_time:
+                self._next_sample_time = now + self._sample_interval
+                with APP_SAMPLE_SECONDS.time():
+                    for replica in replica_list:
+                        replica.sample(self._cpu_warning_percent, self._growth_samples)
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _run(self):
+        logger.info("Supervising %d application(s) every %s second(s)...", len(self._replicas), self._check_interval)
+        while not self._stop_event.is_set():
+            try:
+                self.check()
+            except Exception as e:  # The supervisor must keep running whatever happens to a process
+                logger.exception("Application check failed: %s", e)
+            self._stop_event.wait(self._check_interval)
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _stop_replicas(self, replicas):
+        """
+        Terminate processes, waiting for all of them at once before killing the remaining ones
+        :param replicas: The replicas to stop
+        :type replicas: list[AppReplica]
+        """
+        running_replicas = [replica for replica in replicas if replica.process is not None]
+        for replica in running_replicas:
+            replica.process.terminate()
+        deadline = time.time() + self._stop_timeout
+        for replica in running_replicas:
+            try:
+                replica.process.wait(max(0.0, deadline - time.time()))
+            except subprocess.TimeoutExpired:
+                logger.warning("Application %s replica %d didn't stop in time, killing it", replica.app.name,
+                               replica.index)
+                replica.process.kill()
+                replica.process.wait()
+            replica.stop_sampling()
+            replica.process = None
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    @staticmethod
+    def _is_same_app(app, other_app):
+        """
+        :return: True if the applications are run the same way, their processes being kept
+        :rtype: bool
+        """
+        return (app.group_id.name, app.command, app.replicas, app.cpu_affinity) == \
+            (other_app.group_id.name, other_app.command, other_app.replicas, other_app.cpu_affinity)
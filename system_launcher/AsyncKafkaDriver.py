@@ -0,0 +1,534 @@
+import os
+import time
+import asyncio
+import logging
+import collections
+from system_launcher.KafkaDriver import KafkaScriptMixin, DRIVER_OPERATION_SECONDS, SCRIPT_SPAWN_SECONDS, SCRIPT_EXITS
+from system_launcher.PartitionReassignment import PartitionReassignment
+from system_launcher.LeaderDistribution import LeaderDistribution
+from system_launcher.AclPlan import parse_acl_list_output
+from common.KafkaIotException import KafkaIotException
+from common.entities.kafka.Topic import Topic
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncKafkaDriver(KafkaScriptMixin):
+    """Asynchronous kafka driving, every kafka operation is a coroutine running kafka scripts without blocking"""
+
+    DEFAULT_TIMEOUT = 120
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, kafka_path, zookeeper, metadata_ttl=KafkaScriptMixin.DEFAULT_METADATA_TTL, max_parallel_ops=1,
+                 timeout=DEFAULT_TIMEOUT):
+        """
+        AsyncKafkaDriver Constructor
+        :param kafka_path: Path to Kafka install folder
+        :param zookeeper: Zookeeper info
+        :type zookeeper: Zookeeper
+        :param metadata_ttl: Time in seconds the cluster metadata snapshot is kept before being fetched again
+        :type metadata_ttl: float
+        :param max_parallel_ops: Maximum number of kafka scripts running at the same time
+        :type max_parallel_ops: int
+        :param timeout: Time in seconds after which a kafka script is killed
+        :type timeout: float
+        """
+        super(AsyncKafkaDriver, self).__init__(kafka_path, zookeeper, metadata_ttl)
+        self._max_parallel_ops = max(1, max_parallel_ops)
+        self._timeout = timeout
+
+        # Created on first use so that they belong to the running event loop
+        self._metadata_lock = None
+        self._script_semaphore = None
+
+    # ------------------------------------------------------------------------------------------------------------------
+    async def get_cluster_metadata(self, force_refresh=False):
+        """
+        Get the cluster metadata snapshot, fetching it again if it is expired
+        :param force_refresh: Fetch the cluster metadata even if the snapshot is still valid
+        :type force_refresh: bool
+        :return: The cluster metadata snapshot
+        :rtype: ClusterMetadata
+        """
+        async with self._get_metadata_lock():
+            if force_refresh or self._metadata.is_expired():
+                with DRIVER_OPERATION_SECONDS.time(operation="describe_topics"):
+                    self._metadata.reset(await self._do_describe_topics())
+                logger.debug("Cluster metadata snapshot refreshed, version %d", self._metadata.version)
+            return self._metadata
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def invalidate_cluster_metadata(self):
+        """
+        Drop the cluster metadata snapshot, it will be fetched again on the next call
+        """
+        self._metadata.clear()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    async def list_topic_name(self, force_refresh=False):
+        """
+        List the name of topics available in kafka
+        :param force_refresh: Fetch the cluster metadata even if the snapshot is still valid
+        :type force_refresh: bool
+        :return: The list of topic available in kafka
+        :rtype: list[str]
+        """
+        return (await self.get_cluster_metadata(force_refresh)).topic_names()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    async def describe_topic(self, topic_name, check_topic_existence=True, force_refresh=False):
+        """
+        Get the information describing a topic
+        :param topic_name: Name of the topic to get the information
+        :type topic_name: str
+        :param check_topic_existence: Check if the topic exists before trying to describe it
+        :type check_topic_existence: bool
+        :param force_refresh: Describe the topic even if it is in the cluster metadata snapshot
+        :type force_refresh: bool
+        :return: The topic information
+        :rtype: Topic
+        """
+        metadata = await self.get_cluster_metadata()
+
+        if check_topic_existence:
+            AsyncKafkaDriver._check_topic_existence(metadata, topic_name, True)
+
+        topic = metadata.get_topic(topic_name)
+        if topic is None or force_refresh:
+            with DRIVER_OPERATION_SECONDS.time(operation="describe_topics"):
+                topic = AsyncKafkaDriver._get_described_topic(await self._do_describe_topics([topic_name]), topic_name)
+            metadata.put_topic(topic)
+        return topic
+
+    # ------------------------------------------------------------------------------------------------------------------
+    async def describe_all_topics(self, topic_name_list=None, force_refresh=False):
+        """
+        Get the information describing every topic with a single cluster metadata fetch at most
+        :param topic_name_list: Only describe these topics when set, unknown topic names are ignored
+        :type topic_name_list: list[str]
+        :param force_refresh: Fetch the cluster metadata even if the snapshot is still valid
+        :type force_refresh: bool
+        :return: The topic information by topic name
+        :rtype: dict[str, Topic]
+        """
+        metadata = await self.get_cluster_metadata(force_refresh)
+
+        # Topics altered since the last fetch are described again all at once
+        if len(metadata.unknown_topic_names()) > 0:
+            metadata = await self.get_cluster_metadata(True)
+
+        return AsyncKafkaDriver._select_topics(metadata.topics(), topic_name_list)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    async def create_topic(self, topic_name, replication_factor, partitions, check_topic_existence=True):
+        """
+        Attempt to create a topic
+        :param topic_name: The name of the topic to be created
+        :type topic_name: str
+        :param replication_factor: The replication factor of the topic
+        :type replication_factor: int
+        :param partitions: The number of partition of the topic
+        :type partitions: int
+        :param check_topic_existence: Check if the topic exists before trying to create it
+        """
+        if check_topic_existence:
+            AsyncKafkaDriver._check_topic_existence(await self.get_cluster_metadata(), topic_name, False)
+
+        AsyncKafkaDriver._raise_error(await self.create_topics([Topic(topic_name, replication_factor, partitions, [])]),
+                                      topic_name)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    async def delete_topic(self, topic_name, check_topic_existence=True):
+        """
+        Attempt to delete a given topic.
+        This will have no effect if delete.topic.enable is not set to true in kafka config
+        :param topic_name: The name of the topic to delete
+        :type topic_name: str
+        :param check_topic_existence: Check if the topic exists before trying to delete it
+        :type check_topic_existence: bool
+        """
+        if check_topic_existence:
+            AsyncKafkaDriver._check_topic_existence(await self.get_cluster_metadata(), topic_name, True)
+
+        AsyncKafkaDriver._raise_error(await self.delete_topics([topic_name]), topic_name)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    async def alter_topic(self, topic_name, partition_number=-1, check_topic_existence=True):
+        """
+        Alter a topic replication factor and / or partition number
+        :param topic_name: Name of the topic to alter
+        :type topic_name: str
+        :param partition_number: New partition number to be applied. No effect when set to -1
+        :type partition_number: int
+        :param check_topic_existence: Check if the topic exists before trying to delete it
+        :type check_topic_existence: bool
+        """
+        topic = await self.describe_topic(topic_name, check_topic_existence)
+
+        if topic.partition_number != partition_number > 0:
+            if partition_number < topic.partition_number:  # If the number of partition has te be decreased
+                await self.delete_topic(topic_name, False)
+                await self.create_topic(topic_name, topic.replication_factor, partition_number, False)
+                logger.warning("Topic \"%s\" has been deleted and re-created in order to reduce its partition number "
+                               "from %d to %d", topic_name, topic.partition_number, partition_number)
+            else:  # Increase the number of partition
+                AsyncKafkaDriver._raise_error(await self.create_partitions({topic_name: partition_number}), topic_name)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    async def create_topics(self, topic_list):
+        """
+        Attempt to create several topics concurrently
+        :param topic_list: The topics to be created, their config gives the replicas of each partition if not empty
+        :type topic_list: list[Topic]
+        :return: For each topic name, None if the topic has been created, the raised exception otherwise
+        :rtype: dict[str, Exception]
+        """
+        if len(topic_list) == 0:
+            return {}
+
+        with DRIVER_OPERATION_SECONDS.time(operation="create_topics"):
+            errors = await self._gather_script_errors(self._get_create_topic_runs(topic_list))
+        AsyncKafkaDriver._count_errors("create_topics", errors)
+        AsyncKafkaDriver._update_topics(await self.get_cluster_metadata(), errors)
+        return errors
+
+    # ------------------------------------------------------------------------------------------------------------------
+    async def delete_topics(self, topic_name_list):
+        """
+        Attempt to delete several topics concurrently
+        :param topic_name_list: The name of the topics to delete
+        :type topic_name_list: list[str]
+        :return: For each topic name, None if the topic has been deleted, the raised exception otherwise
+        :rtype: dict[str, Exception]
+        """
+        if len(topic_name_list) == 0:
+            return {}
+
+        with DRIVER_OPERATION_SECONDS.time(operation="delete_topics"):
+            errors = await self._gather_script_errors(self._get_delete_topic_runs(topic_name_list))
+        AsyncKafkaDriver._count_errors("delete_topics", errors)
+        AsyncKafkaDriver._update_topics(await self.get_cluster_metadata(), errors, removed=True)
+        return errors
+
+    # ------------------------------------------------------------------------------------------------------------------
+    async def create_partitions(self, partition_numbers):
+        """
+        Increase the partition number of several topics concurrently
+        :param partition_numbers: New partition number to be applied for each topic name
+        :type partition_numbers: dict[str, int]
+        :return: For each topic name, None if the partitions have been created, the raised exception otherwise
+        :rtype: dict[str, Exception]
+        """
+        if len(partition_numbers) == 0:
+            return {}
+
+        with DRIVER_OPERATION_SECONDS.time(operation="create_partitions"):
+            errors = await self._gather_script_errors(self._get_create_partitions_runs(partition_numbers))
+        AsyncKafkaDriver._count_errors("create_partitions", errors)
+        AsyncKafkaDriver._update_topics(await self.get_cluster_metadata(), errors)
+        return errors
+
+    # ------------------------------------------------------------------------------------------------------------------
+    async def reassign_partitions(self, reassignment, throttle=None):
+        """
+        Start moving partition replicas, the topics stay online during the move
+        :param reassignment: The target replicas of the partitions to move
+        :type reassignment: PartitionReassignment
+        :param throttle: Replication throughput limit in bytes per second during the move, unlimited if None
+        :type throttle: int
+        """
+        with AsyncKafkaDriver._json_file(reassignment.to_json()) as reassignment_file_path, \
+                DRIVER_OPERATION_SECONDS.time(operation="reassign_partitions"):
+            await self._run_script(AsyncKafkaDriver.REASSIGN_PARTITIONS_SCRIPT, "REASSIGN PARTITIONS",
+                                   self._get_reassignment_arguments(reassignment_file_path, throttle))
+
+        await self._invalidate_topics(reassignment.topic_names())
+
+    # ------------------------------------------------------------------------------------------------------------------
+    async def verify_reassignment(self, reassignment):
+        """
+        Get the progress of a partition reassignment. The throttle is removed once every partition has been moved
+        :param reassignment: The partition reassignment
+        :type reassignment: PartitionReassignment
+        :return: The reassignment status (COMPLETED, IN_PROGRESS or FAILED) by (topic name, partition) couple
+        :rtype: dict[(str, int), str]
+        """
+        with AsyncKafkaDriver._json_file(reassignment.to_json()) as reassignment_file_path, \
+                DRIVER_OPERATION_SECONDS.time(operation="verify_reassignment"):
+            output_lines = await self._run_script(AsyncKafkaDriver.REASSIGN_PARTITIONS_SCRIPT, "VERIFY REASSIGNMENT",
+                                                  self._get_verify_reassignment_arguments(reassignment_file_path))
+        return PartitionReassignment.parse_verify_output(output_lines)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    async def wait_for_reassignment(self, reassignment, poll_interval, timeout=None):
+        """
+        Poll the progress of a partition reassignment until every partition has been moved
+        :param reassignment: The partition reassignment
+        :type reassignment: PartitionReassignment
+        :param poll_interval: Time in seconds between two progress checks
+        :type poll_interval: float
+        :param timeout: Time in seconds after which the wait is given up, never if None
+        :type timeout: float
+        """
+        start_time = time.time()
+
+        while True:
+            statuses = await self.verify_reassignment(reassignment)
+            if AsyncKafkaDriver._check_reassignment_progress(reassignment, statuses):
+                break
+            if timeout is not None and time.time() - start_time >= timeout:
+                raise KafkaIotException("Partition reassignment still in progress after %s second(s)" % str(timeout))
+            await asyncio.sleep(poll_interval)
+
+        await self._invalidate_topics(reassignment.topic_names())
+
+    # ------------------------------------------------------------------------------------------------------------------
+    async def elect_preferred_leaders(self, partition_keys, poll_interval, timeout=None):
+        """
+        Move the leadership of partitions back to their preferred leader. Kafka runs a single election at a time, the
+        election is started again until the one in progress ends
+        :param partition_keys: The (topic name, partition) couples
+        :type partition_keys: list[(str, int)]
+        :param poll_interval: Time in seconds between two election attempts
+        :type poll_interval: float
+        :param timeout: Time in seconds after which the election is given up, never if None
+        :type timeout: float
+        """
+        start_time = time.time()
+
+        with AsyncKafkaDriver._json_file(LeaderDistribution.to_election_json(partition_keys)) as election_file_path, \
+                DRIVER_OPERATION_SECONDS.time(operation="elect_preferred_leaders"):
+            while True:
+                output_lines = await self._run_script(AsyncKafkaDriver.PREFERRED_REPLICA_ELECTION_SCRIPT,
+                                                      "PREFERRED REPLICA ELECTION",
+                                                      self._get_election_arguments(election_file_path))
+                if not AsyncKafkaDriver._is_election_in_progress(output_lines):
+                    break
+                if timeout is not None and time.time() - start_time >= timeout:
+                    raise KafkaIotException("Preferred replica election still in progress after %s second(s)"
+                                            % str(timeout))
+                await asyncio.sleep(poll_interval)
+
+        await self._invalidate_topics(sorted(set(topic_name for topic_name, _ in partition_keys)))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    async def list_acls(self):
+        """
+        Fetch every ACL of the cluster at once
+        :return: The read and write allow ACLs on topics and groups
+        :rtype: set[Acl]
+        """
+        with DRIVER_OPERATION_SECONDS.time(operation="list_acls"):
+            return parse_acl_list_output(await self._run_script(AsyncKafkaDriver.ACL_SCRIPT, "LIST ACLS",
+                                                                AsyncKafkaDriver._get_acl_script_arguments(
+                                                                    self._zookeeper_full_address, ["--list"])))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    async def create_acls(self, acl_list, batch_size=KafkaScriptMixin.DEFAULT_ACL_BATCH_SIZE):
+        """
+        Add ACLs concurrently, grouped into batches applied with a single kafka-acls.sh invocation each
+        :param acl_list: The ACLs to add
+        :type acl_list: list[Acl]
+        :param batch_size: Maximum number of resources per kafka-acls.sh invocation
+        :type batch_size: int
+        :return: For each batch description, None if the ACLs have been added, the raised exception otherwise
+        :rtype: dict[str, Exception]
+        """
+        return await self._run_acl_batches("create_acls", "ADD ACLS", ["--add"], acl_list, batch_size)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    async def delete_acls(self, acl_list, batch_size=KafkaScriptMixin.DEFAULT_ACL_BATCH_SIZE):
+        """
+        Remove ACLs concurrently, grouped into batches applied with a single kafka-acls.sh invocation each
+        :param acl_list: The ACLs to remove
+        :type acl_list: list[Acl]
+        :param batch_size: Maximum number of resources per kafka-acls.sh invocation
+        :type batch_size: int
+        :return: For each batch description, None if the ACLs have been removed, the raised exception otherwise
+        :rtype: dict[str, Exception]
+        """
+        return await self._run_acl_batches("delete_acls", "REMOVE ACLS", ["--remove", "--force"], acl_list, batch_size)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    async def alter_topic_configs(self, config_changes):
+        """
+        Apply the config changes of several topics concurrently, one kafka-configs.sh invocation per topic
+        :param config_changes: The config changes, one per topic
+        :type config_changes: list[TopicConfigChange]
+        :return: For each topic name, None if its configs have been altered, the raised exception otherwise
+        :rtype: dict[str, Exception]
+        """
+        if len(config_changes) == 0:
+            return {}
+
+        with DRIVER_OPERATION_SECONDS.time(operation="alter_topic_configs"):
+            errors = await self._gather_script_errors(self._get_alter_config_runs(config_changes))
+        AsyncKafkaDriver._count_errors("alter_topic_configs", errors)
+        await self._invalidate_topics([topic_name for topic_name, error in errors.items() if error is None])
+        return errors
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    async def _run_acl_batches(self, operation, title, action_arguments, acl_list, batch_size):
+        """
+        Run a kafka-acls.sh action once per batch of ACLs
+        :param operation: The driver operation, for the metrics
+        :type operation: str
+        :param title: Title to identify the output
+        :type title: str
+        :param action_arguments: The action: --add or --remove and its options
+        :type action_arguments: list[str]
+        :param acl_list: The ACLs
+        :type acl_list: list[Acl]
+        :param batch_size: Maximum number of resources per kafka-acls.sh invocation
+        :type batch_size: int
+        :return: For each batch description, None if the action succeeded, the raised exception otherwise
+        :rtype: dict[str, Exception]
+        """
+        if len(acl_list) == 0:
+            return {}
+
+        with DRIVER_OPERATION_SECONDS.time(operation=operation):
+            errors = await self._gather_script_errors(self._get_acl_runs(title, action_arguments, acl_list, batch_size))
+        AsyncKafkaDriver._count_errors(operation, errors)
+        return errors
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    async def _invalidate_topics(self, topic_name_list):
+        """
+        Flag topics of the cluster metadata snapshot as having to be described again
+        :param topic_name_list: The name of the topics
+        :type topic_name_list: list[str]
+        """
+        AsyncKafkaDriver._invalidate_known_topics(await self.get_cluster_metadata(), topic_name_list)
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    async def _do_describe_topics(self, topic_name_list=None):
+        """
+        Describe topics on the cluster, bypassing the cluster metadata snapshot
+        :param topic_name_list: Only describe these topics when set, every topic is described otherwise
+        :type topic_name_list: list[str]
+        :return: The topic information by topic name
+        :rtype: dict[str, Topic]
+        """
+        output_lines = await self._run_topic_script("DESCRIBE TOPIC",
+                                                    self._get_describe_topics_arguments(topic_name_list))
+        return AsyncKafkaDriver._select_topics(AsyncKafkaDriver._parse_topic_description(output_lines),
+                                               topic_name_list)
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    async def _run_topic_script(self, title, arguments):
+        """
+        Run the kafka topic management script, stream its outputs and reap it
+        :param title: Title to identify the output
+        :type title: str
+        :param arguments: The kafka topic script arguments
+        :type arguments: list[str]
+        :return: The standard output lines of the script
+        :rtype: list[str]
+        """
+        return await self._run_script(AsyncKafkaDriver.TOPIC_SCRIPT, title, arguments)
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    async def _run_script(self, script, title, arguments):
+        """
+        Run a kafka script, stream its outputs and reap it.
+        The script is killed if it doesn't end before the timeout or if the calling task is cancelled
+        :param script: Path of the script, relative to the kafka install folder
+        :type script: str
+        :param title: Title to identify the output
+        :type title: str
+        :param arguments: The kafka script arguments
+        :type arguments: list[str]
+        :return: The standard output lines of the script
+        :rtype: list[str]
+        """
+        script_name = os.path.basename(script)
+
+        async with self._get_script_semaphore():
+            start_time = time.perf_counter()
+            p = await asyncio.create_subprocess_exec(os.path.join(self._kafka_path, script),
+                                                     *arguments, stdout=asyncio.subprocess.PIPE,
+                                                     stderr=asyncio.subprocess.PIPE)
+            SCRIPT_SPAWN_SECONDS.observe(time.perf_counter() - start_time, script=script_name)
+            try:
+                output_lines, _ = await asyncio.wait_for(asyncio.gather(
+                    AsyncKafkaDriver._read_stream(p.stdout, title),
+                    AsyncKafkaDriver._read_stream(p.stderr, title + " (STDERR)")
+                ), self._timeout)
+                return_code = await p.wait()
+            except asyncio.TimeoutError:
+                await AsyncKafkaDriver._kill(p)
+                SCRIPT_EXITS.inc(script=script_name, operation=title, code="timeout")
+                raise KafkaIotException("%s timed out, %s killed after %s second(s)"
+                                        % (title, script_name, str(self._timeout)))
+            except asyncio.CancelledError:
+                await AsyncKafkaDriver._kill(p)
+                raise
+
+        AsyncKafkaDriver._record_script_run(script_name, title, time.perf_counter() - start_time,
+                                            sum(len(line) + 1 for line in output_lines), return_code)
+        if return_code != 0:
+            raise KafkaIotException("%s failed, %s exited with code %d" % (title, script_name, return_code))
+        return output_lines
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _get_metadata_lock(self):
+        if self._metadata_lock is None:
+            self._metadata_lock = asyncio.Lock()
+        return self._metadata_lock
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _get_script_semaphore(self):
+        if self._script_semaphore is None:
+            self._script_semaphore = asyncio.Semaphore(self._max_parallel_ops)
+        return self._script_semaphore
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    @staticmethod
+    async def _read_stream(stream, title):
+        """
+        Read and log a process output stream until its end
+        :param stream: The process output stream
+        :type stream: asyncio.StreamReader
+        :param title: Title to identify the output
+        :type title: str
+        :return: The output lines
+        :rtype: list[str]
+        """
+        output_lines = []
+        while True:
+            line = await stream.readline()
+            if line != b'':
+                output_lines.append(AsyncKafkaDriver._decode_output_line(title, line))
+            else:
+                break
+        return output_lines
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    @staticmethod
+    async def _kill(p):
+        """
+        Kill a process if it is still running and reap it
+        :param p: The process
+        :type p: asyncio.subprocess.Process
+        """
+        if p.returncode is None:
+            try:
+                p.kill()
+            except ProcessLookupError:  # The process ended in the meantime
+                pass
+        await p.wait()
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    async def _gather_script_errors(self, script_runs):
+        """
+        Run kafka scripts concurrently, up to max_parallel_ops at the same time, and only keep their errors
+        :param script_runs: The (script, title, arguments) run of each key
+        :type script_runs: dict[str, (str, str, list[str])]
+        :return: For each key, None if the script succeeded, the raised exception otherwise
+        :rtype: dict[str, Exception]
+        """
+        results = await asyncio.gather(*[self._run_script(*script_run) for script_run in script_runs.values()],
+                                       return_exceptions=True)
+        return collections.OrderedDict((key, result if isinstance(result, BaseException) else None)
+                                       for key, result in zip(script_runs.keys(), results))
@@ -0,0 +1,122 @@
+import time
+
+
+class ClusterMetadata(object):
+    """Snapshot of the cluster topic metadata"""
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, ttl):
+        """
+        ClusterMetadata constructor
+        :param ttl: Time in seconds after which the snapshot has to be refreshed. Never expires when set to None
+        :type ttl: float
+        """
+        self._ttl = ttl
+        self._topics = None  # Topic by topic name, None when the topic layout is unknown and has to be described
+        self._fetch_time = None
+        self.version = 0
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def reset(self, topics):
+        """
+        Replace the whole snapshot with freshly fetched topics
+        :param topics: The topic information by topic name
+        :type topics: dict[str, Topic]
+        """
+        self._topics = dict(topics)
+        self._fetch_time = time.time()
+        self.version += 1
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def clear(self):
+        """
+        Drop the snapshot, the next read triggers a refresh
+        """
+        self._topics = None
+        self._fetch_time = None
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def is_expired(self):
+        """
+        Check if the snapshot has to be refreshed
+        :return: True if the snapshot has never been fetched or if it is older than the ttl
+        :rtype: bool
+        """
+        if self._topics is None:
+            return True
+        return self._ttl is not None and time.time() - self._fetch_time >= self._ttl
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def has_topic(self, topic_name):
+        """
+        Check if a topic exists in the snapshot
+        :param topic_name: The topic name
+        :type topic_name: str
+        :rtype: bool
+        """
+        return topic_name in self._topics
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def get_topic(self, topic_name):
+        """
+        Get a topic from the snapshot
+        :param topic_name: The topic name
+        :type topic_name: str
+        :return: The topic information, None if the topic layout is unknown
+        :rtype: Topic
+        """
+        return self._topics.get(topic_name)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def topic_names(self):
+        """
+        :return: The name of every topic in the snapshot
+        :rtype: list[str]
+        """
+        return list(self._topics.keys())
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def topics(self):
+        """
+        :return: The topic information by topic name, None values for topics with an unknown layout
+        :rtype: dict[str, Topic]
+        """
+        return dict(self._topics)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def unknown_topic_names(self):
+        """
+        :return: The name of the topics that exist but whose layout is unknown
+        :rtype: list[str]
+        """
+        return [topic_name for topic_name, topic in self._topics.items() if topic is None]
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def put_topic(self, topic):
+        """
+        Add or replace a topic in the snapshot
+        :param topic: The topic information
+        :type topic: Topic
+        """
+        self._topics[topic.name] = topic
+        self.version += 1
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def invalidate_topic(self, topic_name):
+        """
+        Flag an existing topic as having an unknown layout, it will be described again on the next read
+        :param topic_name: The topic name
+        :type topic_name: str
+        """
+        self._topics[topic_name] = None
+        self.version += 1
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def remove_topic(self, topic_name):
+        """
+        Remove a topic from the snapshot
+        :param topic_name: The topic name
+        :type topic_name: str
+        """
+        self._topics.pop(topic_name, None)
+        self.version += 1
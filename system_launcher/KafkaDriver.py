@@ -1,108 +1,640 @@
 import subprocess
+import collections
+import contextlib
+import functools
+import threading
+import tempfile
+import time
 import os
 import re
 import logging
 from common.Utils import expand_var_and_user
 from system_launcher.Utils import log_console_output
+from system_launcher.ClusterMetadata import ClusterMetadata
+from system_launcher.TopicTaskExecutor import TopicTaskExecutor
+from system_launcher.PartitionReassignment import PartitionReassignment
+from system_launcher.LeaderDistribution import LeaderDistribution
+from system_launcher.AclPlan import get_acl_batches, parse_acl_list_output
+from common.Metrics import METRICS, DEFAULT_SIZE_BUCKETS
 from common.KafkaIotException import KafkaIotException
 from common.entities.Zookeeper import Zookeeper
 from common.entities.kafka.Topic import Topic
 from common.entities.kafka.TopicConfig import TopicConfig
 
+logger = logging.getLogger(__name__)
 
-class KafkaDriver(object):
-    """Kafka driving"""
+DRIVER_OPERATION_SECONDS = METRICS.histogram("kafka_iot_driver_operation_seconds",
+                                             "Wall time of the kafka driver operations reaching the cluster")
+DRIVER_OPERATION_ERRORS = METRICS.counter("kafka_iot_driver_operation_errors_total",
+                                          "Topics for which a kafka driver operation failed")
+SCRIPT_SPAWN_SECONDS = METRICS.histogram("kafka_iot_script_spawn_seconds", "Time to spawn a kafka script process")
+SCRIPT_SECONDS = METRICS.histogram("kafka_iot_script_seconds", "Wall time of a kafka script, from spawn to exit")
+SCRIPT_OUTPUT_BYTES = METRICS.histogram("kafka_iot_script_output_bytes", "Standard output size of a kafka script",
+                                        DEFAULT_SIZE_BUCKETS)
+SCRIPT_EXITS = METRICS.counter("kafka_iot_script_exits_total", "Kafka script runs by exit code")
+
+
+class KafkaScriptMixin(object):
+    """Kafka script driving shared by the blocking and the asynchronous drivers: the arguments of every script run,
+    the parsing of their outputs and the bookkeeping of the cluster metadata snapshot. Running the scripts is left to
+    the drivers"""
 
     DEFAULT_ENCODING = "utf-8"
+    DEFAULT_METADATA_TTL = 60
     TOPIC_SCRIPT = "bin/kafka-topics.sh"
+    REASSIGN_PARTITIONS_SCRIPT = "bin/kafka-reassign-partitions.sh"
+    PREFERRED_REPLICA_ELECTION_SCRIPT = "bin/kafka-preferred-replica-election.sh"
+    ACL_SCRIPT = "bin/kafka-acls.sh"
+    CONFIG_SCRIPT = "bin/kafka-configs.sh"
+    DEFAULT_ACL_BATCH_SIZE = 50
 
     # ------------------------------------------------------------------------------------------------------------------
-    def __init__(self, kafka_path, zookeeper):
+    def __init__(self, kafka_path, zookeeper, metadata_ttl=DEFAULT_METADATA_TTL):
         """
-        KafkaDriver Constructor
+        Kafka script mixin constructor
         :param kafka_path: Path to Kafka install folder
         :param zookeeper: Zookeeper info
         :type zookeeper: Zookeeper
+        :param metadata_ttl: Time in seconds the cluster metadata snapshot is kept before being fetched again
+        :type metadata_ttl: float
         """
         self._kafka_path = expand_var_and_user(kafka_path)
         self._zookeeper = zookeeper
         self._zookeeper_full_address = "%s:%d" % (self._zookeeper.host, self._zookeeper.port)
+        self._metadata = ClusterMetadata(metadata_ttl)
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _get_describe_topics_arguments(self, topic_name_list=None):
+        """
+        :param topic_name_list: Only describe these topics when set, every topic is described otherwise
+        :type topic_name_list: list[str]
+        :return: The kafka topic script arguments, a single topic being described on its own
+        :rtype: list[str]
+        """
+        arguments = ["--describe", "--zookeeper", self._zookeeper_full_address]
+        if topic_name_list is not None and len(topic_name_list) == 1:
+            arguments += ["--topic", topic_name_list[0]]
+        return arguments
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _get_create_topic_runs(self, topic_list):
+        """
+        :param topic_list: The topics to be created
+        :type topic_list: list[Topic]
+        :return: The (script, title, arguments) run of each topic name
+        :rtype: dict[str, (str, str, list[str])]
+        """
+        return collections.OrderedDict(
+            (topic.name, (KafkaScriptMixin.TOPIC_SCRIPT, "CREATE TOPIC",
+                          ["--create", "--zookeeper", self._zookeeper_full_address, "--topic", topic.name] +
+                          KafkaScriptMixin._get_placement_arguments(topic) +
+                          KafkaScriptMixin._get_topic_config_arguments(topic)))
+            for topic in topic_list)
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _get_delete_topic_runs(self, topic_name_list):
+        """
+        :param topic_name_list: The name of the topics to delete
+        :type topic_name_list: list[str]
+        :return: The (script, title, arguments) run of each topic name
+        :rtype: dict[str, (str, str, list[str])]
+        """
+        return collections.OrderedDict(
+            (topic_name, (KafkaScriptMixin.TOPIC_SCRIPT, "DELETE TOPIC",
+                          ["--delete", "--zookeeper", self._zookeeper_full_address, "--topic", topic_name]))
+            for topic_name in topic_name_list)
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _get_create_partitions_runs(self, partition_numbers):
+        """
+        :param partition_numbers: New partition number to be applied for each topic name
+        :type partition_numbers: dict[str, int]
+        :return: The (script, title, arguments) run of each topic name
+        :rtype: dict[str, (str, str, list[str])]
+        """
+        return collections.OrderedDict(
+            (topic_name, (KafkaScriptMixin.TOPIC_SCRIPT, "ALTER TOPIC PARTITION",
+                          ["--alter", "--zookeeper", self._zookeeper_full_address, "--topic", topic_name,
+                           "--partitions", str(partition_number)]))
+            for topic_name, partition_number in partition_numbers.items())
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _get_acl_runs(self, title, action_arguments, acl_list, batch_size):
+        """
+        :param title: Title to identify the output
+        :type title: str
+        :param action_arguments: The action: --add or --remove and its options
+        :type action_arguments: list[str]
+        :param acl_list: The ACLs
+        :type acl_list: list[Acl]
+        :param batch_size: Maximum number of resources per batch
+        :type batch_size: int
+        :return: The (script, title, arguments) run of each batch description
+        :rtype: dict[str, (str, str, list[str])]
+        """
+        return collections.OrderedDict(
+            (str(batch), (KafkaScriptMixin.ACL_SCRIPT, title,
+                          KafkaScriptMixin._get_acl_script_arguments(self._zookeeper_full_address, action_arguments,
+                                                                     batch)))
+            for batch in get_acl_batches(acl_list, batch_size))
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _get_alter_config_runs(self, config_changes):
+        """
+        :param config_changes: The config changes, one per topic
+        :type config_changes: list[TopicConfigChange]
+        :return: The (script, title, arguments) run of each topic name
+        :rtype: dict[str, (str, str, list[str])]
+        """
+        return collections.OrderedDict(
+            (config_change.topic_name, (KafkaScriptMixin.CONFIG_SCRIPT, "ALTER TOPIC CONFIG",
+                                        KafkaScriptMixin._get_alter_config_arguments(self._zookeeper_full_address,
+                                                                                     config_change)))
+            for config_change in config_changes)
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _get_reassignment_arguments(self, reassignment_file_path, throttle=None):
+        """
+        :param reassignment_file_path: The path of the reassignment json file
+        :type reassignment_file_path: str
+        :param throttle: Replication throughput limit in bytes per second during the move, unlimited if None
+        :type throttle: int
+        :return: The kafka reassign partitions script arguments starting the reassignment
+        :rtype: list[str]
+        """
+        arguments = ["--zookeeper", self._zookeeper_full_address, "--execute"]
+        if throttle is not None:
+            arguments += ["--throttle", str(throttle)]
+        return arguments + ["--reassignment-json-file", reassignment_file_path]
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _get_verify_reassignment_arguments(self, reassignment_file_path):
+        """
+        :param reassignment_file_path: The path of the reassignment json file
+        :type reassignment_file_path: str
+        :return: The kafka reassign partitions script arguments checking the progress of the reassignment
+        :rtype: list[str]
+        """
+        return ["--zookeeper", self._zookeeper_full_address, "--verify", "--reassignment-json-file",
+                reassignment_file_path]
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _get_election_arguments(self, election_file_path):
+        """
+        :param election_file_path: The path of the election json file
+        :type election_file_path: str
+        :return: The kafka preferred replica election script arguments
+        :rtype: list[str]
+        """
+        return ["--zookeeper", self._zookeeper_full_address, "--path-to-json-file", election_file_path]
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    @staticmethod
+    def _check_topic_existence(metadata, topic_name, expected):
+        """
+        Raise an exception if a topic exists when it should not or the other way round
+        :param metadata: The cluster metadata snapshot
+        :type metadata: ClusterMetadata
+        :param topic_name: The topic name
+        :type topic_name: str
+        :param expected: True if the topic must exist, False if it must not
+        :type expected: bool
+        """
+        if metadata.has_topic(topic_name) != expected:
+            raise KafkaIotException("Topic \"%s\" %s" % (topic_name, "doesn't exist" if expected else "already exists"))
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    @staticmethod
+    def _get_described_topic(topics, topic_name):
+        """
+        :param topics: The topic information by topic name, as described
+        :type topics: dict[str, Topic]
+        :param topic_name: The topic name
+        :type topic_name: str
+        :return: The topic information, raise an exception if it is missing from the description
+        :rtype: Topic
+        """
+        if topic_name not in topics:
+            raise KafkaIotException("Error when attempting to read topic information. "
+                                    "Topic \"%s\" is missing from the description output" % topic_name)
+        return topics[topic_name]
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    @staticmethod
+    def _select_topics(topics, topic_name_list):
+        """
+        :param topics: The topic information by topic name
+        :type topics: dict[str, Topic]
+        :param topic_name_list: Only keep these topics when set, unknown topic names are ignored
+        :type topic_name_list: list[str]
+        :rtype: dict[str, Topic]
+        """
+        if topic_name_list is None:
+            return topics
+        return {topic_name: topics[topic_name] for topic_name in topic_name_list if topic_name in topics}
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    @staticmethod
+    def _update_topics(metadata, errors, removed=False):
+        """
+        Flag the topics a driver operation succeeded on as having to be described again
+        :param metadata: The cluster metadata snapshot
+        :type metadata: ClusterMetadata
+        :param errors: For each topic name, None if the operation succeeded, the raised exception otherwise
+        :type errors: dict[str, Exception]
+        :param removed: True if the topics were deleted, they are removed from the snapshot instead
+        :type removed: bool
+        """
+        for topic_name, error in errors.items():
+            if error is None:
+                if removed:
+                    metadata.remove_topic(topic_name)
+                else:
+                    metadata.invalidate_topic(topic_name)
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    @staticmethod
+    def _invalidate_known_topics(metadata, topic_name_list):
+        """
+        Flag topics of the cluster metadata snapshot as having to be described again
+        :param metadata: The cluster metadata snapshot
+        :type metadata: ClusterMetadata
+        :param topic_name_list: The name of the topics, the ones missing from the snapshot are ignored
+        :type topic_name_list: list[str]
+        """
+        for topic_name in topic_name_list:
+            if metadata.has_topic(topic_name):
+                metadata.invalidate_topic(topic_name)
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    @staticmethod
+    def _decode_output_line(title, line):
+        """
+        Decode and log an output line of a kafka script
+        :param title: Title to identify the output
+        :type title: str
+        :param line: The raw output line
+        :type line: bytes
+        :rtype: str
+        """
+        line = line.decode(KafkaScriptMixin.DEFAULT_ENCODING).replace("\n", "")
+        log_console_output(title, line)
+        return line
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    @staticmethod
+    def _raise_error(errors, topic_name):
+        """
+        Raise the error of a topic operation, if any
+        :param errors: For each topic name, None if the operation succeeded, the raised exception otherwise
+        :type errors: dict[str, KafkaIotException]
+        :param topic_name: The topic name
+        :type topic_name: str
+        """
+        if errors.get(topic_name) is not None:
+            raise errors[topic_name]
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    @staticmethod
+    def _get_placement_arguments(topic):
+        """
+        Get the kafka topic script arguments placing the replicas of a new topic
+        :param topic: The topic to be created, its config gives the replicas of each partition if not empty
+        :type topic: Topic
+        :return: An explicit replica assignment if the topic has a config, its replication factor and partition number
+        otherwise
+        :rtype: list[str]
+        """
+        if len(topic.config) == 0:
+            return ["--replication-factor", str(topic.replication_factor), "--partitions", str(topic.partition_number)]
+        return ["--replica-assignment", ",".join(":".join(str(replica) for replica in topic_config.replicas)
+                                                 for topic_config in sorted(topic.config,
+                                                                            key=lambda conf: conf.partition))]
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    @staticmethod
+    def _get_topic_config_arguments(topic):
+        """
+        Get the kafka topic script arguments setting the configs of a new topic
+        :param topic: The topic to be created
+        :type topic: Topic
+        :rtype: list[str]
+        """
+        arguments = []
+        for config_name, config_value in sorted((topic.configs or {}).items()):
+            arguments += ["--config", "%s=%s" % (config_name, config_value)]
+        return arguments
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    @staticmethod
+    def _get_alter_config_arguments(zookeeper_full_address, config_change):
+        """
+        :param zookeeper_full_address: The zookeeper host:port the topic configs are stored in
+        :type zookeeper_full_address: str
+        :param config_change: The config change of a topic
+        :type config_change: TopicConfigChange
+        :return: The kafka config script arguments applying every change of the topic at once
+        :rtype: list[str]
+        """
+        arguments = ["--zookeeper", zookeeper_full_address, "--alter", "--entity-type", "topics",
+                     "--entity-name", config_change.topic_name]
+        if len(config_change.to_set) > 0:
+            arguments += ["--add-config", ",".join(KafkaScriptMixin._format_configs(config_change.to_set))]
+        if len(config_change.to_delete) > 0:
+            arguments += ["--delete-config", ",".join(config_change.to_delete)]
+        return arguments
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    @staticmethod
+    def _get_acl_script_arguments(zookeeper_full_address, action_arguments, batch=None):
+        """
+        :param zookeeper_full_address: The zookeeper host:port the authorizer stores the ACLs in
+        :type zookeeper_full_address: str
+        :param action_arguments: The action: --list, --add or --remove and its options
+        :type action_arguments: list[str]
+        :param batch: The ACLs the action applies to, every ACL if None
+        :type batch: AclBatch
+        :return: The kafka acl script arguments
+        :rtype: list[str]
+        """
+        arguments = ["--authorizer-properties", "zookeeper.connect=%s" % zookeeper_full_address] + action_arguments
+        return arguments if batch is None else arguments + batch.to_script_arguments()
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    @staticmethod
+    @contextlib.contextmanager
+    def _json_file(content):
+        """
+        Write a json content into a temporary file given to a kafka script, removed once the context is left
+        :param content: The json content
+        :type content: str
+        :return: The path of the json file
+        :rtype: str
+        """
+        json_file = tempfile.NamedTemporaryFile("w", prefix="kafka-iot-", suffix=".json", delete=False)
+        try:
+            with json_file:
+                json_file.write(content)
+            yield json_file.name
+        finally:
+            os.remove(json_file.name)
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    @staticmethod
+    def _record_script_run(script_name, title, duration, output_size, return_code):
+        """
+        Record the metrics of a kafka script run
+        :param script_name: The script file name
+        :type script_name: str
+        :param title: Title identifying the operation
+        :type title: str
+        :param duration: Wall time in seconds from spawn to exit
+        :type duration: float
+        :param output_size: Standard output size in bytes
+        :type output_size: int
+        :param return_code: The script exit code
+        :type return_code: int
+        """
+        SCRIPT_SECONDS.observe(duration, script=script_name, operation=title)
+        SCRIPT_OUTPUT_BYTES.observe(output_size, script=script_name, operation=title)
+        SCRIPT_EXITS.inc(script=script_name, operation=title, code=return_code)
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    @staticmethod
+    def _count_errors(operation, errors):
+        """
+        Count the topics for which a driver operation failed
+        :param operation: The driver operation
+        :type operation: str
+        :param errors: For each topic name, None if the operation succeeded, the raised exception otherwise
+        :type errors: dict[str, Exception]
+        """
+        error_count = len([error for error in errors.values() if error is not None])
+        if error_count > 0:
+            DRIVER_OPERATION_ERRORS.inc(error_count, operation=operation)
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    @staticmethod
+    def _is_election_in_progress(output_lines):
+        """
+        :param output_lines: The output lines of the preferred replica election script
+        :type output_lines: list[str]
+        :return: True if the election has not been started because another one is in progress
+        :rtype: bool
+        """
+        return any("currently in progress" in line for line in output_lines)
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    @staticmethod
+    def _check_reassignment_progress(reassignment, statuses):
+        """
+        Log the progress of a partition reassignment
+        :param reassignment: The partition reassignment
+        :type reassignment: PartitionReassignment
+        :param statuses: The reassignment status by (topic name, partition) couple
+        :type statuses: dict[(str, int), str]
+        :return: True if every partition has been moved, raise an exception if a partition failed to be moved
+        :rtype: bool
+        """
+        failed_partitions = ["%s-%d" % partition for partition, status in statuses.items()
+                             if status == PartitionReassignment.FAILED]
+        if len(failed_partitions) > 0:
+            raise KafkaIotException("Partition reassignment failed for partition(s): [%s]"
+                                    % ", ".join(failed_partitions))
+
+        completed_count = len([partition for partition in reassignment.assignment
+                               if statuses.get(partition) == PartitionReassignment.COMPLETED])
+        logger.info("Partition reassignment progress: %d/%d partition(s) moved", completed_count,
+                    len(reassignment.assignment))
+        return completed_count == len(reassignment.assignment)
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    @staticmethod
+    def _parse_topic_description(output_lines):
+        """
+        Parse the output of a kafka topic script description, which can hold several topics
+        :param output_lines: The output lines of the kafka topic script
+        :type output_lines: list[str]
+        :return: The topic information by topic name, in the order of the output
+        :rtype: dict[str, Topic]
+        """
+        topics = collections.OrderedDict()
+        topic_name = None
+        topic_partition_number = 1
+        topic_replication_factor = 1
+        topic_config = []
+        topic_configs = {}
+
+        for line in output_lines:
+            if "PartitionCount:" in line:  # Topic info, starts the description of a new topic
+                if topic_name is not None:
+                    topics[topic_name] = Topic(topic_name, topic_replication_factor, topic_partition_number,
+                                               topic_config, topic_configs)
+                matches = re.search(r"Topic:\s*(\S+).*PartitionCount:\s*(\d+).*ReplicationFactor:\s*(\d+)", line)
+                if matches is not None:  # topic name, partition count, replication factor
+                    topic_name = matches.groups()[0]
+                    topic_partition_number = int(matches.groups()[1])
+                    topic_replication_factor = int(matches.groups()[2])
+                    topic_config = []
+                    configs_matches = re.search(r"Configs:\s*(\S*)", line)
+                    topic_configs = KafkaScriptMixin._parse_configs(configs_matches.groups()[0]
+                                                               if configs_matches is not None else "")
+                else:
+                    raise KafkaIotException("Error when attempting to read topic information. "
+                                            "The received format doesn't match the required one")
+            elif "Partition:" in line and topic_name is not None:  # Topic config line
+                matches = re.search(r".*Partition:\s*(\d+).*Leader:\s*(-?\d+).*Replicas:\s*(\S*).*Isr:\s*(\S*)",
+                                    line)
+                if matches is not None:  # partition, leader, replicas, isr
+                    topic_config.append(TopicConfig(
+                        partition=int(matches.groups()[0]),
+                        leader=int(matches.groups()[1]),
+                        replicas=tuple(int(rep) for rep in matches.groups()[2].split(",") if rep != ""),
+                        isr=tuple(int(isr) for isr in matches.groups()[3].split(",") if isr != "")
+                    ))
+                else:
+                    raise KafkaIotException("Error when attempting to read topic config information. "
+                                            "The received format doesn't match the required one")
+
+        if topic_name is not None:
+            topics[topic_name] = Topic(topic_name, topic_replication_factor, topic_partition_number, topic_config,
+                                       topic_configs)
+        return topics
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    @staticmethod
+    def _parse_configs(configs_text):
+        """
+        Parse the topic configs of a kafka topic script description, e.g. retention.ms=10,cleanup.policy=compact,delete
+        :param configs_text: The configs column, list values being comma separated as well
+        :type configs_text: str
+        :return: The config values by config name
+        :rtype: dict[str, str]
+        """
+        configs = collections.OrderedDict()
+        config_name = None
+        for item in configs_text.split(","):
+            if "=" in item:
+                config_name, config_value = item.split("=", 1)
+                configs[config_name] = config_value
+            elif config_name is not None:  # Next element of a list value
+                configs[config_name] += "," + item
+        return configs
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    @staticmethod
+    def _format_configs(configs):
+        """
+        Format topic configs for kafka-configs.sh --add-config, list values being put between brackets
+        :param configs: The config values by config name
+        :type configs: dict[str, str]
+        :return: The name=value couples, to be joined with commas
+        :rtype: list[str]
+        """
+        return ["%s=%s" % (config_name, "[%s]" % config_value if "," in config_value else config_value)
+                for config_name, config_value in sorted(configs.items())]
+
+
+class KafkaDriver(KafkaScriptMixin):
+    """Kafka driving"""
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, kafka_path, zookeeper, metadata_ttl=KafkaScriptMixin.DEFAULT_METADATA_TTL, max_parallel_ops=1):
+        """
+        KafkaDriver Constructor
+        :param kafka_path: Path to Kafka install folder
+        :param zookeeper: Zookeeper info
+        :type zookeeper: Zookeeper
+        :param metadata_ttl: Time in seconds the cluster metadata snapshot is kept before being fetched again
+        :type metadata_ttl: float
+        :param max_parallel_ops: Maximum number of kafka scripts running at the same time for multi topic operations
+        :type max_parallel_ops: int
+        """
+        super(KafkaDriver, self).__init__(kafka_path, zookeeper, metadata_ttl)
+        self._metadata_lock = threading.RLock()  # Driver operations can be run from several threads
+        self._executor = TopicTaskExecutor(max_parallel_ops)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def get_cluster_metadata(self, force_refresh=False):
+        """
+        Get the cluster metadata snapshot, fetching it again if it is expired
+        :param force_refresh: Fetch the cluster metadata even if the snapshot is still valid
+        :type force_refresh: bool
+        :return: The cluster metadata snapshot
+        :rtype: ClusterMetadata
+        """
+        with self._metadata_lock:
+            if force_refresh or self._metadata.is_expired():
+                with DRIVER_OPERATION_SECONDS.time(operation="describe_topics"):
+                    self._metadata.reset(self._do_describe_topics())
+                logger.debug("Cluster metadata snapshot refreshed, version %d", self._metadata.version)
+            return self._metadata
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def invalidate_cluster_metadata(self):
+        """
+        Drop the cluster metadata snapshot, it will be fetched again on the next call
+        """
+        with self._metadata_lock:
+            self._metadata.clear()
 
     # ------------------------------------------------------------------------------------------------------------------
-    def list_topic_name(self):
+    def list_topic_name(self, force_refresh=False):
         """
         List the name of topics available in kafka
+        :param force_refresh: Fetch the cluster metadata even if the snapshot is still valid
+        :type force_refresh: bool
         :return: The list of topic available in kafka
         :rtype: list[str]
         """
-        p = subprocess.Popen([self._get_topic_script(), "--list", "--zookeeper", self._zookeeper_full_address],
-                             stdout=subprocess.PIPE)
-
-        topic_list = []
-
-        while True:
-            line = p.stdout.readline()
-            if line != b'':
-                line = line.decode(KafkaDriver.DEFAULT_ENCODING).replace("\n", "")
-                log_console_output("LIST TOPIC", line)
-                topic_list.append(line)
-            else:
-                break
-        return topic_list
+        return self.get_cluster_metadata(force_refresh).topic_names()
 
     # ------------------------------------------------------------------------------------------------------------------
-    def describe_topic(self, topic_name, check_topic_existence=True):
+    def describe_topic(self, topic_name, check_topic_existence=True, force_refresh=False):
         """
         Get the information describing a topic
         :param topic_name: Name of the topic to get the information
         :type topic_name: str
         :param check_topic_existence: Check if the topic exists before trying to describe it
         :type check_topic_existence: bool
+        :param force_refresh: Describe the topic even if it is in the cluster metadata snapshot
+        :type force_refresh: bool
         :return: The topic information
         :rtype: Topic
         """
+        metadata = self.get_cluster_metadata()
+
         if check_topic_existence:
-            if topic_name not in self.list_topic_name():
-                raise KafkaIotException("Topic \"%s\" doesn't exist" % topic_name)
+            KafkaDriver._check_topic_existence(metadata, topic_name, True)
 
-        p = subprocess.Popen([self._get_topic_script(), "--describe", "--zookeeper", self._zookeeper_full_address,
-                              "--topic", topic_name], stdout=subprocess.PIPE)
+        topic = metadata.get_topic(topic_name)
+        if topic is None or force_refresh:
+            with DRIVER_OPERATION_SECONDS.time(operation="describe_topics"):
+                topic = KafkaDriver._get_described_topic(self._do_describe_topics([topic_name]), topic_name)
+            with self._metadata_lock:
+                metadata.put_topic(topic)
+        return topic
 
-        topic_partition_number = 1
-        topic_replication_factor = 1
-        topic_config = []
-        i = 0
+    # ------------------------------------------------------------------------------------------------------------------
+    def describe_all_topics(self, topic_name_list=None, force_refresh=False):
+        """
+        Get the information describing every topic with a single cluster metadata fetch at most
+        :param topic_name_list: Only describe these topics when set, unknown topic names are ignored
+        :type topic_name_list: list[str]
+        :param force_refresh: Fetch the cluster metadata even if the snapshot is still valid
+        :type force_refresh: bool
+        :return: The topic information by topic name
+        :rtype: dict[str, Topic]
+        """
+        with self._metadata_lock:
+            metadata = self.get_cluster_metadata(force_refresh)
 
-        while True:
-            i += 1
-            line = p.stdout.readline()
-            if line != b'':
-                line = line.decode(KafkaDriver.DEFAULT_ENCODING).replace("\n", "")
-                log_console_output("DESCRIBE TOPIC", line)
-                if i == 1:  # Topic info
-                    matches = re.search(".*PartitionCount:\s*(\d*).*ReplicationFactor:\s*(\d*)", line)
-                    if len(matches.groups()) == 2:  # partition count, replication factor
-                        topic_partition_number = int(matches.groups()[0])
-                        topic_replication_factor = int(matches.groups()[1])
-                    else:
-                        raise KafkaIotException("Error when attempting to read topic information. "
-                                                "The received format doesn't match the required one")
-                else:  # Topic config line
-                    matches = re.search(".*Partition:\s*(\d*).*Leader:\s*(\d*).*Replicas:\s*(\S*).*Isr:\s*(\S*)",
-                                        line)
-                    if len(matches.groups()) == 4:  # partition, leader, replicas, isr
-                        topic_config.append(TopicConfig(
-                            partition=int(matches.groups()[0]),
-                            leader=int(matches.groups()[1]),
-                            replicas=list(int(rep) for rep in matches.groups()[2].split(",")),
-                            isr=list(int(isr) for isr in matches.groups()[3].split(","))
-                        ))
-                    else:
-                        raise KafkaIotException("Error when attempting to read topic config information. "
-                                                "The received format doesn't match the required one")
-            else:
-                break
-        return Topic(topic_name, topic_replication_factor, topic_partition_number, topic_config)
+            # Topics altered since the last fetch are described again all at once
+            if len(metadata.unknown_topic_names()) > 0:
+                metadata = self.get_cluster_metadata(True)
+
+            topics = metadata.topics()
+        return KafkaDriver._select_topics(topics, topic_name_list)
 
     # ------------------------------------------------------------------------------------------------------------------
     def create_topic(self, topic_name, replication_factor, partitions, check_topic_existence=True):
@@ -117,20 +649,10 @@ class KafkaDriver(object):
         :param check_topic_existence: Check if the topic exists before trying to create it
         """
         if check_topic_existence:
-            if topic_name in self.list_topic_name():
-                raise KafkaIotException("Topic \"%s\" already exists" % topic_name)
+            KafkaDriver._check_topic_existence(self.get_cluster_metadata(), topic_name, False)
 
-        p = subprocess.Popen([self._get_topic_script(), "--create", "--zookeeper", self._zookeeper_full_address,
-                              "--replication-factor", str(replication_factor), "--partitions", str(partitions),
-                              "--topic", topic_name], stdout=subprocess.PIPE)
-
-        while True:
-            line = p.stdout.readline()
-            if line != b'':
-                line = line.decode(KafkaDriver.DEFAULT_ENCODING).replace("\n", "")
-                log_console_output("CREATE TOPIC", line)
-            else:
-                break
+        KafkaDriver._raise_error(self.create_topics([Topic(topic_name, replication_factor, partitions, [])]),
+                                 topic_name)
 
     # ------------------------------------------------------------------------------------------------------------------
     def delete_topic(self, topic_name, check_topic_existence=True):
@@ -143,19 +665,9 @@ class KafkaDriver(object):
         :type check_topic_existence: bool
         """
         if check_topic_existence:
-            if topic_name not in self.list_topic_name():
-                raise KafkaIotException("Topic \"%s\" doesn't exist" % topic_name)
+            KafkaDriver._check_topic_existence(self.get_cluster_metadata(), topic_name, True)
 
-        p = subprocess.Popen([self._get_topic_script(), "--delete", "--zookeeper", self._zookeeper_full_address,
-                              "--topic", topic_name], stdout=subprocess.PIPE)
-
-        while True:
-            line = p.stdout.readline()
-            if line != b'':
-                line = line.decode(KafkaDriver.DEFAULT_ENCODING).replace("\n", "")
-                log_console_output("DELETE TOPIC", line)
-            else:
-                break
+        KafkaDriver._raise_error(self.delete_topics([topic_name]), topic_name)
 
     # ------------------------------------------------------------------------------------------------------------------
     def alter_topic(self, topic_name, partition_number=-1, check_topic_existence=True):
@@ -168,36 +680,382 @@ class KafkaDriver(object):
         :param check_topic_existence: Check if the topic exists before trying to delete it
         :type check_topic_existence: bool
         """
-        if check_topic_existence:
-            if topic_name not in self.list_topic_name():
-                raise KafkaIotException("Topic \"%s\" doesn't exist" % topic_name)
-
-        topic = self.describe_topic(topic_name, False)
+        topic = self.describe_topic(topic_name, check_topic_existence)
 
         if topic.partition_number != partition_number > 0:
             if partition_number < topic.partition_number:  # If the number of partition has te be decreased
                 self.delete_topic(topic_name, False)
-                self.create_topic(topic_name, topic.replication_factor, partition_number)
-                logging.warning("Topic \"%s\" has been deleted and re-created in order to reduce its partition number "
-                                "from %d to %d" % (topic_name, topic.partition_number, partition_number))
+                self.create_topic(topic_name, topic.replication_factor, partition_number, False)
+                logger.warning("Topic \"%s\" has been deleted and re-created in order to reduce its partition number "
+                               "from %d to %d", topic_name, topic.partition_number, partition_number)
             else:  # Increase the number of partition
-                p = subprocess.Popen([self._get_topic_script(), "--alter", "--zookeeper", self._zookeeper_full_address,
-                                      "--topic", topic_name, "--partitions", str(partition_number)],
-                                     stdout=subprocess.PIPE)
+                KafkaDriver._raise_error(self.create_partitions({topic_name: partition_number}), topic_name)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def create_topics(self, topic_list):
+        """
+        Attempt to create several topics at once
+        :param topic_list: The topics to be created, their config gives the replicas of each partition if not empty
+        :type topic_list: list[Topic]
+        :return: For each topic name, None if the topic has been created, the raised exception otherwise
+        :rtype: dict[str, KafkaIotException]
+        """
+        if len(topic_list) == 0:
+            return {}
+
+        with DRIVER_OPERATION_SECONDS.time(operation="create_topics"):
+            errors = self._do_create_topics(topic_list)
+        KafkaDriver._count_errors("create_topics", errors)
+        with self._metadata_lock:
+            KafkaDriver._update_topics(self.get_cluster_metadata(), errors)
+        return errors
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def delete_topics(self, topic_name_list):
+        """
+        Attempt to delete several topics at once
+        :param topic_name_list: The name of the topics to delete
+        :type topic_name_list: list[str]
+        :return: For each topic name, None if the topic has been deleted, the raised exception otherwise
+        :rtype: dict[str, KafkaIotException]
+        """
+        if len(topic_name_list) == 0:
+            return {}
+
+        with DRIVER_OPERATION_SECONDS.time(operation="delete_topics"):
+            errors = self._do_delete_topics(topic_name_list)
+        KafkaDriver._count_errors("delete_topics", errors)
+        with self._metadata_lock:
+            KafkaDriver._update_topics(self.get_cluster_metadata(), errors, removed=True)
+        return errors
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def create_partitions(self, partition_numbers):
+        """
+        Increase the partition number of several topics at once
+        :param partition_numbers: New partition number to be applied for each topic name
+        :type partition_numbers: dict[str, int]
+        :return: For each topic name, None if the partitions have been created, the raised exception otherwise
+        :rtype: dict[str, KafkaIotException]
+        """
+        if len(partition_numbers) == 0:
+            return {}
+
+        with DRIVER_OPERATION_SECONDS.time(operation="create_partitions"):
+            errors = self._do_create_partitions(partition_numbers)
+        KafkaDriver._count_errors("create_partitions", errors)
+        with self._metadata_lock:
+            KafkaDriver._update_topics(self.get_cluster_metadata(), errors)
+        return errors
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def reassign_partitions(self, reassignment, throttle=None):
+        """
+        Start moving partition replicas, the topics stay online during the move
+        :param reassignment: The target replicas of the partitions to move
+        :type reassignment: PartitionReassignment
+        :param throttle: Replication throughput limit in bytes per second during the move, unlimited if None
+        :type throttle: int
+        """
+        with KafkaDriver._json_file(reassignment.to_json()) as reassignment_file_path, \
+                DRIVER_OPERATION_SECONDS.time(operation="reassign_partitions"):
+            self._run_script(KafkaDriver.REASSIGN_PARTITIONS_SCRIPT, "REASSIGN PARTITIONS",
+                             self._get_reassignment_arguments(reassignment_file_path, throttle))
+
+        self._invalidate_topics(reassignment.topic_names())
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def verify_reassignment(self, reassignment):
+        """
+        Get the progress of a partition reassignment. The throttle is removed once every partition has been moved
+        :param reassignment: The partition reassignment
+        :type reassignment: PartitionReassignment
+        :return: The reassignment status (COMPLETED, IN_PROGRESS or FAILED) by (topic name, partition) couple
+        :rtype: dict[(str, int), str]
+        """
+        with KafkaDriver._json_file(reassignment.to_json()) as reassignment_file_path, \
+                DRIVER_OPERATION_SECONDS.time(operation="verify_reassignment"):
+            output_lines = self._run_script(KafkaDriver.REASSIGN_PARTITIONS_SCRIPT, "VERIFY REASSIGNMENT",
+                                            self._get_verify_reassignment_arguments(reassignment_file_path))
+        return PartitionReassignment.parse_verify_output(output_lines)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def wait_for_reassignment(self, reassignment, poll_interval, timeout=None):
+        """
+        Poll the progress of a partition reassignment until every partition has been moved
+        :param reassignment: The partition reassignment
+        :type reassignment: PartitionReassignment
+        :param poll_interval: Time in seconds between two progress checks
+        :type poll_interval: float
+        :param timeout: Time in seconds after which the wait is given up, never if None
+        :type timeout: float
+        """
+        start_time = time.time()
+
+        while True:
+            statuses = self.verify_reassignment(reassignment)
+            if KafkaDriver._check_reassignment_progress(reassignment, statuses):
+                break
+            if timeout is not None and time.time() - start_time >= timeout:
+                raise KafkaIotException("Partition reassignment still in progress after %s second(s)" % str(timeout))
+            time.sleep(poll_interval)
+
+        self._invalidate_topics(reassignment.topic_names())
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def elect_preferred_leaders(self, partition_keys, poll_interval, timeout=None):
+        """
+        Move the leadership of partitions back to their preferred leader. Kafka runs a single election at a time, the
+        election is started again until the one in progress ends
+        :param partition_keys: The (topic name, partition) couples
+        :type partition_keys: list[(str, int)]
+        :param poll_interval: Time in seconds between two election attempts
+        :type poll_interval: float
+        :param timeout: Time in seconds after which the election is given up, never if None
+        :type timeout: float
+        """
+        start_time = time.time()
+
+        with KafkaDriver._json_file(LeaderDistribution.to_election_json(partition_keys)) as election_file_path, \
+                DRIVER_OPERATION_SECONDS.time(operation="elect_preferred_leaders"):
+            while True:
+                output_lines = self._run_script(KafkaDriver.PREFERRED_REPLICA_ELECTION_SCRIPT,
+                                                "PREFERRED REPLICA ELECTION",
+                                                self._get_election_arguments(election_file_path))
+                if not KafkaDriver._is_election_in_progress(output_lines):
+                    break
+                if timeout is not None and time.time() - start_time >= timeout:
+                    raise KafkaIotException("Preferred replica election still in progress after %s second(s)"
+                                            % str(timeout))
+                time.sleep(poll_interval)
+
+        self._invalidate_topics(sorted(set(topic_name for topic_name, _ in partition_keys)))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def list_acls(self):
+        """
+        Fetch every ACL of the cluster at once
+        :return: The read and write allow ACLs on topics and groups
+        :rtype: set[Acl]
+        """
+        with DRIVER_OPERATION_SECONDS.time(operation="list_acls"):
+            return self._do_list_acls()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def create_acls(self, acl_list, batch_size=KafkaScriptMixin.DEFAULT_ACL_BATCH_SIZE):
+        """
+        Add ACLs, grouped into batches applied with a single request each
+        :param acl_list: The ACLs to add
+        :type acl_list: list[Acl]
+        :param batch_size: Maximum number of resources per kafka-acls.sh invocation
+        :type batch_size: int
+        :return: For each batch description, None if the ACLs have been added, the raised exception otherwise
+        :rtype: dict[str, KafkaIotException]
+        """
+        if len(acl_list) == 0:
+            return {}
+
+        with DRIVER_OPERATION_SECONDS.time(operation="create_acls"):
+            errors = self._do_create_acls(acl_list, batch_size)
+        KafkaDriver._count_errors("create_acls", errors)
+        return errors
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def delete_acls(self, acl_list, batch_size=KafkaScriptMixin.DEFAULT_ACL_BATCH_SIZE):
+        """
+        Remove ACLs, grouped into batches applied with a single request each
+        :param acl_list: The ACLs to remove
+        :type acl_list: list[Acl]
+        :param batch_size: Maximum number of resources per kafka-acls.sh invocation
+        :type batch_size: int
+        :return: For each batch description, None if the ACLs have been removed, the raised exception otherwise
+        :rtype: dict[str, KafkaIotException]
+        """
+        if len(acl_list) == 0:
+            return {}
+
+        with DRIVER_OPERATION_SECONDS.time(operation="delete_acls"):
+            errors = self._do_delete_acls(acl_list, batch_size)
+        KafkaDriver._count_errors("delete_acls", errors)
+        return errors
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def alter_topic_configs(self, config_changes):
+        """
+        Apply the config changes of several topics at once
+        :param config_changes: The config changes, one per topic
+        :type config_changes: list[TopicConfigChange]
+        :return: For each topic name, None if its configs have been altered, the raised exception otherwise
+        :rtype: dict[str, KafkaIotException]
+        """
+        if len(config_changes) == 0:
+            return {}
 
-                while True:
-                    line = p.stdout.readline()
-                    if line != b'':
-                        line = line.decode(KafkaDriver.DEFAULT_ENCODING).replace("\n", "")
-                        log_console_output("ALTER TOPIC PARTITION", line)
-                    else:
-                        break
+        with DRIVER_OPERATION_SECONDS.time(operation="alter_topic_configs"):
+            errors = self._do_alter_topic_configs(config_changes)
+        KafkaDriver._count_errors("alter_topic_configs", errors)
+        self._invalidate_topics([topic_name for topic_name, error in errors.items() if error is None])
+        return errors
 
     # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
-    def _get_topic_script(self):
+    def _invalidate_topics(self, topic_name_list):
         """
-        Return the path of the kafka topic management script
-        :return: The path of the kafka topic management script
-        :rtype: str
+        Flag topics of the cluster metadata snapshot as having to be described again
+        :param topic_name_list: The name of the topics
+        :type topic_name_list: list[str]
+        """
+        with self._metadata_lock:
+            KafkaDriver._invalidate_known_topics(self.get_cluster_metadata(), topic_name_list)
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _do_describe_topics(self, topic_name_list=None):
+        """
+        Describe topics on the cluster, bypassing the cluster metadata snapshot
+        :param topic_name_list: Only describe these topics when set, every topic is described otherwise
+        :type topic_name_list: list[str]
+        :return: The topic information by topic name
+        :rtype: dict[str, Topic]
+        """
+        output_lines = self._run_topic_script("DESCRIBE TOPIC", self._get_describe_topics_arguments(topic_name_list))
+        return KafkaDriver._select_topics(KafkaDriver._parse_topic_description(output_lines), topic_name_list)
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _do_create_topics(self, topic_list):
+        """
+        Create topics on the cluster, one kafka topic script invocation per topic
+        :param topic_list: The topics to be created
+        :type topic_list: list[Topic]
+        :return: For each topic name, None if the topic has been created, the raised exception otherwise
+        :rtype: dict[str, KafkaIotException]
+        """
+        return self._run_scripts_for_errors(self._get_create_topic_runs(topic_list))
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _do_delete_topics(self, topic_name_list):
+        """
+        Delete topics on the cluster, one kafka topic script invocation per topic
+        :param topic_name_list: The name of the topics to delete
+        :type topic_name_list: list[str]
+        :return: For each topic name, None if the topic has been deleted, the raised exception otherwise
+        :rtype: dict[str, KafkaIotException]
+        """
+        return self._run_scripts_for_errors(self._get_delete_topic_runs(topic_name_list))
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _do_create_partitions(self, partition_numbers):
+        """
+        Increase the partition number of topics on the cluster, one kafka topic script invocation per topic
+        :param partition_numbers: New partition number to be applied for each topic name
+        :type partition_numbers: dict[str, int]
+        :return: For each topic name, None if the partitions have been created, the raised exception otherwise
+        :rtype: dict[str, KafkaIotException]
         """
-        return os.path.join(self._kafka_path, KafkaDriver.TOPIC_SCRIPT)
+        return self._run_scripts_for_errors(self._get_create_partitions_runs(partition_numbers))
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _do_list_acls(self):
+        """
+        List the ACLs of the cluster with a single kafka acl script invocation
+        :rtype: set[Acl]
+        """
+        return parse_acl_list_output(self._run_script(KafkaDriver.ACL_SCRIPT, "LIST ACLS",
+                                                      KafkaDriver._get_acl_script_arguments(
+                                                          self._zookeeper_full_address, ["--list"])))
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _do_create_acls(self, acl_list, batch_size):
+        """
+        Add ACLs on the cluster, one kafka acl script invocation per batch
+        :param acl_list: The ACLs to add
+        :type acl_list: list[Acl]
+        :param batch_size: Maximum number of resources per batch
+        :type batch_size: int
+        :return: For each batch description, None if the ACLs have been added, the raised exception otherwise
+        :rtype: dict[str, KafkaIotException]
+        """
+        return self._run_scripts_for_errors(self._get_acl_runs("ADD ACLS", ["--add"], acl_list, batch_size))
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _do_delete_acls(self, acl_list, batch_size):
+        """
+        Remove ACLs from the cluster, one kafka acl script invocation per batch
+        :param acl_list: The ACLs to remove
+        :type acl_list: list[Acl]
+        :param batch_size: Maximum number of resources per batch
+        :type batch_size: int
+        :return: For each batch description, None if the ACLs have been removed, the raised exception otherwise
+        :rtype: dict[str, KafkaIotException]
+        """
+        return self._run_scripts_for_errors(self._get_acl_runs("REMOVE ACLS", ["--remove", "--force"], acl_list,
+                                                               batch_size))
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _do_alter_topic_configs(self, config_changes):
+        """
+        Alter topic configs on the cluster, one kafka config script invocation per topic carrying all its changes
+        :param config_changes: The config changes, one per topic
+        :type config_changes: list[TopicConfigChange]
+        :return: For each topic name, None if its configs have been altered, the raised exception otherwise
+        :rtype: dict[str, KafkaIotException]
+        """
+        return self._run_scripts_for_errors(self._get_alter_config_runs(config_changes))
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _run_scripts_for_errors(self, script_runs):
+        """
+        Run kafka scripts on the topic task executor, up to max_parallel_ops at the same time
+        :param script_runs: The (script, title, arguments) run of each key
+        :type script_runs: dict[str, (str, str, list[str])]
+        :return: For each key, None if the script succeeded, the raised exception otherwise
+        :rtype: dict[str, KafkaIotException]
+        """
+        return self._executor.run_for_errors(collections.OrderedDict(
+            (key, functools.partial(self._run_script, *script_run)) for key, script_run in script_runs.items()))
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _run_topic_script(self, title, arguments):
+        """
+        Run the kafka topic management script, log its output and wait for it to end
+        :param title: Title to identify the output
+        :type title: str
+        :param arguments: The kafka topic script arguments
+        :type arguments: list[str]
+        :return: The output lines of the script
+        :rtype: list[str]
+        """
+        return self._run_script(KafkaDriver.TOPIC_SCRIPT, title, arguments)
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _run_script(self, script, title, arguments):
+        """
+        Run a kafka script, log its output and wait for it to end
+        :param script: Path of the script, relative to the kafka install folder
+        :type script: str
+        :param title: Title to identify the output
+        :type title: str
+        :param arguments: The kafka script arguments
+        :type arguments: list[str]
+        :return: The output lines of the script
+        :rtype: list[str]
+        """
+        script_name = os.path.basename(script)
+        start_time = time.perf_counter()
+        p = subprocess.Popen([os.path.join(self._kafka_path, script)] + arguments, stdout=subprocess.PIPE)
+        SCRIPT_SPAWN_SECONDS.observe(time.perf_counter() - start_time, script=script_name)
+        output_lines = []
+        output_size = 0
+
+        while True:
+            line = p.stdout.readline()
+            if line != b'':
+                output_size += len(line)
+                output_lines.append(KafkaDriver._decode_output_line(title, line))
+            else:
+                break
+
+        p.stdout.close()
+        return_code = p.wait()
+        KafkaDriver._record_script_run(script_name, title, time.perf_counter() - start_time, output_size, return_code)
+        if return_code != 0:
+            raise KafkaIotException("%s failed, %s exited with code %d" % (title, script_name, return_code))
+        return output_lines
@@ -0,0 +1,55 @@
+import logging
+from system_launcher.KafkaDriver import KafkaDriver
+from system_launcher.AdminClientKafkaDriver import AdminClientKafkaDriver, AdminClient
+from system_launcher.AsyncKafkaDriver import AsyncKafkaDriver
+from common.KafkaIotException import KafkaIotException
+
+logger = logging.getLogger(__name__)
+
+DRIVER_SCRIPT = "SCRIPT"
+DRIVER_ADMIN_CLIENT = "ADMIN_CLIENT"
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def create_kafka_driver(driver_type, kafka_path, zookeeper, broker_list, timeout=AdminClientKafkaDriver.DEFAULT_TIMEOUT,
+                        metadata_ttl=KafkaDriver.DEFAULT_METADATA_TTL, max_parallel_ops=1, use_async=False):
+    """
+    Create the kafka driver matching the given driver type
+    :param driver_type: The kafka driver backend: ADMIN_CLIENT or SCRIPT
+    :type driver_type: str
+    :param kafka_path: Path to Kafka install folder
+    :type kafka_path: str
+    :param zookeeper: Zookeeper info
+    :type zookeeper: Zookeeper
+    :param broker_list: Kafka brokers
+    :type broker_list: list[KafkaBroker]
+    :param timeout: Timeout in seconds of every admin client request
+    :type timeout: float
+    :param metadata_ttl: Time in seconds the cluster metadata snapshot is kept before being fetched again
+    :type metadata_ttl: float
+    :param max_parallel_ops: Maximum number of kafka scripts running at the same time for multi topic operations
+    :type max_parallel_ops: int
+    :param use_async: Create the asynchronous kafka driver, which only drives kafka scripts
+    :type use_async: bool
+    :return: The kafka driver. Fallback on the script driver if the admin client can't be used
+    :rtype: KafkaDriver | AsyncKafkaDriver
+    """
+    driver_type = driver_type.upper()
+
+    if use_async:
+        if driver_type != DRIVER_SCRIPT:
+            logger.warning("The asynchronous kafka driver only drives kafka scripts, the %s kafka driver is not used",
+                           driver_type)
+        return AsyncKafkaDriver(kafka_path, zookeeper, metadata_ttl, max_parallel_ops)
+
+    if driver_type == DRIVER_ADMIN_CLIENT:
+        if AdminClient is not None:
+            return AdminClientKafkaDriver(kafka_path, zookeeper, broker_list, timeout, metadata_ttl, max_parallel_ops)
+        logger.warning("confluent-kafka is not installed, falling back on the %s kafka driver", DRIVER_SCRIPT)
+        return KafkaDriver(kafka_path, zookeeper, metadata_ttl, max_parallel_ops)
+
+    if driver_type == DRIVER_SCRIPT:
+        return KafkaDriver(kafka_path, zookeeper, metadata_ttl, max_parallel_ops)
+
+    raise KafkaIotException("Unknown kafka driver \"%s\", available drivers are: %s, %s"
+                            % (driver_type, DRIVER_ADMIN_CLIENT, DRIVER_SCRIPT))
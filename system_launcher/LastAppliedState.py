@@ -0,0 +1,169 @@
+import os
+import json
+import logging
+import hashlib
+from common.Utils import expand_var_and_user
+
+logger = logging.getLogger(__name__)
+
+
+class LastAppliedState(object):
+    """Fingerprints of the topics as they were after the last successful reconciliation, along with the principals
+    whose ACLs were applied, persisted between runs"""
+
+    FORMAT_VERSION = 2
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, file_path):
+        """
+        Last applied state constructor
+        :param file_path: Path of the file in which the state is persisted
+        :type file_path: str
+        """
+        self._file_path = expand_var_and_user(file_path)
+        self._topics = {}  # [desired fingerprint, observed fingerprint] by topic name
+        self._cluster_snapshot_version = None
+        self._acl_principals = []  # Principals of the last applied ACLs, still managed once removed from the config
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def load(self):
+        """
+        Load the state from its file. An empty state is used if the file doesn't exist or can't be read
+        :return: The last applied state itself
+        :rtype: LastAppliedState
+        """
+        self._topics = {}
+        self._cluster_snapshot_version = None
+        self._acl_principals = []
+
+        if os.path.isfile(self._file_path):
+            try:
+                with open(self._file_path, "r") as state_file:
+                    content = json.load(state_file)
+                if content.get("FORMAT_VERSION") == LastAppliedState.FORMAT_VERSION:
+                    self._topics = content["TOPICS"]
+                    self._cluster_snapshot_version = content["CLUSTER_SNAPSHOT_VERSION"]
+                    self._acl_principals = content.get("ACL_PRINCIPALS", [])
+            except (ValueError, KeyError, IOError) as e:
+                logger.warning("Last applied state file %s can't be read, every topic will be reconciled: %s",
+                               self._file_path, e)
+        return self
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def save(self):
+        """
+        Persist the state into its file, the previous file is replaced atomically
+        """
+        temp_file_path = self._file_path + ".tmp"
+        with open(temp_file_path, "w") as state_file:
+            json.dump({
+                "FORMAT_VERSION": LastAppliedState.FORMAT_VERSION,
+                "CLUSTER_SNAPSHOT_VERSION": self._cluster_snapshot_version,
+                "TOPICS": self._topics,
+                "ACL_PRINCIPALS": self._acl_principals
+            }, state_file, separators=(",", ":"), sort_keys=True)
+        os.replace(temp_file_path, self._file_path)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @property
+    def acl_principals(self):
+        """
+        :return: The principals whose ACLs were applied by the last successful rights management
+        :rtype: set[str]
+        """
+        return set(self._acl_principals)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def update_acl_principals(self, principals):
+        """
+        Record the principals whose ACLs were applied successfully
+        :param principals: The principals
+        :type principals: set[str]
+        """
+        self._acl_principals = sorted(principals)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def is_up_to_date(self, config_topics, running_topics):
+        """
+        Check if neither the configuration nor the cluster changed since the last reconciliation
+        :param config_topics: The topics as declared in the configuration file
+        :type config_topics: list[Topic]
+        :param running_topics: The topics currently running in kafka by topic name
+        :type running_topics: dict[str, Topic]
+        :rtype: bool
+        """
+        return LastAppliedState.cluster_snapshot_version(running_topics) == self._cluster_snapshot_version and \
+            len(self.changed_topics(config_topics, running_topics)) == 0
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def changed_topics(self, config_topics, running_topics):
+        """
+        Get the configured topics whose desired or observed fingerprint changed since the last reconciliation
+        :param config_topics: The topics as declared in the configuration file
+        :type config_topics: list[Topic]
+        :param running_topics: The topics currently running in kafka by topic name
+        :type running_topics: dict[str, Topic]
+        :return: The configured topics to be reconciled, in the configuration order
+        :rtype: list[Topic]
+        """
+        changed_topics = []
+        for config_topic in config_topics:
+            fingerprints = self._topics.get(config_topic.name)
+            running_topic = running_topics.get(config_topic.name)
+            if fingerprints is None or running_topic is None or \
+                    fingerprints[0] != LastAppliedState.topic_fingerprint(config_topic) or \
+                    fingerprints[1] != LastAppliedState.topic_fingerprint(running_topic):
+                changed_topics.append(config_topic)
+        return changed_topics
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def update(self, config_topics, running_topics, topic_errors):
+        """
+        Record the fingerprints of the topics reconciled successfully
+        :param config_topics: The topics as declared in the configuration file
+        :type config_topics: list[Topic]
+        :param running_topics: The topics running in kafka after the reconciliation by topic name
+        :type running_topics: dict[str, Topic]
+        :param topic_errors: For each reconciled topic, None if it succeeded, the raised exception otherwise
+        :type topic_errors: dict[str, Exception]
+        """
+        self._topics = {}
+        for config_topic in config_topics:
+            running_topic = running_topics.get(config_topic.name)
+
+            # A topic not matching its configuration is not recorded so that the next run tries again
+            if running_topic is not None and topic_errors.get(config_topic.name) is None and \
+                    running_topic.replication_factor == config_topic.replication_factor and \
+                    running_topic.partition_number == config_topic.partition_number and \
+                    (config_topic.configs is None or running_topic.configs == config_topic.configs):
+                self._topics[config_topic.name] = [LastAppliedState.topic_fingerprint(config_topic),
+                                                   LastAppliedState.topic_fingerprint(running_topic)]
+
+        self._cluster_snapshot_version = LastAppliedState.cluster_snapshot_version(running_topics)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def topic_fingerprint(topic):
+        """
+        Compute a compact fingerprint of the reconciled properties of a topic
+        :param topic: The topic
+        :type topic: Topic
+        :rtype: str
+        """
+        content = json.dumps([topic.name, topic.replication_factor, topic.partition_number, topic.configs],
+                             separators=(",", ":"), sort_keys=True)
+        return hashlib.sha1(content.encode("utf-8")).hexdigest()[:16]
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def cluster_snapshot_version(running_topics):
+        """
+        Compute a version of the cluster snapshot which only changes when a topic fingerprint changes
+        :param running_topics: The topics running in kafka by topic name
+        :type running_topics: dict[str, Topic]
+        :rtype: str
+        """
+        cluster_hash = hashlib.sha1()
+        for topic_name in sorted(running_topics.keys()):
+            cluster_hash.update(LastAppliedState.topic_fingerprint(running_topics[topic_name]).encode("utf-8"))
+        return cluster_hash.hexdigest()[:16]
@@ -0,0 +1,336 @@
+import os
+import math
+import time
+import struct
+import logging
+import threading
+from common.KafkaIotException import KafkaIotException
+from common.IotProducer import IotProducer
+from common.Metrics import METRICS
+
+try:
+    from confluent_kafka import Consumer, TopicPartition, OFFSET_END
+except ImportError:  # confluent-kafka is optional, the latency probe can't run when it is not installed
+    Consumer = None
+
+logger = logging.getLogger(__name__)
+
+PROBE_LATENCY_SECONDS = METRICS.gauge("kafka_iot_probe_latency_seconds",
+                                      "End to end latency of the probes over the last report interval by partition "
+                                      "or leader broker and quantile")
+PROBE_BROKER_DEGRADED = METRICS.gauge("kafka_iot_probe_broker_degraded",
+                                      "1 if the probes led by a broker are slow or lost, 0 otherwise")
+PROBE_SENT = METRICS.counter("kafka_iot_probe_sent_total", "Probes sent by partition")
+PROBE_RECEIVED = METRICS.counter("kafka_iot_probe_received_total", "Probes received back by partition")
+
+REPORTED_QUANTILES = (0.5, 0.99)
+
+# Probe payload: id of the probing process and send time
+_PROBE_FORMAT = struct.Struct(">8sd")
+
+
+class LatencyHistogram(object):
+    """Latency distribution in log scaled buckets: a fixed number of counters whatever the number of samples, each
+    quantile being given within the bucket precision"""
+
+    MIN_LATENCY = 0.0001
+    MAX_LATENCY = 60.0
+    PRECISION = 0.05  # Relative width of a bucket
+
+    _LOG_GROWTH = math.log(1 + PRECISION)
+    BUCKET_COUNT = int(math.log(MAX_LATENCY / MIN_LATENCY) / _LOG_GROWTH) + 2
+
+    __slots__ = ("counts", "count", "max")
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self):
+        self.counts = [0] * LatencyHistogram.BUCKET_COUNT
+        self.count = 0
+        self.max = 0.0
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def record(self, latency):
+        """
+        :param latency: A latency in seconds, clamped into [MIN_LATENCY, MAX_LATENCY]
+        :type latency: float
+        """
+        if latency <= LatencyHistogram.MIN_LATENCY:
+            bucket_index = 0
+        else:
+            bucket_index = min(LatencyHistogram.BUCKET_COUNT - 1, 1 + int(
+                math.log(latency / LatencyHistogram.MIN_LATENCY) / LatencyHistogram._LOG_GROWTH))
+        self.counts[bucket_index] += 1
+        self.count += 1
+        if latency > self.max:
+            self.max = latency
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def quantile(self, quantile):
+        """
+        :param quantile: The quantile, between 0 and 1
+        :type quantile: float
+        :return: The upper bound of the bucket holding the quantile, capped by the max. None without any sample
+        :rtype: float
+        """
+        if self.count == 0:
+            return None
+        rank = max(1, int(math.ceil(quantile * self.count)))
+        cumulated_count = 0
+        for bucket_index, bucket_count in enumerate(self.counts):
+            cumulated_count += bucket_count
+            if cumulated_count >= rank:
+                return min(self.max, LatencyHistogram.MIN_LATENCY * (1 + LatencyHistogram.PRECISION) ** bucket_index)
+        return self.max
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def reset(self):
+        for bucket_index in range(LatencyHistogram.BUCKET_COUNT):
+            self.counts[bucket_index] = 0
+        self.count = 0
+        self.max = 0.0
+
+
+class LatencyProbe(object):
+    """Send timestamped probes to every partition of the ping topic and consume them back. The latency of each probe
+    is recorded in the histogram of its partition and in the one of the partition leader, and the histograms are
+    reported then reset on every report interval. A broker is degraded when its p99 exceeds the median p99 of the
+    brokers by the degraded factor, or when none of the probes it leads came back"""
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, group_id, rights_matrix, broker_list, topic_name, rate, report_interval, degraded_factor,
+                 min_samples, consumer_class=None, producer_class=None):
+        """
+        Latency probe constructor
+        :param group_id: The group id the probes are produced and consumed as, it must read and write the topic
+        :type group_id: GroupId
+        :param rights_matrix: The compiled rights, the group id being declared in it
+        :type rights_matrix: RightsMatrix
+        :param broker_list: Kafka brokers used to bootstrap the connections
+        :type broker_list: list[KafkaBroker]
+        :param topic_name: The probed topic
+        :type topic_name: str
+        :param rate: Number of probes per second sent to every partition
+        :type rate: float
+        :param report_interval: Time in seconds between two latency reports
+        :type report_interval: float
+        :param degraded_factor: Ratio of a broker p99 over the median p99 of the brokers above which it is degraded
+        :type degraded_factor: float
+        :param min_samples: Number of probes a histogram needs over a report interval to be compared
+        :type min_samples: int
+        :param consumer_class: Class the consumer is built with, confluent_kafka.Consumer if None
+        :type consumer_class: type
+        :param producer_class: Class the producer is built with, confluent_kafka.Producer if None
+        :type producer_class: type
+        """
+        if consumer_class is None:
+            if Consumer is None:
+                raise KafkaIotException("confluent-kafka is not installed, the latency probe can't be run")
+            consumer_class = Consumer
+
+        self._topic_name = topic_name
+        self._send_interval = 1.0 / rate
+        self._report_interval = report_interval
+        self._degraded_factor = degraded_factor
+        self._min_samples = min_samples
+        self._probe_id = os.urandom(8)  # Filters out the probes of other launchers
+
+        # Probes are sent on their own, without waiting for a batch
+        self._producer = IotProducer(group_id, rights_matrix, broker_list, linger_ms=0, compression="none",
+                                     statistics_interval_ms=0, producer_class=producer_class)
+        self._consumer = consumer_class({
+            "bootstrap.servers": ",".join("%s:%d" % (broker.host, broker.port) for broker in broker_list),
+            "group.id": group_id.name,
+            "client.id": "%s-latency-probe" % group_id.name,
+            "enable.auto.commit": False
+        })
+
+        self._leaders = {}  # Leader broker id by partition
+        self._partition_histograms = {}  # LatencyHistogram by partition
+        self._leader_histograms = {}  # LatencyHistogram by broker id
+        self._sent_counts = {}  # Probes sent over the report interval by broker id
+        self._degraded_brokers = set()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def start(self):
+        """
+        Probe from a background thread
+        """
+        if self._thread is None:
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self.run, name="latency-probe", daemon=True)
+            self._thread.start()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def join(self):
+        """
+        Wait until the probing is stopped, the wait is interruptible
+        """
+        while self._thread is not None and self._thread.is_alive():
+            self._thread.join(self._report_interval)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def stop(self):
+        """
+        Stop probing and close the connections
+        """
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self._producer.flush(self._send_interval)
+        self._consumer.close()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def run(self, report_count=None):
+        """
+        Probe until stopped
+        :param report_count: Number of reports before returning, endless if None
+        :type report_count: int
+        """
+        logger.info("Probing topic %s latency %s time(s) per second and partition...", self._topic_name,
+                    1.0 / self._send_interval)
+        self._refresh_leaders()
+        next_send_time = time.time()
+        next_report_time = next_send_time + self._report_interval
+        report_index = 0
+        while not self._stop_event.is_set() and (report_count is None or report_index < report_count):
+            now = time.time()
+            try:
+                # Scheduled before running, so that a failure is not retried in a tight loop
+                if now >= next_send_time:
+                    next_send_time = max(next_send_time + self._send_interval, now)
+                    self._send_probes()
+                if now >= next_report_time:
+                    report_index += 1
+                    next_report_time = now + self._report_interval
+                    self.report()
+                    self._refresh_leaders()
+                self._receive_probes(max(0.0, min(next_send_time, next_report_time) - time.time()))
+            except Exception as e:  # The probe must keep running whatever happens to a probe or to the cluster
+                logger.exception("Latency probe failed: %s", e)
+                self._stop_event.wait(self._send_interval)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def report(self):
+        """
+        Publish the latency quantiles of the report interval, flag the degraded brokers and reset the histograms
+        :return: The degraded brokers
+        :rtype: set[int]
+        """
+        for partition, histogram in sorted(self._partition_histograms.items()):
+            self._publish(histogram, partition=partition)
+        for broker_id, histogram in sorted(self._leader_histograms.items()):
+            self._publish(histogram, broker=broker_id)
+            logger.info("Broker %d probe latency: p50 %s, p99 %s, max %s over %d probe(s)", broker_id,
+                        *[LatencyProbe._format_latency(latency) for latency in
+                          (histogram.quantile(0.5), histogram.quantile(0.99), histogram.max or None)],
+                        histogram.count)
+
+        degraded_brokers = self._get_degraded_brokers()
+        for broker_id in sorted(degraded_brokers - self._degraded_brokers):
+            logger.warning("Broker %d is degraded: p99 %s over %d probe(s) out of %d sent", broker_id,
+                           LatencyProbe._format_latency(self._leader_histograms[broker_id].quantile(0.99)),
+                           self._leader_histograms[broker_id].count, self._sent_counts.get(broker_id, 0))
+        for broker_id in sorted(self._degraded_brokers - degraded_brokers):
+            logger.info("Broker %d is not degraded anymore", broker_id)
+        for broker_id in self._leader_histograms:
+            PROBE_BROKER_DEGRADED.set(1 if broker_id in degraded_brokers else 0, broker=broker_id)
+        self._degraded_brokers = degraded_brokers
+
+        for histogram in list(self._partition_histograms.values()) + list(self._leader_histograms.values()):
+            histogram.reset()
+        self._sent_counts = {}
+        return degraded_brokers
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _refresh_leaders(self):
+        """
+        Fetch the partition leaders of the topic, the consumer being assigned to the new partitions from their end
+        """
+        try:
+            topic_metadata = self._consumer.list_topics(self._topic_name, timeout=self._report_interval) \
+                .topics[self._topic_name]
+        except Exception as e:  # The probes go on with the leaders fetched before
+            logger.error("Partition leaders of topic %s can't be fetched: %s", self._topic_name, e)
+            return
+        if topic_metadata.error is not None:
+            logger.error("Topic %s can't be probed: %s", self._topic_name, topic_metadata.error)
+            return
+
+        leaders = dict((partition, partition_metadata.leader)
+                       for partition, partition_metadata in topic_metadata.partitions.items())
+        if set(leaders) != set(self._leaders):
+            self._consumer.assign([TopicPartition(self._topic_name, partition, OFFSET_END)
+                                   for partition in sorted(leaders)])
+        self._leaders = leaders
+        for partition, broker_id in leaders.items():
+            self._partition_histograms.setdefault(partition, LatencyHistogram())
+            self._leader_histograms.setdefault(broker_id, LatencyHistogram())
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _send_probes(self):
+        for partition, broker_id in self._leaders.items():
+            self._producer.produce(self._topic_name, None, _PROBE_FORMAT.pack(self._probe_id, time.time()),
+                                   partition=partition)
+            self._sent_counts[broker_id] = self._sent_counts.get(broker_id, 0) + 1
+            PROBE_SENT.inc(partition=partition)
+        self._producer.poll()
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _receive_probes(self, timeout):
+        """
+        Record the latency of the probes consumed back within the timeout
+        :param timeout: Maximum time in seconds to wait for probes
+        :type timeout: float
+        """
+        for message in self._consumer.consume(num_messages=max(1, len(self._leaders)), timeout=timeout):
+            value = message.value()
+            if message.error() is not None or value is None or len(value) != _PROBE_FORMAT.size:
+                continue
+            probe_id, send_time = _PROBE_FORMAT.unpack(value)
+            if probe_id != self._probe_id:
+                continue
+
+            latency = time.time() - send_time
+            partition = message.partition()
+            PROBE_RECEIVED.inc(partition=partition)
+            if partition in self._partition_histograms:
+                self._partition_histograms[partition].record(latency)
+            broker_id = self._leaders.get(partition)
+            if broker_id is not None:
+                self._leader_histograms[broker_id].record(latency)
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _get_degraded_brokers(self):
+        """
+        :return: The brokers whose probes were all lost, or whose p99 exceeds the median p99 by the degraded factor
+        :rtype: set[int]
+        """
+        degraded_brokers = set(broker_id for broker_id, sent_count in self._sent_counts.items()
+                               if sent_count >= self._min_samples and self._leader_histograms[broker_id].count == 0)
+
+        p99_by_broker = dict((broker_id, histogram.quantile(0.99)) for broker_id, histogram
+                             in self._leader_histograms.items() if histogram.count >= self._min_samples)
+        if len(p99_by_broker) >= 2:
+            sorted_p99 = sorted(p99_by_broker.values())
+            median_p99 = sorted_p99[len(sorted_p99) // 2] if len(sorted_p99) % 2 == 1 else \
+                (sorted_p99[len(sorted_p99) // 2 - 1] + sorted_p99[len(sorted_p99) // 2]) / 2
+            degraded_brokers.update(broker_id for broker_id, p99 in p99_by_broker.items()
+                                    if p99 > median_p99 * self._degraded_factor)
+        return degraded_brokers
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    @staticmethod
+    def _publish(histogram, **labels):
+        if histogram.count == 0:
+            return
+        for quantile in REPORTED_QUANTILES:
+            PROBE_LATENCY_SECONDS.set(histogram.quantile(quantile), quantile=quantile, **labels)
+        PROBE_LATENCY_SECONDS.set(histogram.max, quantile="max", **labels)
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    @staticmethod
+    def _format_latency(latency):
+        return "-" if latency is None else "%.1fms" % (latency * 1000)
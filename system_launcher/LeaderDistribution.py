@@ -0,0 +1,100 @@
+import json
+import collections
+
+
+class LeaderDistribution(object):
+    """Current and preferred partition leaders by broker. The preferred leader of a partition is its first replica.
+    The imbalance ratio of a broker is the share of the partitions it should lead that are led by another broker"""
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, running_topics, broker_id_list):
+        """
+        Leader distribution constructor
+        :param running_topics: The topics running in kafka
+        :type running_topics: list[Topic]
+        :param broker_id_list: The id of the available kafka brokers
+        :type broker_id_list: list[int]
+        """
+        self.leader_counts = collections.OrderedDict((broker_id, 0) for broker_id in sorted(broker_id_list))
+        self.preferred_leader_counts = collections.OrderedDict((broker_id, 0) for broker_id in sorted(broker_id_list))
+        self._preferred_led_counts = collections.defaultdict(int)  # Partitions led by their preferred leader
+        self._electable_partitions = collections.defaultdict(list)  # Misled partitions by preferred leader
+
+        for topic in running_topics:
+            for topic_config in topic.config:
+                if topic_config.leader in self.leader_counts:
+                    self.leader_counts[topic_config.leader] += 1
+                if len(topic_config.replicas) == 0 or topic_config.replicas[0] not in self.preferred_leader_counts:
+                    continue
+
+                preferred_leader = topic_config.replicas[0]
+                self.preferred_leader_counts[preferred_leader] += 1
+
+                # An election can only move the leadership to an in sync preferred leader
+                if topic_config.leader == preferred_leader:
+                    self._preferred_led_counts[preferred_leader] += 1
+                elif preferred_leader in topic_config.isr:
+                    self._electable_partitions[preferred_leader].append((topic.name, topic_config.partition))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def imbalance_ratio(self, broker_id):
+        """
+        :param broker_id: The broker id
+        :type broker_id: int
+        :return: The share of the partitions preferring the broker as leader which are led by another broker
+        :rtype: float
+        """
+        preferred_leader_count = self.preferred_leader_counts[broker_id]
+        if preferred_leader_count == 0:
+            return 0.0
+        return 1.0 - float(self._preferred_led_counts[broker_id]) / preferred_leader_count
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def max_imbalance_ratio(self):
+        """
+        :return: The highest broker imbalance ratio, 0 if there is no broker
+        :rtype: float
+        """
+        return max([self.imbalance_ratio(broker_id) for broker_id in self.leader_counts] + [0.0])
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def skewed_broker_ids(self, imbalance_threshold):
+        """
+        :param imbalance_threshold: The imbalance ratio above which a broker is skewed
+        :type imbalance_threshold: float
+        :return: The id of the brokers whose imbalance ratio exceeds the threshold
+        :rtype: list[int]
+        """
+        return [broker_id for broker_id in self.leader_counts
+                if self.imbalance_ratio(broker_id) > imbalance_threshold]
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def skewed_partitions(self, imbalance_threshold):
+        """
+        Get the partitions whose leadership can be moved back to a skewed broker
+        :param imbalance_threshold: The imbalance ratio above which a broker is skewed
+        :type imbalance_threshold: float
+        :return: The (topic name, partition) couples, sorted
+        :rtype: list[(str, int)]
+        """
+        return sorted(partition_key for broker_id in self.skewed_broker_ids(imbalance_threshold)
+                      for partition_key in self._electable_partitions[broker_id])
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def to_election_json(partition_keys):
+        """
+        :param partition_keys: The (topic name, partition) couples
+        :type partition_keys: list[(str, int)]
+        :return: The partitions in the kafka-preferred-replica-election.sh json format
+        :rtype: str
+        """
+        return json.dumps({"partitions": [{"topic": topic_name, "partition": partition}
+                                          for topic_name, partition in partition_keys]})
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __str__(self):
+        return "{%s}" % ", ".join("broker %d: %d leader(s) for %d preferred, imbalance %.2f"
+                                  % (broker_id, self.leader_counts[broker_id], self.preferred_leader_counts[broker_id],
+                                     self.imbalance_ratio(broker_id))
+                                  for broker_id in self.leader_counts)
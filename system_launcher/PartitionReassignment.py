@@ -0,0 +1,85 @@
+import re
+import json
+import collections
+
+
+class PartitionReassignment(object):
+    """Target replicas of a set of topic partitions, as handled by kafka-reassign-partitions.sh"""
+
+    COMPLETED = "COMPLETED"
+    IN_PROGRESS = "IN_PROGRESS"
+    FAILED = "FAILED"
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, assignment=None):
+        """
+        Partition reassignment constructor
+        :param assignment: Target replicas by (topic name, partition) couple, the first replica is the preferred leader
+        :type assignment: dict[(str, int), list[int]]
+        """
+        self.assignment = collections.OrderedDict() if assignment is None else collections.OrderedDict(assignment)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def add_topic(self, topic_name, replica_assignment):
+        """
+        Add the partitions of a topic to the reassignment
+        :param topic_name: The topic name
+        :type topic_name: str
+        :param replica_assignment: The target replicas by partition, the preferred leader first
+        :type replica_assignment: dict[int, list[int]]
+        """
+        for partition, replicas in replica_assignment.items():
+            self.assignment[(topic_name, partition)] = list(replicas)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def topic_names(self):
+        """
+        :return: The name of the topics with at least one reassigned partition
+        :rtype: list[str]
+        """
+        return list(collections.OrderedDict((topic_name, None) for topic_name, _ in self.assignment.keys()).keys())
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def is_empty(self):
+        return len(self.assignment) == 0
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def to_json(self):
+        """
+        :return: The reassignment in the kafka-reassign-partitions.sh json format
+        :rtype: str
+        """
+        return json.dumps({
+            "version": 1,
+            "partitions": [{"topic": topic_name, "partition": partition, "replicas": replicas}
+                           for (topic_name, partition), replicas in self.assignment.items()]
+        })
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def parse_verify_output(output_lines):
+        """
+        Parse the output of kafka-reassign-partitions.sh --verify
+        :param output_lines: The output lines of the script
+        :type output_lines: list[str]
+        :return: The reassignment status (COMPLETED, IN_PROGRESS or FAILED) by (topic name, partition) couple
+        :rtype: dict[(str, int), str]
+        """
+        statuses = {}
+        for line in output_lines:
+            matches = re.search(r"Reassignment of partition\s+(\S+)-(\d+)\s+(.*)", line)
+            if matches is not None:
+                status_message = matches.groups()[2]
+                if "progress" in status_message:
+                    status = PartitionReassignment.IN_PROGRESS
+                elif "fail" in status_message:
+                    status = PartitionReassignment.FAILED
+                else:
+                    status = PartitionReassignment.COMPLETED
+                statuses[(matches.groups()[0], int(matches.groups()[1]))] = status
+        return statuses
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __str__(self):
+        return "{%s}" % ", ".join("%s-%d: [%s]" % (topic_name, partition, ", ".join(str(rep) for rep in replicas))
+                                  for (topic_name, partition), replicas in self.assignment.items())
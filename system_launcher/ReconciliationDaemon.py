@@ -0,0 +1,250 @@
+import os
+import time
+import logging
+from common.KafkaIotException import KafkaIotException
+from common.LoggingConfig import set_log_levels
+from common.Metrics import METRICS
+from system_launcher.LastAppliedState import LastAppliedState
+
+logger = logging.getLogger(__name__)
+
+TOPICS = "TOPICS"
+RIGHTS = "RIGHTS"
+APPS = "APPS"
+
+# Config values each reconciliation phase depends on, in the order the phases are run
+PHASE_CONFIG_PATHS = [
+    (TOPICS, ("KAFKA.TOPIC_LIST", "KAFKA.REASSIGNMENT", "KAFKA.LEADER_BALANCE")),
+    (RIGHTS, ("KAFKA.TOPIC_LIST", "KAFKA.KAFKA_RIGHTS_INHERITANCE", "KAFKA.GROUP_ID_LIST", "KAFKA.ACL", "APP_LIST")),
+    (APPS, ("KAFKA.GROUP_ID_LIST", "APP_LIST"))
+]
+# Config values applied without running any phase, the other ones are only applied on restart
+LOG_CONFIG_PATHS = ("LOG_LEVEL", "LOGGER_LEVELS")
+
+DAEMON_TRIGGERS = METRICS.counter("kafka_iot_daemon_triggers_total",
+                                  "Reconciliation phases run by the daemon by phase and trigger")
+
+
+class ReconciliationDaemon(object):
+    """Keep the kafka driver and its cluster metadata snapshot warm between reconciliations. The config file and the
+    cluster are watched on their own interval, a burst of config file writes is coalesced into a single reload once
+    the file is stable, and only the phases depending on what changed are run"""
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, sys_conf, config_schema, kafka, phases, config_interval, cluster_interval, debounce,
+                 replication_monitor=None):
+        """
+        Reconciliation daemon constructor
+        :param sys_conf: The system config, only watched if it was loaded from a file
+        :type sys_conf: SystemConfig
+        :param config_schema: The schema a reloaded config must match to be applied
+        :type config_schema: ConfigSchema
+        :param kafka: The kafka driver
+        :type kafka: KafkaDriver
+        :param phases: The function running each phase: TOPICS, RIGHTS and optionally APPS, called without argument
+        :type phases: dict[str, function]
+        :param config_interval: Time in seconds between two config file checks
+        :type config_interval: float
+        :param cluster_interval: Time in seconds between two cluster checks
+        :type cluster_interval: float
+        :param debounce: Time in seconds the config file must stay unchanged before being reloaded
+        :type debounce: float
+        :param replication_monitor: Fed with every cluster check to report the replication changes, if set
+        :type replication_monitor: ReplicationMonitor
+        """
+        self._sys_conf = sys_conf
+        self._config_schema = config_schema
+        self._kafka = kafka
+        self._phases = phases
+        self._config_interval = config_interval
+        self._cluster_interval = cluster_interval
+        self._debounce = debounce
+        self._replication_monitor = replication_monitor
+
+        self._pending_signature = None  # (modification time, size) of the changed config file waiting to be stable
+        self._pending_since = None
+        self._rejected_signature = None  # Signature of the last config file which failed to be checked
+        self._failed_phases = set()  # Phases run again on the next cluster check
+        self._cluster_snapshot_version = None
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def run(self, tick_count=None):
+        """
+        Watch the config file and the cluster, the initial reconciliation being already done
+        :param tick_count: Number of config file checks before returning, endless if None
+        :type tick_count: int
+        """
+        if self._sys_conf.file_path is None:
+            logger.info("The system config is not loaded from a file, only the cluster is watched")
+        logger.info("Watching the config file every %s second(s) and the cluster every %s second(s)...",
+                    self._config_interval, self._cluster_interval)
+
+        self._cluster_snapshot_version = LastAppliedState.cluster_snapshot_version(self._kafka.describe_all_topics())
+        next_cluster_check = time.time() + self._cluster_interval
+        tick_index = 0
+        while tick_count is None or tick_index < tick_count:
+            start_time = time.time()
+            triggered_phases = self.check_config(start_time)
+            if start_time >= next_cluster_check:
+                triggered_phases.update(self.check_cluster())
+                next_cluster_check = start_time + self._cluster_interval
+            if len(triggered_phases) > 0:
+                self.run_phases(triggered_phases)
+
+            tick_index += 1
+            if tick_count is None or tick_index < tick_count:
+                time.sleep(max(0.0, self._config_interval - (time.time() - start_time)))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def check_config(self, now):
+        """
+        Reload the config file once it has been stable for the debounce time
+        :param now: The current time
+        :type now: float
+        :return: The phases affected by the config change
+        :rtype: set[str]
+        """
+        file_path = self._sys_conf.file_path
+        try:
+            if file_path is None or not self._sys_conf.has_changed():
+                self._pending_signature = None
+                return set()
+            file_stat = os.stat(file_path)
+        except (KafkaIotException, OSError):  # Missing while being replaced, checked again on the next tick
+            return set()
+
+        signature = (file_stat.st_mtime_ns, file_stat.st_size)
+        if signature == self._rejected_signature:
+            return set()
+        if signature != self._pending_signature:
+            self._pending_signature = signature
+            self._pending_since = now
+            return set()
+        if now - self._pending_since < self._debounce:
+            return set()
+
+        self._pending_signature = None
+        previous_content = self._sys_conf.get()
+        try:
+            changed_sections = self._sys_conf.reload(self._config_schema.check)
+        except KafkaIotException as e:
+            self._rejected_signature = signature
+            logger.error("Config file change rejected, the current config is kept: %s", e)
+            return set()
+
+        self._rejected_signature = None
+        changed_paths = ReconciliationDaemon._get_changed_paths(previous_content, self._sys_conf.get(),
+                                                                changed_sections)
+        logger.info("Config file reloaded, changed: [%s]", ", ".join(changed_paths))
+        return self._apply_config_changes(previous_content, changed_paths)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def check_cluster(self):
+        """
+        Fetch the cluster metadata and detect the topics altered outside of the launcher
+        :return: The phases to be run: the topic reconciliation if the cluster drifted, along with the phases which
+        failed before
+        :rtype: set[str]
+        """
+        triggered_phases = set(self._failed_phases)
+        for phase in triggered_phases:
+            DAEMON_TRIGGERS.inc(phase=phase, trigger="retry")
+
+        try:
+            running_topics = self._kafka.describe_all_topics(force_refresh=True)
+        except KafkaIotException as e:
+            logger.error("Cluster check failed: %s", e)
+            return triggered_phases
+
+        if self._replication_monitor is not None:
+            self._replication_monitor.poll(running_topics)
+
+        cluster_snapshot_version = LastAppliedState.cluster_snapshot_version(running_topics)
+        if cluster_snapshot_version != self._cluster_snapshot_version:
+            logger.info("Topics changed on the cluster since the last reconciliation")
+            triggered_phases.add(TOPICS)
+            DAEMON_TRIGGERS.inc(phase=TOPICS, trigger="cluster")
+        return triggered_phases
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def run_phases(self, triggered_phases):
+        """
+        Run the triggered phases in order. A failed phase is logged and run again on the next cluster check
+        :param triggered_phases: The phases to be run
+        :type triggered_phases: set[str]
+        """
+        for phase, _ in PHASE_CONFIG_PATHS:
+            if phase not in triggered_phases or phase not in self._phases:
+                continue
+            try:
+                self._phases[phase]()
+                self._failed_phases.discard(phase)
+            except KafkaIotException as e:
+                self._failed_phases.add(phase)
+                logger.error("%s phase failed, it will be run again on the next cluster check: %s", phase, e)
+
+        # Served from the cluster metadata snapshot, only the topics altered by the phases are fetched again
+        self._cluster_snapshot_version = LastAppliedState.cluster_snapshot_version(self._kafka.describe_all_topics())
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _apply_config_changes(self, previous_content, changed_paths):
+        """
+        Apply the log levels and get the phases depending on the changed config values
+        :param previous_content: The config content before the reload
+        :type previous_content: dict
+        :param changed_paths: The changed config values
+        :type changed_paths: list[str]
+        :return: The phases to be run
+        :rtype: set[str]
+        """
+        triggered_phases = set()
+        for changed_path in changed_paths:
+            path_phases = [phase for phase, config_paths in PHASE_CONFIG_PATHS
+                           if any(ReconciliationDaemon._is_related(changed_path, config_path)
+                                  for config_path in config_paths)]
+            triggered_phases.update(path_phases)
+            if len(path_phases) == 0 and changed_path not in LOG_CONFIG_PATHS:
+                logger.warning("Config value %s changed, it is only applied on restart", changed_path)
+
+        if any(changed_path in LOG_CONFIG_PATHS for changed_path in changed_paths):
+            set_log_levels(self._sys_conf.get("LOG_LEVEL"), self._sys_conf.get("LOGGER_LEVELS"),
+                           previous_content.get("LOGGER_LEVELS"))
+
+        for phase in triggered_phases:
+            DAEMON_TRIGGERS.inc(phase=phase, trigger="config")
+        return triggered_phases
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    @staticmethod
+    def _get_changed_paths(previous_content, content, changed_sections):
+        """
+        :param previous_content: The config content before the reload
+        :type previous_content: dict
+        :param content: The config content after the reload
+        :type content: dict
+        :param changed_sections: The changed top level sections
+        :type changed_sections: list[str]
+        :return: The changed config values, down to the second level of the sections which are dicts on both sides,
+        e.g. KAFKA.TOPIC_LIST
+        :rtype: list[str]
+        """
+        changed_paths = []
+        for section in changed_sections:
+            previous_value = previous_content.get(section)
+            value = content.get(section)
+            if isinstance(previous_value, dict) and isinstance(value, dict):
+                changed_paths += ["%s.%s" % (section, key) for key in sorted(set(previous_value) | set(value))
+                                  if previous_value.get(key) != value.get(key)]
+            else:
+                changed_paths.append(section)
+        return changed_paths
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    @staticmethod
+    def _is_related(changed_path, config_path):
+        """
+        :return: True if one of the paths is the other one or contains it
+        :rtype: bool
+        """
+        return changed_path == config_path or changed_path.startswith(config_path + ".") or \
+            config_path.startswith(changed_path + ".")
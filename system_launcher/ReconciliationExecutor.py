@@ -0,0 +1,544 @@
+import time
+import asyncio
+import logging
+import collections
+from common.KafkaIotException import KafkaIotException
+from system_launcher.ReconciliationPlanner import TopicAction
+from system_launcher.PartitionReassignment import PartitionReassignment
+from system_launcher.ReplicaPlacementPlanner import ReplicaPlacementPlanner
+from system_launcher.LeaderDistribution import LeaderDistribution
+from common.entities.kafka.Topic import Topic
+from common.entities.kafka.TopicConfig import TopicConfig
+from system_launcher.Utils import LAUNCHER_PHASE_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+class ReconciliationExecutor(object):
+    """Run a reconciliation plan with batched kafka driver operations"""
+
+    DEFAULT_REASSIGNMENT_POLL_INTERVAL = 10
+    DEFAULT_DELETION_POLL_INTERVAL = 1
+    DEFAULT_DELETION_TIMEOUT = 60
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, kafka, broker_id_list, reassignment_throttle=None,
+                 reassignment_poll_interval=DEFAULT_REASSIGNMENT_POLL_INTERVAL, reassignment_timeout=None,
+                 deletion_poll_interval=DEFAULT_DELETION_POLL_INTERVAL, deletion_timeout=DEFAULT_DELETION_TIMEOUT):
+        """
+        Reconciliation executor constructor
+        :param kafka: The kafka driver
+        :type kafka: KafkaDriver
+        :param broker_id_list: The id of the available kafka brokers, new replicas are placed on them
+        :type broker_id_list: list[int]
+        :param reassignment_throttle: Replication throughput limit in bytes per second while replicas are moved
+        :type reassignment_throttle: int
+        :param reassignment_poll_interval: Time in seconds between two partition reassignment progress checks
+        :type reassignment_poll_interval: float
+        :param reassignment_timeout: Time in seconds after which a partition reassignment is considered failed
+        :type reassignment_timeout: float
+        :param deletion_poll_interval: Time in seconds between two checks that the topics to be re-created are deleted
+        :type deletion_poll_interval: float
+        :param deletion_timeout: Time in seconds after which a topic to be re-created is considered not deleted
+        :type deletion_timeout: float
+        """
+        self._kafka = kafka
+        self._broker_id_list = broker_id_list
+        self._reassignment_throttle = reassignment_throttle
+        self._reassignment_poll_interval = reassignment_poll_interval
+        self._reassignment_timeout = reassignment_timeout
+        self._deletion_poll_interval = deletion_poll_interval
+        self._deletion_timeout = deletion_timeout
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def execute(self, actions):
+        """
+        Run every action of the plan, a failing topic doesn't prevent the other ones from being reconciled
+        :param actions: The reconciliation plan
+        :type actions: list[TopicAction]
+        :return: For each topic with an action other than NOOP, None if the action succeeded, the exception otherwise
+        :rtype: dict[str, Exception]
+        """
+        actions_by_type = collections.defaultdict(list)
+        for action in actions:
+            actions_by_type[action.action_type].append(action)
+
+        errors = collections.OrderedDict()
+
+        # Topics to be re-created are deleted first, then created along with the missing ones once kafka removed them
+        recreate_actions = actions_by_type[TopicAction.RECREATE]
+        with LAUNCHER_PHASE_SECONDS.time(phase="topic_creation"):
+            running_topics = self._kafka.describe_all_topics()
+            errors.update(self._kafka.delete_topics([action.topic_name for action in recreate_actions]))
+            errors.update(self._wait_for_deletion([action.topic_name for action in recreate_actions
+                                                   if errors[action.topic_name] is None]))
+
+            create_actions = actions_by_type[TopicAction.CREATE] + [action for action in recreate_actions
+                                                                    if errors[action.topic_name] is None]
+            errors.update(self._kafka.create_topics(self._place_topics(create_actions, running_topics)))
+
+        # Topics whose replication factor changes get their missing partitions before their replicas are moved
+        reassign_actions = actions_by_type[TopicAction.REASSIGN]
+        with LAUNCHER_PHASE_SECONDS.time(phase="topic_alteration"):
+            partition_actions = actions_by_type[TopicAction.ADD_PARTITIONS] + \
+                ReconciliationExecutor._get_partition_increases(reassign_actions)
+            errors.update(self._kafka.create_partitions(collections.OrderedDict(
+                (action.topic_name, action.config_topic.partition_number) for action in partition_actions)))
+
+            errors.update(self._reassign_replicas([action for action in reassign_actions
+                                                   if errors.get(action.topic_name) is None]))
+
+        for action in actions:
+            if action.topic_name in errors:
+                ReconciliationExecutor._log_action_result(action, errors[action.topic_name])
+
+        return errors
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @LAUNCHER_PHASE_SECONDS.time(phase="rebalance")
+    def rebalance(self, dry_run=False):
+        """
+        Move the replicas so that replicas and preferred leaders are evenly spread over the available brokers,
+        typically after a broker addition or removal
+        :param dry_run: Only compute the replica moves
+        :type dry_run: bool
+        :return: The partitions whose replicas changed
+        :rtype: PartitionReassignment
+        """
+        reassignment = ReplicaPlacementPlanner(self._broker_id_list,
+                                               self._kafka.describe_all_topics().values()).rebalance()
+        ReconciliationExecutor._log_rebalance(reassignment, dry_run)
+        if not dry_run and not reassignment.is_empty():
+            self._run_reassignment(reassignment)
+        return reassignment
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @LAUNCHER_PHASE_SECONDS.time(phase="leader_balance")
+    def balance_leaders(self, imbalance_threshold, batch_size, poll_interval, timeout=None, dry_run=False):
+        """
+        Elect the preferred leader of the partitions misled away from the brokers whose leader imbalance ratio exceeds
+        the threshold. The elections are run in batches, the leader distribution is logged before and after
+        :param imbalance_threshold: The broker imbalance ratio, between 0 and 1, above which elections are run
+        :type imbalance_threshold: float
+        :param batch_size: The maximum number of partitions per election
+        :type batch_size: int
+        :param poll_interval: Time in seconds between two attempts while another election is in progress
+        :type poll_interval: float
+        :param timeout: Time in seconds after which an election is given up, never if None
+        :type timeout: float
+        :param dry_run: Only log the leader distribution and the partitions to be elected
+        :type dry_run: bool
+        :return: The leader distribution once the elections are done
+        :rtype: LeaderDistribution
+        """
+        distribution = LeaderDistribution(self._kafka.describe_all_topics().values(), self._broker_id_list)
+        skewed_partitions = distribution.skewed_partitions(imbalance_threshold)
+        if not ReconciliationExecutor._log_leader_skew(distribution, imbalance_threshold, skewed_partitions, dry_run):
+            return distribution
+
+        for batch_start in range(0, len(skewed_partitions), batch_size):
+            self._kafka.elect_preferred_leaders(skewed_partitions[batch_start:batch_start + batch_size],
+                                                poll_interval, timeout)
+
+        distribution = LeaderDistribution(self._kafka.describe_all_topics().values(), self._broker_id_list)
+        logger.info("Leader distribution after preferred replica election: %s", distribution)
+        return distribution
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _wait_for_deletion(self, topic_names):
+        """
+        Poll the cluster metadata until the deleted topics are gone. Kafka deletes a topic asynchronously, creating it
+        again before would fail as the topic still exists
+        :param topic_names: The names of the topics whose deletion has been requested
+        :type topic_names: list[str]
+        :return: For each topic name, None if the topic is gone, an exception if it is still there after the timeout
+        :rtype: dict[str, Exception]
+        """
+        remaining_names = set(topic_names)
+        start_time = time.time()
+        while len(remaining_names) > 0:
+            remaining_names &= set(self._kafka.describe_all_topics(list(remaining_names), force_refresh=True))
+            if len(remaining_names) == 0 or time.time() - start_time >= self._deletion_timeout:
+                break
+            time.sleep(self._deletion_poll_interval)
+        return self._get_deletion_errors(topic_names, remaining_names)
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _get_deletion_errors(self, topic_names, remaining_names):
+        """
+        :return: For each topic name, None if the topic is gone, an exception if it is still among the remaining ones
+        :rtype: dict[str, Exception]
+        """
+        return collections.OrderedDict(
+            (topic_name, KafkaIotException("Topic %s still exists %s second(s) after its deletion"
+                                           % (topic_name, str(self._deletion_timeout)))
+             if topic_name in remaining_names else None) for topic_name in topic_names)
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _reassign_replicas(self, reassign_actions):
+        """
+        Move the replicas of every topic whose replication factor changes in a single partition reassignment
+        :param reassign_actions: The REASSIGN actions
+        :type reassign_actions: list[TopicAction]
+        :return: For each topic name, None if its replicas have been moved, the raised exception otherwise
+        :rtype: dict[str, Exception]
+        """
+        if len(reassign_actions) == 0:
+            return {}
+
+        try:
+            self._run_reassignment(self._build_reassignment(reassign_actions, self._kafka.describe_all_topics()))
+            error = None
+        except Exception as e:
+            error = e
+
+        return collections.OrderedDict((action.topic_name, error) for action in reassign_actions)
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _run_reassignment(self, reassignment):
+        """
+        Start a partition reassignment and wait for it to end
+        :param reassignment: The partition reassignment
+        :type reassignment: PartitionReassignment
+        """
+        self._kafka.reassign_partitions(reassignment, self._reassignment_throttle)
+        self._kafka.wait_for_reassignment(reassignment, self._reassignment_poll_interval, self._reassignment_timeout)
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _place_topics(self, create_actions, running_topics):
+        """
+        Compute the replicas of the topics to be (re-)created so that they go to the least loaded brokers
+        :param create_actions: The CREATE and RECREATE actions
+        :type create_actions: list[TopicAction]
+        :param running_topics: The topics running in kafka before the topics to be re-created are deleted
+        :type running_topics: dict[str, Topic]
+        :return: The topics to be created, with the replicas of each partition as config
+        :rtype: list[Topic]
+        """
+        if len(create_actions) == 0:
+            return []
+
+        created_topic_names = set(action.topic_name for action in create_actions)
+        planner = ReplicaPlacementPlanner(self._broker_id_list,
+                                          [topic for topic_name, topic in running_topics.items()
+                                           if topic_name not in created_topic_names])
+
+        placed_topics = []
+        for action in create_actions:
+            config_topic = action.config_topic
+            replica_assignment = planner.place_topic(config_topic.name, config_topic.replication_factor,
+                                                     config_topic.partition_number)
+            placed_topics.append(Topic(config_topic.name, config_topic.replication_factor,
+                                       config_topic.partition_number,
+                                       [TopicConfig(partition, replicas[0], replicas, [])
+                                        for partition, replicas in replica_assignment.items()],
+                                       config_topic.configs))
+        return placed_topics
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _build_reassignment(self, reassign_actions, running_topics):
+        """
+        Compute the target replicas of the topics whose replication factor changes
+        :param reassign_actions: The REASSIGN actions
+        :type reassign_actions: list[TopicAction]
+        :param running_topics: Every topic running in kafka once the missing partitions have been added
+        :type running_topics: dict[str, Topic]
+        :rtype: PartitionReassignment
+        """
+        planner = ReplicaPlacementPlanner(self._broker_id_list, running_topics.values())
+        reassignment = PartitionReassignment()
+        for action in reassign_actions:
+            reassignment.add_topic(action.topic_name, planner.change_replication_factor(
+                running_topics[action.topic_name], action.config_topic.replication_factor))
+        logger.debug("Partition reassignment: %s", reassignment)
+        return reassignment
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    @staticmethod
+    def _get_partition_increases(reassign_actions):
+        """
+        :param reassign_actions: The REASSIGN actions
+        :type reassign_actions: list[TopicAction]
+        :return: The REASSIGN actions also increasing the partition number of their topic
+        :rtype: list[TopicAction]
+        """
+        return [action for action in reassign_actions
+                if action.running_topic.partition_number < action.config_topic.partition_number]
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    @staticmethod
+    def _log_leader_skew(distribution, imbalance_threshold, skewed_partitions, dry_run):
+        """
+        Log the leader distribution and the partitions to be elected
+        :param distribution: The leader distribution
+        :type distribution: LeaderDistribution
+        :param imbalance_threshold: The broker imbalance ratio above which elections are run
+        :type imbalance_threshold: float
+        :param skewed_partitions: The partitions to be elected
+        :type skewed_partitions: list[(str, int)]
+        :param dry_run: True if the elections are not run
+        :type dry_run: bool
+        :return: True if the elections have to be run
+        :rtype: bool
+        """
+        logger.info("Leader distribution: %s", distribution)
+        if len(skewed_partitions) == 0:
+            logger.info("Leaders are balanced, maximum broker imbalance ratio: %.2f, threshold: %.2f",
+                        distribution.max_imbalance_ratio(), imbalance_threshold)
+            return False
+
+        logger.warning("Broker(s) [%s] exceed the leader imbalance ratio threshold %.2f, %d partition(s) to be elected",
+                       ", ".join(str(broker_id) for broker_id in distribution.skewed_broker_ids(imbalance_threshold)),
+                       imbalance_threshold, len(skewed_partitions))
+        if dry_run:
+            logger.info("Dry run, the preferred replica election is not run")
+            return False
+        return True
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    @staticmethod
+    def _log_rebalance(reassignment, dry_run):
+        """
+        Log the replica moves of a rebalance
+        :param reassignment: The partitions whose replicas changed
+        :type reassignment: PartitionReassignment
+        :param dry_run: True if the replica moves are not applied
+        :type dry_run: bool
+        """
+        if reassignment.is_empty():
+            logger.info("Replicas are already balanced over the brokers")
+        elif dry_run:
+            logger.info("Dry run, %d partition(s) would be reassigned: %s", len(reassignment.assignment), reassignment)
+        else:
+            logger.info("Rebalancing replicas, %d partition(s) to be reassigned", len(reassignment.assignment))
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    @staticmethod
+    def _log_action_result(action, error):
+        """
+        Log the outcome of an action
+        :param action: The action
+        :type action: TopicAction
+        :param error: The exception raised by the action, None if it succeeded
+        :type error: Exception
+        """
+        if error is not None:
+            logger.error("Topic \"%s\" %s failed: %s", action.topic_name, action.action_type, error)
+        elif action.action_type == TopicAction.CREATE:
+            logger.info("Topic \"%s\": {replication factor: %d, partition number: %d} created", action.topic_name,
+                        action.config_topic.replication_factor, action.config_topic.partition_number)
+        elif action.action_type == TopicAction.RECREATE:
+            logger.warning("Topic \"%s\" has been deleted and re-created in order to update its replication factor "
+                           "from %d to %d and its partition number from %d to %d", action.topic_name,
+                           action.running_topic.replication_factor, action.config_topic.replication_factor,
+                           action.running_topic.partition_number, action.config_topic.partition_number)
+        elif action.action_type == TopicAction.REASSIGN:
+            logger.info("Topic \"%s\" replication factor has been updated from %d to %d through partition "
+                        "reassignment, its partition number from %d to %d", action.topic_name,
+                        action.running_topic.replication_factor, action.config_topic.replication_factor,
+                        action.running_topic.partition_number, action.config_topic.partition_number)
+        elif action.action_type == TopicAction.ADD_PARTITIONS:
+            logger.info("Topic \"%s\" partition number has been updated from %d to %d", action.topic_name,
+                        action.running_topic.partition_number, action.config_topic.partition_number)
+
+
+class AsyncReconciliationExecutor(ReconciliationExecutor):
+    """Run a reconciliation plan with concurrent asynchronous kafka driver operations"""
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, kafka, broker_id_list, reassignment_throttle=None,
+                 reassignment_poll_interval=ReconciliationExecutor.DEFAULT_REASSIGNMENT_POLL_INTERVAL,
+                 reassignment_timeout=None,
+                 deletion_poll_interval=ReconciliationExecutor.DEFAULT_DELETION_POLL_INTERVAL,
+                 deletion_timeout=ReconciliationExecutor.DEFAULT_DELETION_TIMEOUT):
+        """
+        Asynchronous reconciliation executor constructor
+        :param kafka: The asynchronous kafka driver
+        :type kafka: AsyncKafkaDriver
+        :param broker_id_list: The id of the available kafka brokers, new replicas are placed on them
+        :type broker_id_list: list[int]
+        :param reassignment_throttle: Replication throughput limit in bytes per second while replicas are moved
+        :type reassignment_throttle: int
+        :param reassignment_poll_interval: Time in seconds between two partition reassignment progress checks
+        :type reassignment_poll_interval: float
+        :param reassignment_timeout: Time in seconds after which a partition reassignment is considered failed
+        :type reassignment_timeout: float
+        :param deletion_poll_interval: Time in seconds between two checks that the topics to be re-created are deleted
+        :type deletion_poll_interval: float
+        :param deletion_timeout: Time in seconds after which a topic to be re-created is considered not deleted
+        :type deletion_timeout: float
+        """
+        super().__init__(kafka, broker_id_list, reassignment_throttle, reassignment_poll_interval,
+                         reassignment_timeout, deletion_poll_interval, deletion_timeout)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    async def execute(self, actions):
+        """
+        Run every action of the plan, a failing topic doesn't prevent the other ones from being reconciled
+        :param actions: The reconciliation plan
+        :type actions: list[TopicAction]
+        :return: For each topic with an action other than NOOP, None if the action succeeded, the exception otherwise
+        :rtype: dict[str, Exception]
+        """
+        actions_by_type = collections.defaultdict(list)
+        for action in actions:
+            actions_by_type[action.action_type].append(action)
+
+        recreate_actions = actions_by_type[TopicAction.RECREATE]
+
+        # Partitions are added and replicas moved while the topics to be re-created are deleted and the missing ones
+        # created
+        errors, partition_errors = await asyncio.gather(
+            self._create_topics(actions_by_type[TopicAction.CREATE], recreate_actions),
+            self._alter_topics(actions_by_type[TopicAction.ADD_PARTITIONS], actions_by_type[TopicAction.REASSIGN]))
+        errors.update(partition_errors)
+
+        for action in actions:
+            if action.topic_name in errors:
+                ReconciliationExecutor._log_action_result(action, errors[action.topic_name])
+
+        return errors
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @LAUNCHER_PHASE_SECONDS.time(phase="rebalance")
+    async def rebalance(self, dry_run=False):
+        """
+        Move the replicas so that replicas and preferred leaders are evenly spread over the available brokers,
+        typically after a broker addition or removal
+        :param dry_run: Only compute the replica moves
+        :type dry_run: bool
+        :return: The partitions whose replicas changed
+        :rtype: PartitionReassignment
+        """
+        reassignment = ReplicaPlacementPlanner(self._broker_id_list,
+                                               (await self._kafka.describe_all_topics()).values()).rebalance()
+        ReconciliationExecutor._log_rebalance(reassignment, dry_run)
+        if not dry_run and not reassignment.is_empty():
+            await self._run_reassignment(reassignment)
+        return reassignment
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @LAUNCHER_PHASE_SECONDS.time(phase="leader_balance")
+    async def balance_leaders(self, imbalance_threshold, batch_size, poll_interval, timeout=None, dry_run=False):
+        """
+        Elect the preferred leader of the partitions misled away from the brokers whose leader imbalance ratio exceeds
+        the threshold. The elections are run in batches, the leader distribution is logged before and after
+        :param imbalance_threshold: The broker imbalance ratio, between 0 and 1, above which elections are run
+        :type imbalance_threshold: float
+        :param batch_size: The maximum number of partitions per election
+        :type batch_size: int
+        :param poll_interval: Time in seconds between two attempts while another election is in progress
+        :type poll_interval: float
+        :param timeout: Time in seconds after which an election is given up, never if None
+        :type timeout: float
+        :param dry_run: Only log the leader distribution and the partitions to be elected
+        :type dry_run: bool
+        :return: The leader distribution once the elections are done
+        :rtype: LeaderDistribution
+        """
+        distribution = LeaderDistribution((await self._kafka.describe_all_topics()).values(), self._broker_id_list)
+        skewed_partitions = distribution.skewed_partitions(imbalance_threshold)
+        if not ReconciliationExecutor._log_leader_skew(distribution, imbalance_threshold, skewed_partitions, dry_run):
+            return distribution
+
+        # Kafka runs a single election at a time, batches are not run concurrently
+        for batch_start in range(0, len(skewed_partitions), batch_size):
+            await self._kafka.elect_preferred_leaders(skewed_partitions[batch_start:batch_start + batch_size],
+                                                      poll_interval, timeout)
+
+        distribution = LeaderDistribution((await self._kafka.describe_all_topics()).values(), self._broker_id_list)
+        logger.info("Leader distribution after preferred replica election: %s", distribution)
+        return distribution
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    async def _create_topics(self, create_actions, recreate_actions):
+        """
+        Delete the topics to be re-created, then create them along with the missing ones once kafka removed them
+        :param create_actions: The CREATE actions
+        :type create_actions: list[TopicAction]
+        :param recreate_actions: The RECREATE actions
+        :type recreate_actions: list[TopicAction]
+        :return: For each topic name, None if the topic has been (re-)created, the raised exception otherwise
+        :rtype: dict[str, Exception]
+        """
+        errors = collections.OrderedDict()
+        with LAUNCHER_PHASE_SECONDS.time(phase="topic_creation"):
+            running_topics = await self._kafka.describe_all_topics()
+            errors.update(await self._kafka.delete_topics([action.topic_name for action in recreate_actions]))
+            errors.update(await self._wait_for_deletion([action.topic_name for action in recreate_actions
+                                                         if errors[action.topic_name] is None]))
+            errors.update(await self._kafka.create_topics(self._place_topics(
+                [action for action in create_actions + recreate_actions if errors.get(action.topic_name) is None],
+                running_topics)))
+        return errors
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    async def _wait_for_deletion(self, topic_names):
+        """
+        Poll the cluster metadata until the deleted topics are gone. Kafka deletes a topic asynchronously, creating it
+        again before would fail as the topic still exists
+        :param topic_names: The names of the topics whose deletion has been requested
+        :type topic_names: list[str]
+        :return: For each topic name, None if the topic is gone, an exception if it is still there after the timeout
+        :rtype: dict[str, Exception]
+        """
+        remaining_names = set(topic_names)
+        start_time = time.time()
+        while len(remaining_names) > 0:
+            remaining_names &= set(await self._kafka.describe_all_topics(list(remaining_names), force_refresh=True))
+            if len(remaining_names) == 0 or time.time() - start_time >= self._deletion_timeout:
+                break
+            await asyncio.sleep(self._deletion_poll_interval)
+        return self._get_deletion_errors(topic_names, remaining_names)
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    async def _alter_topics(self, partition_actions, reassign_actions):
+        """
+        Add the missing partitions, then move the replicas of the topics whose replication factor changes
+        :param partition_actions: The ADD_PARTITIONS actions
+        :type partition_actions: list[TopicAction]
+        :param reassign_actions: The REASSIGN actions
+        :type reassign_actions: list[TopicAction]
+        :return: For each topic name, None if the topic has been altered, the raised exception otherwise
+        :rtype: dict[str, Exception]
+        """
+        errors = collections.OrderedDict()
+        with LAUNCHER_PHASE_SECONDS.time(phase="topic_alteration"):
+            errors.update(await self._kafka.create_partitions(collections.OrderedDict(
+                (action.topic_name, action.config_topic.partition_number) for action in
+                partition_actions + ReconciliationExecutor._get_partition_increases(reassign_actions))))
+            errors.update(await self._reassign_replicas([action for action in reassign_actions
+                                                         if errors.get(action.topic_name) is None]))
+        return errors
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    async def _reassign_replicas(self, reassign_actions):
+        """
+        Move the replicas of every topic whose replication factor changes in a single partition reassignment
+        :param reassign_actions: The REASSIGN actions
+        :type reassign_actions: list[TopicAction]
+        :return: For each topic name, None if its replicas have been moved, the raised exception otherwise
+        :rtype: dict[str, Exception]
+        """
+        if len(reassign_actions) == 0:
+            return {}
+
+        try:
+            await self._run_reassignment(self._build_reassignment(reassign_actions,
+                                                                  await self._kafka.describe_all_topics()))
+            error = None
+        except Exception as e:
+            error = e
+
+        return collections.OrderedDict((action.topic_name, error) for action in reassign_actions)
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    async def _run_reassignment(self, reassignment):
+        """
+        Start a partition reassignment and wait for it to end
+        :param reassignment: The partition reassignment
+        :type reassignment: PartitionReassignment
+        """
+        await self._kafka.reassign_partitions(reassignment, self._reassignment_throttle)
+        await self._kafka.wait_for_reassignment(reassignment, self._reassignment_poll_interval,
+                                                self._reassignment_timeout)
@@ -0,0 +1,174 @@
+import collections
+from common.KafkaIotException import KafkaIotException
+
+
+class TopicAction(object):
+    """Action to be run on a topic to reach its configured state"""
+
+    CREATE = "CREATE"
+    ADD_PARTITIONS = "ADD_PARTITIONS"
+    REASSIGN = "REASSIGN"
+    RECREATE = "RECREATE"
+    NOOP = "NOOP"
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, action_type, config_topic, running_topic=None):
+        """
+        Topic action constructor
+        :param action_type: The action type: CREATE, ADD_PARTITIONS, REASSIGN, RECREATE or NOOP
+        :type action_type: str
+        :param config_topic: The topic as declared in the configuration file
+        :type config_topic: Topic
+        :param running_topic: The topic as currently running in kafka, None if it is not running
+        :type running_topic: Topic
+        """
+        self.action_type = action_type
+        self.config_topic = config_topic
+        self.running_topic = running_topic
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @property
+    def topic_name(self):
+        return self.config_topic.name
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __str__(self):
+        if self.running_topic is None:
+            return "%s topic \"%s\": {replication factor: %d, partition number: %d}" % (
+                self.action_type,
+                self.config_topic.name,
+                self.config_topic.replication_factor,
+                self.config_topic.partition_number
+            )
+        return "%s topic \"%s\": {replication factor: %d -> %d, partition number: %d -> %d}" % (
+            self.action_type,
+            self.config_topic.name,
+            self.running_topic.replication_factor,
+            self.config_topic.replication_factor,
+            self.running_topic.partition_number,
+            self.config_topic.partition_number
+        )
+
+
+class TopicConfigChange(object):
+    """Topic level broker configs to be set and removed to reach the configured ones"""
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, topic_name, configs, running_configs):
+        """
+        Topic config change constructor
+        :param topic_name: The topic name
+        :type topic_name: str
+        :param configs: The configs as declared in the configuration file, by config name
+        :type configs: dict[str, str]
+        :param running_configs: The configs currently overridden on the topic in kafka, by config name
+        :type running_configs: dict[str, str]
+        """
+        self.topic_name = topic_name
+        self.configs = configs
+        self.running_configs = running_configs
+        self.to_set = {config_name: config_value for config_name, config_value in configs.items()
+                       if running_configs.get(config_name) != config_value}
+        # Overrides missing from the configuration fall back to the broker defaults
+        self.to_delete = sorted(config_name for config_name in running_configs if config_name not in configs)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def is_empty(self):
+        return len(self.to_set) == 0 and len(self.to_delete) == 0
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __str__(self):
+        return "ALTER_CONFIGS topic \"%s\": {%s}" % (self.topic_name, ", ".join(
+            "%s: %s -> %s" % (config_name, self.running_configs.get(config_name, "default"),
+                              self.configs.get(config_name, "default"))
+            for config_name in sorted(set(self.to_set.keys()) | set(self.to_delete))))
+
+
+class ReconciliationPlanner(object):
+    """Compute the actions turning the running topics into the configured ones"""
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, broker_count):
+        """
+        Reconciliation planner constructor
+        :param broker_count: The number of available kafka brokers
+        :type broker_count: int
+        """
+        self._broker_count = broker_count
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def plan(self, config_topic_list, running_topics):
+        """
+        Compute the reconciliation plan in a single pass over the configured topics
+        :param config_topic_list: The topics as declared in the configuration file
+        :type config_topic_list: list[Topic]
+        :param running_topics: The topics currently running in kafka by topic name
+        :type running_topics: dict[str, Topic]
+        :return: One action per configured topic, in the configuration order
+        :rtype: list[TopicAction]
+        """
+        actions = []
+
+        for config_topic in config_topic_list:
+            if config_topic.replication_factor > self._broker_count:
+                raise KafkaIotException("Replication factor in configuration file for topic \"%s\" "
+                                        "is more than the number of available broker(s): %d > %d"
+                                        % (config_topic.name, config_topic.replication_factor, self._broker_count))
+
+            running_topic = running_topics.get(config_topic.name)
+
+            if running_topic is None:
+                action_type = TopicAction.CREATE
+            elif running_topic.partition_number > config_topic.partition_number:
+                action_type = TopicAction.RECREATE  # Kafka can't reduce the partition number of a topic
+            elif running_topic.replication_factor != config_topic.replication_factor:
+                # Replicas are moved online, missing partitions are added beforehand
+                action_type = TopicAction.REASSIGN
+            elif running_topic.partition_number < config_topic.partition_number:
+                action_type = TopicAction.ADD_PARTITIONS
+            else:
+                action_type = TopicAction.NOOP
+
+            actions.append(TopicAction(action_type, config_topic, running_topic))
+
+        return actions
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def plan_configs(config_topic_list, running_topics):
+        """
+        Compute the config changes of the running topics whose configs are managed
+        :param config_topic_list: The topics as declared in the configuration file
+        :type config_topic_list: list[Topic]
+        :param running_topics: The topics currently running in kafka by topic name
+        :type running_topics: dict[str, Topic]
+        :return: The non empty config changes, in the configuration order. Topics to be created get their configs at
+        creation
+        :rtype: list[TopicConfigChange]
+        """
+        config_changes = []
+        for config_topic in config_topic_list:
+            running_topic = running_topics.get(config_topic.name)
+            if config_topic.configs is not None and running_topic is not None:
+                config_change = TopicConfigChange(config_topic.name, config_topic.configs,
+                                                  running_topic.configs or {})
+                if not config_change.is_empty():
+                    config_changes.append(config_change)
+        return config_changes
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def count_actions(actions):
+        """
+        Count the actions of a plan by action type
+        :param actions: The reconciliation plan
+        :type actions: list[TopicAction]
+        :return: The number of actions by action type
+        :rtype: dict[str, int]
+        """
+        counts = collections.OrderedDict((action_type, 0) for action_type in
+                                         [TopicAction.CREATE, TopicAction.ADD_PARTITIONS, TopicAction.REASSIGN,
+                                          TopicAction.RECREATE, TopicAction.NOOP])
+        for action in actions:
+            counts[action.action_type] += 1
+        return counts
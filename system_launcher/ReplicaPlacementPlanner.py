@@ -0,0 +1,417 @@
+import heapq
+import logging
+import collections
+from common.KafkaIotException import KafkaIotException
+from system_launcher.PartitionReassignment import PartitionReassignment
+
+logger = logging.getLogger(__name__)
+
+
+class _BrokerLoadIndex(object):
+    """Count by broker id, indexed by two lazily cleaned heaps so that the least and most loaded brokers are found
+    in logarithmic time whatever the number of partitions"""
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, broker_id_list):
+        """
+        Broker load index constructor
+        :param broker_id_list: The id of the indexed brokers
+        :type broker_id_list: list[int]
+        """
+        self._loads = {broker_id: 0 for broker_id in broker_id_list}
+        self._min_heap = []
+        self._max_heap = []
+        self._rebuild()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __contains__(self, broker_id):
+        return broker_id in self._loads
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def get(self, broker_id):
+        return self._loads[broker_id]
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def add(self, broker_id, delta):
+        """
+        Update the load of a broker, brokers not indexed are ignored
+        :param broker_id: The broker id
+        :type broker_id: int
+        :param delta: The load variation
+        :type delta: int
+        """
+        if broker_id not in self._loads:
+            return
+
+        self._loads[broker_id] += delta
+        heapq.heappush(self._min_heap, (self._loads[broker_id], broker_id))
+        heapq.heappush(self._max_heap, (-self._loads[broker_id], broker_id))
+
+        # Outdated entries are dropped once they outnumber the current ones
+        if len(self._min_heap) > 4 * len(self._loads) + 64:
+            self._rebuild()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def least_loaded(self, count, excluded_broker_id_list=()):
+        """
+        Get the least loaded brokers, ties are broken by broker id
+        :param count: The number of brokers to get
+        :type count: int
+        :param excluded_broker_id_list: The brokers not to be returned
+        :type excluded_broker_id_list: list[int]
+        :return: The broker ids, from the least loaded one
+        :rtype: list[int]
+        """
+        broker_id_list = []
+        popped_entries = []
+        seen_broker_ids = set()
+
+        while len(broker_id_list) < count and len(self._min_heap) > 0:
+            load, broker_id = heapq.heappop(self._min_heap)
+            if self._loads[broker_id] != load or broker_id in seen_broker_ids:
+                continue  # Outdated or duplicated entry
+            seen_broker_ids.add(broker_id)
+            popped_entries.append((load, broker_id))
+            if broker_id not in excluded_broker_id_list:
+                broker_id_list.append(broker_id)
+
+        for entry in popped_entries:
+            heapq.heappush(self._min_heap, entry)
+        return broker_id_list
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def most_loaded(self):
+        """
+        :return: The most loaded broker id, None if no broker is indexed
+        :rtype: int
+        """
+        while len(self._max_heap) > 0:
+            load, broker_id = self._max_heap[0]
+            if self._loads[broker_id] == -load:
+                return broker_id
+            heapq.heappop(self._max_heap)
+        return None
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _rebuild(self):
+        self._min_heap = [(load, broker_id) for broker_id, load in self._loads.items()]
+        self._max_heap = [(-load, broker_id) for broker_id, load in self._loads.items()]
+        heapq.heapify(self._min_heap)
+        heapq.heapify(self._max_heap)
+
+
+class ReplicaPlacementPlanner(object):
+    """Compute replica assignments spreading replicas and preferred leaders evenly over the brokers while keeping the
+    existing replicas in place as much as possible. The preferred leader of a partition is its first replica"""
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, broker_id_list, running_topics=()):
+        """
+        Replica placement planner constructor
+        :param broker_id_list: The id of the available kafka brokers
+        :type broker_id_list: list[int]
+        :param running_topics: The topics currently running in kafka, their replicas are taken into account
+        :type running_topics: list[Topic]
+        """
+        self._broker_id_list = sorted(broker_id_list)
+        self._replica_loads = _BrokerLoadIndex(self._broker_id_list)
+        self._leader_loads = _BrokerLoadIndex(self._broker_id_list)
+        self._assignment = {}  # Replicas by (topic name, partition) couple
+        self._partitions_by_broker = collections.defaultdict(set)
+        self._led_partitions_by_broker = collections.defaultdict(set)
+
+        for topic in running_topics:
+            self.add_running_topic(topic)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def add_running_topic(self, topic):
+        """
+        Take the replicas of a running topic into account
+        :param topic: The topic as running in kafka
+        :type topic: Topic
+        """
+        for topic_config in topic.config:
+            self._set_replicas((topic.name, topic_config.partition), list(topic_config.replicas))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def place_topic(self, topic_name, replication_factor, partition_number):
+        """
+        Compute the replicas of a new topic, each partition goes to the least loaded brokers
+        :param topic_name: The topic name
+        :type topic_name: str
+        :param replication_factor: The topic replication factor
+        :type replication_factor: int
+        :param partition_number: The topic partition number
+        :type partition_number: int
+        :return: The replicas by partition, the preferred leader first
+        :rtype: dict[int, list[int]]
+        """
+        self._check_replication_factor(topic_name, replication_factor)
+
+        replica_assignment = collections.OrderedDict()
+        for partition in range(partition_number):
+            replicas = self._order_by_leader_load(self._replica_loads.least_loaded(replication_factor))
+            self._set_replicas((topic_name, partition), replicas)
+            replica_assignment[partition] = replicas
+        return replica_assignment
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def change_replication_factor(self, topic, replication_factor):
+        """
+        Compute the replicas of a running topic for a new replication factor. The current replicas are kept, the most
+        loaded ones are removed when decreasing and the least loaded brokers are added when increasing
+        :param topic: The topic as running in kafka
+        :type topic: Topic
+        :param replication_factor: The new replication factor
+        :type replication_factor: int
+        :return: The replicas by partition, the preferred leader first
+        :rtype: dict[int, list[int]]
+        """
+        self._check_replication_factor(topic.name, replication_factor)
+
+        replica_assignment = collections.OrderedDict()
+        for topic_config in topic.config:
+            partition_key = (topic.name, topic_config.partition)
+            replicas = [replica for replica in self._assignment.get(partition_key, topic_config.replicas)
+                        if replica in self._replica_loads]
+
+            # The preferred leader is kept whenever possible, the most loaded followers are removed first
+            while len(replicas) > replication_factor:
+                followers = sorted(replicas[1:], key=lambda broker_id: (self._replica_loads.get(broker_id), broker_id))
+                replicas.remove(followers[-1])
+
+            if len(replicas) < replication_factor:
+                replicas += self._replica_loads.least_loaded(replication_factor - len(replicas), replicas)
+            if len(topic_config.replicas) == 0 or topic_config.replicas[0] not in replicas:
+                replicas = self._order_by_leader_load(replicas)
+
+            self._set_replicas(partition_key, replicas)
+            replica_assignment[topic_config.partition] = replicas
+        return replica_assignment
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def rebalance(self):
+        """
+        Compute the replica moves evening out the replicas and preferred leaders over the brokers, typically after a
+        broker addition or removal. Replicas on unavailable brokers are moved first, then one replica at a time from
+        the most to the least loaded broker, then preferred leaders are swapped between replicas of a same partition
+        :return: The partitions whose replicas changed
+        :rtype: PartitionReassignment
+        """
+        changed_partitions = set()
+
+        # Replicas hosted by brokers which are not available anymore
+        for broker_id in sorted(set(self._partitions_by_broker.keys()) - set(self._broker_id_list)):
+            for partition_key in sorted(self._partitions_by_broker[broker_id]):
+                replicas = self._assignment[partition_key]
+                targets = self._replica_loads.least_loaded(1, replicas)
+                if len(targets) == 0:
+                    raise KafkaIotException("Partition %s-%d can't be moved out of broker %d, every available broker "
+                                            "already hosts it" % (partition_key[0], partition_key[1], broker_id))
+                self._set_replicas(partition_key, [targets[0] if replica == broker_id else replica
+                                                   for replica in replicas])
+                changed_partitions.add(partition_key)
+
+        changed_partitions.update(self._balance(False))
+        changed_partitions.update(self._balance(True))
+
+        reassignment = PartitionReassignment()
+        for partition_key in sorted(changed_partitions):
+            reassignment.assignment[partition_key] = list(self._assignment[partition_key])
+        logger.debug("Replica rebalance: %d partition(s) changed", len(changed_partitions))
+        return reassignment
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def get_broker_loads(self):
+        """
+        :return: The number of replicas and preferred leaders by broker id
+        :rtype: dict[int, (int, int)]
+        """
+        return collections.OrderedDict((broker_id, (self._replica_loads.get(broker_id),
+                                                    self._leader_loads.get(broker_id)))
+                                       for broker_id in self._broker_id_list)
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _balance(self, leaders):
+        """
+        Move one replica or preferred leader at a time from a broker to another one holding at least two less until no
+        such move is left, the most loaded source and the least loaded target being tried first
+        :param leaders: True to balance the preferred leaders, False to balance the replicas
+        :type leaders: bool
+        :return: The changed partitions
+        :rtype: set[(str, int)]
+        """
+        loads = self._leader_loads if leaders else self._replica_loads
+        candidates_by_broker = {}  # Movable partitions of the source brokers, see _get_candidates
+        changed_partitions = set()
+
+        while True:
+            move = self._find_move(loads, leaders, candidates_by_broker)
+            if move is None:
+                break
+            partition_key, source, target = move
+
+            replicas = list(self._assignment[partition_key])
+            if leaders:
+                # Swapping the replica order changes the preferred leader without moving any data
+                replicas.remove(target)
+                replicas.insert(0, target)
+            else:
+                replicas[replicas.index(source)] = target
+            self._set_replicas(partition_key, replicas)
+            changed_partitions.add(partition_key)
+
+            # The partitions leaving a broker are skipped when met, but the ones it gets require sorting it again
+            candidates_by_broker.pop(target, None)
+
+        return changed_partitions
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _find_move(self, loads, leaders, candidates_by_broker):
+        """
+        :param loads: The replica or preferred leader loads
+        :type loads: _BrokerLoadIndex
+        :param leaders: True to move a preferred leader, False to move a replica
+        :type leaders: bool
+        :param candidates_by_broker: The movable partitions of the source brokers
+        :type candidates_by_broker: dict
+        :return: The (partition, source broker id, target broker id) triple of the next move, None if the loads are
+        balanced or no partition can be moved
+        :rtype: ((str, int), int, int)
+        """
+        # The most to the least loaded broker move is nearly always possible, the brokers are only ranked otherwise
+        source = loads.most_loaded()
+        broker_id_list = loads.least_loaded(1)
+        if source is None or len(broker_id_list) == 0 or loads.get(source) - loads.get(broker_id_list[0]) <= 1:
+            return None
+        partition_key = self._find_source_partition(candidates_by_broker, source, broker_id_list[0], leaders)
+        if partition_key is not None:
+            return partition_key, source, broker_id_list[0]
+
+        broker_id_list = loads.least_loaded(len(self._broker_id_list))
+        for source in reversed(broker_id_list):
+            if loads.get(source) - loads.get(broker_id_list[0]) <= 1:
+                return None  # The next sources are even less loaded
+            for target in broker_id_list:
+                if loads.get(source) - loads.get(target) <= 1:
+                    break
+                partition_key = self._find_source_partition(candidates_by_broker, source, target, leaders)
+                if partition_key is not None:
+                    return partition_key, source, target
+        return None
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _find_source_partition(self, candidates_by_broker, source, target, leaders):
+        """
+        Find a partition of the source broker which can go to the target broker, indexing the source if needed
+        """
+        candidates = candidates_by_broker.get(source)
+        if candidates is None:
+            candidates = candidates_by_broker[source] = self._get_candidates(source, leaders)
+        return self._find_movable_partition(candidates, source, target, leaders)
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _get_candidates(self, source, leaders):
+        """
+        Index the partitions a broker can give away, each index being sorted so that the moves are deterministic
+        :param source: The source broker id
+        :type source: int
+        :param leaders: True to index the led partitions by follower, False to index the hosted partitions
+        :type leaders: bool
+        :return: The led partitions by follower broker id, or the partitions hosted as a follower then the ones hosted
+        as the preferred leader, moving a follower keeping the preferred leader in place
+        :rtype: dict[int, collections.deque[(str, int)]] | list[collections.deque[(str, int)]]
+        """
+        if leaders:
+            partitions_by_follower = collections.defaultdict(list)
+            for partition_key in self._led_partitions_by_broker[source]:
+                for follower in self._assignment[partition_key][1:]:
+                    partitions_by_follower[follower].append(partition_key)
+            return {follower: collections.deque(sorted(partitions))
+                    for follower, partitions in partitions_by_follower.items()}
+
+        led_partitions = self._led_partitions_by_broker[source]
+        return [collections.deque(sorted(self._partitions_by_broker[source] - led_partitions)),
+                collections.deque(sorted(led_partitions))]
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _find_movable_partition(self, candidates, source, target, leaders):
+        """
+        Find a partition of the source broker which can go to the target broker. The returned partition and the ones
+        which left the source broker are removed from the candidates, the ones already on the target are rotated
+        :param candidates: The movable partitions of the source broker, see _get_candidates
+        :type candidates: dict[int, collections.deque[(str, int)]] | list[collections.deque[(str, int)]]
+        :param source: The source broker id
+        :type source: int
+        :param target: The target broker id
+        :type target: int
+        :param leaders: True to move a preferred leader, False to move a replica
+        :type leaders: bool
+        :return: The partition, None if no partition can be moved
+        :rtype: (str, int)
+        """
+        if leaders:
+            # Led partitions only leave the index, a remaining one is still led by the source and followed by the target
+            followed_partitions = candidates.get(target, ())
+            while len(followed_partitions) > 0:
+                partition_key = followed_partitions.popleft()
+                if self._assignment[partition_key][0] == source:
+                    return partition_key
+            return None
+
+        for partitions in candidates:
+            for _ in range(len(partitions)):
+                partition_key = partitions.popleft()
+                replicas = self._assignment[partition_key]
+                if source not in replicas:
+                    continue  # Already moved
+                if target not in replicas:
+                    return partition_key
+                partitions.append(partition_key)
+        return None
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _set_replicas(self, partition_key, replicas):
+        """
+        Record the replicas of a partition and update the broker indexes
+        :param partition_key: The (topic name, partition) couple
+        :type partition_key: (str, int)
+        :param replicas: The replicas, the preferred leader first
+        :type replicas: list[int]
+        """
+        previous_replicas = self._assignment.get(partition_key, [])
+        if len(previous_replicas) > 0:
+            self._leader_loads.add(previous_replicas[0], -1)
+            self._led_partitions_by_broker[previous_replicas[0]].discard(partition_key)
+        for broker_id in previous_replicas:
+            self._replica_loads.add(broker_id, -1)
+            self._partitions_by_broker[broker_id].discard(partition_key)
+            if len(self._partitions_by_broker[broker_id]) == 0:
+                del self._partitions_by_broker[broker_id]
+
+        self._assignment[partition_key] = replicas
+        if len(replicas) > 0:
+            self._leader_loads.add(replicas[0], 1)
+            self._led_partitions_by_broker[replicas[0]].add(partition_key)
+        for broker_id in replicas:
+            self._replica_loads.add(broker_id, 1)
+            self._partitions_by_broker[broker_id].add(partition_key)
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _order_by_leader_load(self, replicas):
+        """
+        Put the replica leading the fewest partitions first so that it becomes the preferred leader
+        :param replicas: The replicas
+        :type replicas: list[int]
+        :rtype: list[int]
+        """
+        if len(replicas) == 0:
+            return replicas
+        leader = min(replicas, key=lambda broker_id: (self._leader_loads.get(broker_id), broker_id))
+        return [leader] + [replica for replica in replicas if replica != leader]
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _check_replication_factor(self, topic_name, replication_factor):
+        if replication_factor > len(self._broker_id_list):
+            raise KafkaIotException("Replication factor of topic \"%s\" can't be more than the number of available "
+                                    "broker(s): %d > %d" % (topic_name, replication_factor, len(self._broker_id_list)))
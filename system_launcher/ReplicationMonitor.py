@@ -0,0 +1,207 @@
+import time
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class PartitionReplicationState(object):
+    """Replication state of a partition as seen by the replication monitor"""
+
+    UNDER_REPLICATED = "UNDER_REPLICATED"
+    OFFLINE = "OFFLINE"
+    HEALTHY = "HEALTHY"
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, state, leader, replicas, isr):
+        """
+        Partition replication state constructor
+        :param state: UNDER_REPLICATED, OFFLINE or HEALTHY
+        :type state: str
+        :param leader: The partition leader, -1 if none
+        :type leader: int
+        :param replicas: The partition replicas
+        :type replicas: tuple[int]
+        :param isr: The partition in sync replicas
+        :type isr: tuple[int]
+        """
+        self.state = state
+        self.leader = leader
+        self.replicas = replicas
+        self.isr = isr
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __eq__(self, other):
+        return isinstance(other, PartitionReplicationState) and \
+            (self.state, self.leader, self.replicas, self.isr) == (other.state, other.leader, other.replicas, other.isr)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __ne__(self, other):
+        return not self == other
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __str__(self):
+        return "%s {leader: %d, replicas: %s, isr: %s}" % (
+            self.state,
+            self.leader,
+            ", ".join(str(rep) for rep in self.replicas),
+            ", ".join(str(_isr) for _isr in self.isr)
+        )
+
+
+class ReplicationMonitor(object):
+    """Poll the cluster metadata with a single bulk call and report the under replicated and offline partitions.
+    Only the partitions which are not fully replicated are indexed and only their changes are reported"""
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, kafka, poll_interval):
+        """
+        Replication monitor constructor
+        :param kafka: The kafka driver, synchronous or asynchronous
+        :type kafka: KafkaDriver | AsyncKafkaDriver
+        :param poll_interval: Time in seconds between the start of two polls
+        :type poll_interval: float
+        """
+        self._kafka = kafka
+        self._poll_interval = poll_interval
+        self._unhealthy_partitions = {}  # Replication state by (topic name, partition) couple
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @property
+    def unhealthy_partitions(self):
+        """
+        :return: The replication state of the under replicated and offline partitions by (topic name, partition) couple
+        :rtype: dict[(str, int), PartitionReplicationState]
+        """
+        return dict(self._unhealthy_partitions)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def update(self, running_topics):
+        """
+        Index the partitions of a cluster metadata snapshot which are not fully replicated and diff them with the
+        previous snapshot
+        :param running_topics: The topics running in kafka by topic name
+        :type running_topics: dict[str, Topic]
+        :return: The new replication state of the partitions which changed, in (topic name, partition) order
+        :rtype: list[((str, int), PartitionReplicationState)]
+        """
+        unhealthy_partitions = {}
+        for topic in running_topics.values():
+            for topic_config in topic.config:
+                if topic_config.leader < 0 or len(topic_config.isr) == 0:
+                    state = PartitionReplicationState.OFFLINE
+                elif len(topic_config.isr) < len(topic_config.replicas):
+                    state = PartitionReplicationState.UNDER_REPLICATED
+                else:
+                    continue
+                unhealthy_partitions[(topic.name, topic_config.partition)] = PartitionReplicationState(
+                    state, topic_config.leader, tuple(topic_config.replicas), tuple(topic_config.isr))
+
+        changes = [(partition_key, replication_state) for partition_key, replication_state
+                   in unhealthy_partitions.items()
+                   if self._unhealthy_partitions.get(partition_key) != replication_state]
+        for partition_key, replication_state in self._unhealthy_partitions.items():
+            if partition_key not in unhealthy_partitions:
+                topic = running_topics.get(partition_key[0])
+                changes.append((partition_key, ReplicationMonitor._get_healthy_state(topic, partition_key[1])))
+
+        self._unhealthy_partitions = unhealthy_partitions
+        return sorted(changes, key=lambda change: change[0])
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def poll(self, running_topics=None):
+        """
+        Fetch the cluster metadata and log the replication changes
+        :param running_topics: The topics running in kafka by topic name, when freshly fetched by the caller
+        :type running_topics: dict[str, Topic]
+        :return: The replication changes
+        :rtype: list[((str, int), PartitionReplicationState)]
+        """
+        if running_topics is None:
+            running_topics = self._kafka.describe_all_topics(force_refresh=True)
+        changes = self.update(running_topics)
+        self._log_changes(changes)
+        return changes
+
+    # ------------------------------------------------------------------------------------------------------------------
+    async def poll_async(self):
+        """
+        Fetch the cluster metadata with the asynchronous kafka driver and log the replication changes
+        :return: The replication changes
+        :rtype: list[((str, int), PartitionReplicationState)]
+        """
+        changes = self.update(await self._kafka.describe_all_topics(force_refresh=True))
+        self._log_changes(changes)
+        return changes
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def run(self, poll_count=None):
+        """
+        Poll the cluster metadata on a fixed interval
+        :param poll_count: Number of polls before returning, endless if None
+        :type poll_count: int
+        """
+        logger.info("Monitoring partition replication every %s second(s)...", self._poll_interval)
+        poll_index = 0
+        while poll_count is None or poll_index < poll_count:
+            start_time = time.time()
+            self.poll()
+            poll_index += 1
+            if poll_count is None or poll_index < poll_count:
+                time.sleep(max(0.0, self._poll_interval - (time.time() - start_time)))
+
+    # ------------------------------------------------------------------------------------------------------------------
+    async def run_async(self, poll_count=None):
+        """
+        Poll the cluster metadata on a fixed interval with the asynchronous kafka driver
+        :param poll_count: Number of polls before returning, endless if None
+        :type poll_count: int
+        """
+        logger.info("Monitoring partition replication every %s second(s)...", self._poll_interval)
+        poll_index = 0
+        while poll_count is None or poll_index < poll_count:
+            start_time = time.time()
+            await self.poll_async()
+            poll_index += 1
+            if poll_count is None or poll_index < poll_count:
+                await asyncio.sleep(max(0.0, self._poll_interval - (time.time() - start_time)))
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    def _log_changes(self, changes):
+        """
+        Log the replication changes and a summary when there are some
+        :param changes: The replication changes
+        :type changes: list[((str, int), PartitionReplicationState)]
+        """
+        for (topic_name, partition), replication_state in changes:
+            if replication_state.state == PartitionReplicationState.OFFLINE:
+                logger.error("Partition %s-%d is offline: %s", topic_name, partition, replication_state)
+            elif replication_state.state == PartitionReplicationState.UNDER_REPLICATED:
+                logger.warning("Partition %s-%d is under replicated: %s", topic_name, partition, replication_state)
+            elif len(replication_state.replicas) == 0:
+                logger.info("Partition %s-%d does not exist anymore", topic_name, partition)
+            else:
+                logger.info("Partition %s-%d is fully replicated again", topic_name, partition)
+
+        if len(changes) > 0:
+            states = [replication_state.state for replication_state in self._unhealthy_partitions.values()]
+            logger.info("Replication: %d under replicated partition(s), %d offline partition(s)",
+                        states.count(PartitionReplicationState.UNDER_REPLICATED),
+                        states.count(PartitionReplicationState.OFFLINE))
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    @staticmethod
+    def _get_healthy_state(topic, partition):
+        """
+        :param topic: The topic of a partition which recovered, None if the topic has been deleted
+        :type topic: Topic
+        :param partition: The partition
+        :type partition: int
+        :return: The healthy replication state of the partition
+        :rtype: PartitionReplicationState
+        """
+        topic_config_list = [] if topic is None else [conf for conf in topic.config if conf.partition == partition]
+        if len(topic_config_list) == 0:
+            return PartitionReplicationState(PartitionReplicationState.HEALTHY, -1, (), ())
+        return PartitionReplicationState(PartitionReplicationState.HEALTHY, topic_config_list[0].leader,
+                                         tuple(topic_config_list[0].replicas), tuple(topic_config_list[0].isr))
@@ -0,0 +1,171 @@
+import logging
+import threading
+import collections
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+logger = logging.getLogger(__name__)
+
+
+class TopicTaskResult(object):
+    """Result of a task run for a topic"""
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, topic_name, result=None, error=None):
+        """
+        Topic task result constructor
+        :param topic_name: Name of the topic the task has been run for
+        :type topic_name: str
+        :param result: Value returned by the task
+        :param error: Exception raised by the task, None if the task succeeded
+        :type error: Exception
+        """
+        self.topic_name = topic_name
+        self.result = result
+        self.error = error
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __str__(self):
+        return "{topic name: %s, succeeded: %s%s}" % (
+            self.topic_name,
+            str(self.error is None),
+            "" if self.error is None else ", error: %s" % str(self.error)
+        )
+
+
+class _LogCaptureFilter(logging.Filter):
+    """Handler filter holding back the log records emitted by the threads running a topic task"""
+
+    _captured = threading.local()
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def filter(self, record):
+        records = getattr(_LogCaptureFilter._captured, "records", None)
+        if records is None:
+            return True
+        if len(records) == 0 or records[-1] is not record:  # The same record goes through every handler
+            records.append(record)
+        return False
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def start_capture():
+        _LogCaptureFilter._captured.records = []
+
+    # ------------------------------------------------------------------------------------------------------------------
+    @staticmethod
+    def stop_capture():
+        records = _LogCaptureFilter._captured.records
+        _LogCaptureFilter._captured.records = None
+        return records
+
+
+class TopicTaskExecutor(object):
+    """Run independent per topic tasks on a bounded thread pool"""
+
+    _LOG_CAPTURE_FILTER = _LogCaptureFilter()
+    _log_capture_lock = threading.Lock()
+    _log_capture_users = 0  # Executors can be nested, the filter stays installed until the last run is over
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def __init__(self, max_parallel_ops=1):
+        """
+        Topic task executor constructor
+        :param max_parallel_ops: Maximum number of tasks running at the same time. Tasks are run one by one if set to 1
+        :type max_parallel_ops: int
+        """
+        self._max_parallel_ops = max(1, max_parallel_ops)
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def run(self, tasks):
+        """
+        Run every task, a failing task doesn't prevent the other ones from running.
+        The logs of a task are held back while it runs and emitted all together once it is over
+        :param tasks: Task to run by topic name, a task is a callable taking no argument
+        :type tasks: dict[str, callable]
+        :return: The task results by topic name, in the order of the given tasks
+        :rtype: dict[str, TopicTaskResult]
+        """
+        results = collections.OrderedDict((topic_name, None) for topic_name in tasks)
+
+        if self._max_parallel_ops == 1 or len(tasks) <= 1:
+            for topic_name, task in tasks.items():
+                results[topic_name] = TopicTaskExecutor._run_task(topic_name, task)
+            return results
+
+        TopicTaskExecutor._install_log_capture()
+        try:
+            with ThreadPoolExecutor(max_workers=min(self._max_parallel_ops, len(tasks))) as executor:
+                futures = [executor.submit(TopicTaskExecutor._run_captured_task, topic_name, task)
+                           for topic_name, task in tasks.items()]
+                for future in as_completed(futures):
+                    result, records = future.result()
+                    results[result.topic_name] = result
+                    for record in records:  # Emitted from this thread, the logs of a topic are kept together
+                        logging.getLogger(record.name).handle(record)
+        finally:
+            TopicTaskExecutor._uninstall_log_capture()
+
+        return results
+
+    # ------------------------------------------------------------------------------------------------------------------
+    def run_for_errors(self, tasks):
+        """
+        Run every task and only keep their errors
+        :param tasks: Task to run by topic name, a task is a callable taking no argument
+        :type tasks: dict[str, callable]
+        :return: For each topic name, None if the task succeeded, the raised exception otherwise
+        :rtype: dict[str, Exception]
+        """
+        return collections.OrderedDict((topic_name, result.error) for topic_name, result in self.run(tasks).items())
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    @staticmethod
+    def _install_log_capture():
+        """
+        Add the log capture filter to the root logger handlers
+        """
+        with TopicTaskExecutor._log_capture_lock:
+            if TopicTaskExecutor._log_capture_users == 0:
+                for handler in logging.getLogger().handlers:
+                    handler.addFilter(TopicTaskExecutor._LOG_CAPTURE_FILTER)
+            TopicTaskExecutor._log_capture_users += 1
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    @staticmethod
+    def _uninstall_log_capture():
+        """
+        Remove the log capture filter from the root logger handlers once no executor is running anymore
+        """
+        with TopicTaskExecutor._log_capture_lock:
+            TopicTaskExecutor._log_capture_users -= 1
+            if TopicTaskExecutor._log_capture_users == 0:
+                for handler in logging.getLogger().handlers:
+                    handler.removeFilter(TopicTaskExecutor._LOG_CAPTURE_FILTER)
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    @staticmethod
+    def _run_captured_task(topic_name, task):
+        """
+        Run a task while holding back its logs
+        :return: The task result and its log records
+        :rtype: (TopicTaskResult, list[logging.LogRecord])
+        """
+        _LogCaptureFilter.start_capture()
+        try:
+            result = TopicTaskExecutor._run_task(topic_name, task)
+        finally:
+            records = _LogCaptureFilter.stop_capture()
+        return result, records
+
+    # ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+    @staticmethod
+    def _run_task(topic_name, task):
+        """
+        Run a task and catch its error
+        :rtype: TopicTaskResult
+        """
+        try:
+            return TopicTaskResult(topic_name, result=task())
+        except Exception as e:
+            logger.debug("Task for topic \"%s\" failed: %s", topic_name, e)
+            return TopicTaskResult(topic_name, error=e)
@@ -1,16 +1,51 @@
 from common.ConfigFile import ConfigFile
+from config.SystemConfigSchema import SYSTEM_CONFIG_SCHEMA
 
 
 class SystemConfig(ConfigFile):
 
     _SYSTEM_CONFIG = {
         "LOG_LEVEL": "DEBUG",  # DEBUG, INFO, WARNING, ERROR, CRITICAL
+        "LOG_FORMAT": "TEXT",  # TEXT, JSON (one json object per line)
+        # Log level by logger name, overriding LOG_LEVEL for a module. The kafka script outputs, logged line by line in
+        # DEBUG, are silenced with {"system_launcher.console_output": "INFO"}
+        "LOGGER_LEVELS": {},
         "SYSTEM_LAUNCHER": {
             "PATH": "~/PycharmProjects/kafka-iot/system_launcher",
             "APP_NAME": "System Launcher",
             "GROUP_ID": "system-launcher",
             "LOG_DIRECTORY": "logs",
+            "STATE_FILE": "last_applied_state.json",  # Last applied topic state, relative to PATH
             "VERSION": "1.0",
+            "MAX_PARALLEL_OPS": 8,  # Maximum number of topic operations running at the same time, 1 to disable
+            "MONITOR_INTERVAL": 30,  # Seconds between two replication checks in monitor mode
+            "WATCH": {  # Watch mode (--watch)
+                "CONFIG_INTERVAL": 5,  # Seconds between two config file checks
+                "CLUSTER_INTERVAL": 60,  # Seconds between two checks of the cluster topics
+                "DEBOUNCE": 2  # Seconds the config file must stay unchanged before being reloaded
+            },
+            "SUPERVISOR": {  # Supervision of the APP_LIST applications having a COMMAND (--supervise)
+                "CHECK_INTERVAL": 1,  # Seconds between two checks of the application processes
+                "SAMPLE_INTERVAL": 10,  # Seconds between two CPU / RSS / fd samples, requires psutil
+                "RESTART_BACKOFF": 1,  # Seconds before restarting a process, doubled on each consecutive crash
+                "MAX_RESTART_BACKOFF": 60,
+                "STABLE_TIME": 60,  # Seconds a process must run to reset its restart backoff
+                "STOP_TIMEOUT": 10,  # Seconds given to a process to exit on SIGTERM before being killed
+                "CPU_WARNING_PERCENT": 90,  # Warn above this CPU usage of a process, None to disable
+                "GROWTH_SAMPLES": 30  # Warn when the RSS or fd count of a process grew on this many samples in a row
+            },
+            "PROBE": {  # End to end latency probe (--probe), as GROUP_ID with the inherited rights
+                "TOPIC": "ping",  # Every partition of this topic is probed
+                "RATE": 1,  # Probes per second and partition
+                "REPORT_INTERVAL": 60,  # Seconds between two latency reports, the histograms being reset
+                "DEGRADED_FACTOR": 3,  # A broker is degraded when its p99 is this many times the median p99
+                "MIN_SAMPLES": 10  # Probes a broker needs over a report interval to be compared
+            },
+            "METRICS": {  # Prometheus metrics of the kafka operations and launcher phases
+                "PORT": None,  # HTTP endpoint port in monitor mode, None to disable
+                "FILE": "metrics.prom",  # Text dump, relative to PATH, None to disable
+                "DUMP_INTERVAL": 15  # Seconds between two dumps in monitor mode
+            },
         },
         "ZOOKEEPER": {
             "HOST": "localhost",
@@ -18,6 +53,24 @@ class SystemConfig(ConfigFile):
         },
         "KAFKA": {
             "PATH": "/opt/Kafka/kafka_2.11-1.0.0",
+            "DRIVER": "ADMIN_CLIENT",  # ADMIN_CLIENT (confluent-kafka AdminClient), SCRIPT (kafka-topics.sh)
+            "ADMIN_CLIENT_TIMEOUT": 30,  # Seconds
+            "METADATA_TTL": 60,  # Seconds the cluster metadata snapshot is reused before being fetched again
+            "REASSIGNMENT": {  # Partition reassignment used to change the replication factor of a topic
+                "THROTTLE": 10485760,  # Replication throughput limit in bytes/sec while replicas are moved
+                "POLL_INTERVAL": 10,  # Seconds between two progress checks
+                "TIMEOUT": 3600  # Seconds after which the reassignment is considered failed
+            },
+            "LEADER_BALANCE": {  # Preferred replica election of the partitions led away from their preferred leader
+                "IMBALANCE_THRESHOLD": 0.1,  # Share of a broker preferred partitions led elsewhere triggering elections
+                "ELECTION_BATCH_SIZE": 100,  # Maximum number of partitions per election
+                "POLL_INTERVAL": 5,  # Seconds between two attempts while another election is in progress
+                "TIMEOUT": 300  # Seconds after which an election is given up
+            },
+            "ACL": {  # ACLs granting their rights to the group ids, managed through kafka-acls.sh
+                "PRINCIPAL_PREFIX": "User:",  # The principal of a group id, shared by its apps, is PREFIX + group id
+                "BATCH_SIZE": 50  # Maximum number of topics and groups per kafka-acls.sh invocation
+            },
             "BROKER_LIST": [
                 {
                     "ID": 0,
@@ -33,11 +86,14 @@ class SystemConfig(ConfigFile):
             # ----------------- #
             # TOPIC DECLARATION
             # ----------------- #
-            # /!\ Be aware that a replication factor change or a partition number decrease will result in a topic
-            # deletion and re-creation.
+            # A replication factor change moves the topic replicas online through a partition reassignment.
+            # /!\ Be aware that a partition number decrease will result in a topic deletion and re-creation.
             # Note that the replication factor can't be more than the number of available kafka brokers
+            # The optional CONFIGS are the topic level broker configs (retention.ms, compression.type, segment.bytes,
+            # min.insync.replicas, cleanup.policy...). When set, any other config overridden on the topic is removed
             "TOPIC_LIST": [
-                {"NAME": "ping", "REPLICATION_FACTOR": 2, "PARTITION_NUMBER": 2},
+                {"NAME": "ping", "REPLICATION_FACTOR": 2, "PARTITION_NUMBER": 2,
+                 "CONFIGS": {"retention.ms": 3600000, "cleanup.policy": "delete"}},
                 {"NAME": "test", "REPLICATION_FACTOR": 2, "PARTITION_NUMBER": 2}
             ],
             # ---------------------------------- #
@@ -67,10 +123,17 @@ class SystemConfig(ConfigFile):
                 }
             ]
         },
+        # COMMAND (optional): command line started and supervised with --supervise
+        # REPLICAS (optional, default 1): number of processes, CPU_AFFINITY (optional): CPUs taken in turn per process
         "APP_LIST": [
             {"NAME": "App1", "GROUP_ID": "app-1"}
         ]
     }
 
-    def __init__(self):
-        super(SystemConfig, self).__init__(SystemConfig._SYSTEM_CONFIG)
+    def __init__(self, file_path=None):
+        """
+        System config constructor
+        :param file_path: A json or yaml config file with the same structure, deep merged over the config above
+        :type file_path: str
+        """
+        super(SystemConfig, self).__init__(SystemConfig._SYSTEM_CONFIG, file_path, SYSTEM_CONFIG_SCHEMA)
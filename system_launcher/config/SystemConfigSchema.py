@@ -0,0 +1,125 @@
+from common.ConfigSchema import ConfigSchema, Value, Dict, Map, List, NUMBER
+from common.RightsMatrix import is_topic_pattern
+
+LOG_LEVELS = ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL")
+TOPIC_INDEX = "TOPICS"
+GROUP_ID_INDEX = "GROUP_IDS"
+
+PORT = Value(int, minimum=1, maximum=65535)
+# Glob patterns ("*" for every topic, "sensor-*"...) are not references to a declared topic
+TOPIC_REFERENCE_LIST = List(Value(str, reference=TOPIC_INDEX, is_unreferenced=is_topic_pattern))
+KAFKA_RIGHTS = Dict({
+    "READ": TOPIC_REFERENCE_LIST,
+    "WRITE": TOPIC_REFERENCE_LIST
+})
+
+# Format and coherence of the system configuration, see SystemConfig for the meaning of each field. The sections added
+# after the first release are optional so that older configuration files stay valid, their missing fields being set to
+# the given default values
+SYSTEM_CONFIG_SCHEMA = ConfigSchema(Dict({
+    "LOG_LEVEL": Value(str, choices=LOG_LEVELS),
+    "LOG_FORMAT": Value(str, choices=("TEXT", "JSON")),
+    "LOGGER_LEVELS": Map(Value(str, choices=LOG_LEVELS)),
+    "SYSTEM_LAUNCHER": Dict({
+        "PATH": Value(str),
+        "APP_NAME": Value(str),
+        "GROUP_ID": Value(str),
+        "LOG_DIRECTORY": Value(str),
+        "STATE_FILE": Value(str),
+        "VERSION": Value(str),
+        "MAX_PARALLEL_OPS": Value(int, minimum=1),
+        "MONITOR_INTERVAL": Value(NUMBER, minimum=0.001),
+        "WATCH": Dict({
+            "CONFIG_INTERVAL": Value(NUMBER, minimum=0.001),
+            "CLUSTER_INTERVAL": Value(NUMBER, minimum=0.001),
+            "DEBOUNCE": Value(NUMBER, minimum=0)
+        }, optional={"CONFIG_INTERVAL": 5, "CLUSTER_INTERVAL": 60, "DEBOUNCE": 2}),
+        "SUPERVISOR": Dict({
+            "CHECK_INTERVAL": Value(NUMBER, minimum=0),
+            "SAMPLE_INTERVAL": Value(NUMBER, minimum=0),
+            "RESTART_BACKOFF": Value(NUMBER, minimum=0),
+            "MAX_RESTART_BACKOFF": Value(NUMBER, minimum=0),
+            "STABLE_TIME": Value(NUMBER, minimum=0),
+            "STOP_TIMEOUT": Value(NUMBER, minimum=0),
+            "CPU_WARNING_PERCENT": Value(NUMBER, minimum=0, nullable=True),
+            "GROWTH_SAMPLES": Value(int, minimum=2)
+        }, optional={"CHECK_INTERVAL": 1, "SAMPLE_INTERVAL": 10, "RESTART_BACKOFF": 1, "MAX_RESTART_BACKOFF": 60,
+                     "STABLE_TIME": 60, "STOP_TIMEOUT": 10, "CPU_WARNING_PERCENT": 90, "GROWTH_SAMPLES": 30}),
+        "PROBE": Dict({
+            "TOPIC": Value(str),  # Must be a declared topic, checked by PROBE_CONFIG_SCHEMA only when probing
+            "RATE": Value(NUMBER, minimum=0.001),
+            "REPORT_INTERVAL": Value(NUMBER, minimum=0.001),
+            "DEGRADED_FACTOR": Value(NUMBER, minimum=1),
+            "MIN_SAMPLES": Value(int, minimum=1)
+        }, optional={"TOPIC": "ping", "RATE": 1, "REPORT_INTERVAL": 60, "DEGRADED_FACTOR": 3, "MIN_SAMPLES": 10}),
+        "METRICS": Dict({
+            "PORT": Value(int, minimum=1, maximum=65535, nullable=True),
+            "FILE": Value(str, nullable=True),
+            "DUMP_INTERVAL": Value(NUMBER, minimum=0)
+        }, optional={"PORT": None, "FILE": "metrics.prom", "DUMP_INTERVAL": 15})
+    }, optional={"STATE_FILE": "last_applied_state.json", "MAX_PARALLEL_OPS": 8, "MONITOR_INTERVAL": 30, "WATCH": {},
+                 "SUPERVISOR": {}, "PROBE": {}, "METRICS": {}}),
+    "ZOOKEEPER": Dict({
+        "HOST": Value(str),
+        "PORT": PORT
+    }),
+    "KAFKA": Dict({
+        "PATH": Value(str),
+        "DRIVER": Value(str, choices=("ADMIN_CLIENT", "SCRIPT")),
+        "ADMIN_CLIENT_TIMEOUT": Value(NUMBER, minimum=0),
+        "METADATA_TTL": Value(NUMBER, minimum=0),
+        "REASSIGNMENT": Dict({
+            "THROTTLE": Value(int, minimum=1, nullable=True),
+            "POLL_INTERVAL": Value(NUMBER, minimum=0),
+            "TIMEOUT": Value(NUMBER, minimum=0, nullable=True)
+        }, optional={"THROTTLE": 10485760, "POLL_INTERVAL": 10, "TIMEOUT": 3600}),
+        "LEADER_BALANCE": Dict({
+            "IMBALANCE_THRESHOLD": Value(NUMBER, minimum=0, maximum=1),
+            "ELECTION_BATCH_SIZE": Value(int, minimum=1),
+            "POLL_INTERVAL": Value(NUMBER, minimum=0),
+            "TIMEOUT": Value(NUMBER, minimum=0, nullable=True)
+        }, optional={"IMBALANCE_THRESHOLD": 0.1, "ELECTION_BATCH_SIZE": 100, "POLL_INTERVAL": 5, "TIMEOUT": 300}),
+        "ACL": Dict({
+            "PRINCIPAL_PREFIX": Value(str),
+            "BATCH_SIZE": Value(int, minimum=1)
+        }, optional={"PRINCIPAL_PREFIX": "User:", "BATCH_SIZE": 50}),
+        "BROKER_LIST": List(Dict({
+            "ID": Value(int, minimum=0),
+            "HOST": Value(str),
+            "PORT": Value((int, str))  # Converted with int()
+        }), unique_field="ID", min_length=1),
+        "TOPIC_LIST": List(Dict({
+            "NAME": Value(str),
+            "REPLICATION_FACTOR": Value(int, minimum=1),
+            "PARTITION_NUMBER": Value(int, minimum=1),
+            "CONFIGS": Map(Value((str, int)))  # Topic level broker configs, e.g. retention.ms
+        }, optional=("CONFIGS",)), unique_field="NAME", index=TOPIC_INDEX),
+        "KAFKA_RIGHTS_INHERITANCE": KAFKA_RIGHTS,
+        "GROUP_ID_LIST": List(Dict({
+            "NAME": Value(str),
+            "KAFKA_RIGHTS": KAFKA_RIGHTS
+        }), unique_field="NAME", index=GROUP_ID_INDEX)
+    }, optional={"DRIVER": "ADMIN_CLIENT", "ADMIN_CLIENT_TIMEOUT": 30, "METADATA_TTL": 60, "REASSIGNMENT": {},
+                 "LEADER_BALANCE": {}, "ACL": {}}),
+    "APP_LIST": List(Dict({
+        "NAME": Value(str),
+        "GROUP_ID": Value(str, reference=GROUP_ID_INDEX),
+        "COMMAND": List(Value(str), min_length=1),
+        "REPLICAS": Value(int, minimum=1),
+        "CPU_AFFINITY": List(Value(int, minimum=0), min_length=1)
+    }, optional=("COMMAND", "REPLICAS", "CPU_AFFINITY")), unique_field="NAME")
+}, optional={"LOG_FORMAT": "TEXT", "LOGGER_LEVELS": {}}))
+
+# The probe topic must be declared, which only matters when the probe is run
+PROBE_CONFIG_SCHEMA = ConfigSchema(Dict({
+    "SYSTEM_LAUNCHER": Dict({
+        "PROBE": Dict({
+            "TOPIC": Value(str, reference=TOPIC_INDEX)
+        })
+    }),
+    "KAFKA": Dict({
+        "TOPIC_LIST": List(Dict({
+            "NAME": Value(str)
+        }), unique_field="NAME", index=TOPIC_INDEX)
+    })
+}))
@@ -1,223 +1,678 @@
 import os
 import logging
-import copy
+import asyncio
+import argparse
+import functools
 from config.SystemConfig import SystemConfig
+from config.SystemConfigSchema import SYSTEM_CONFIG_SCHEMA, PROBE_CONFIG_SCHEMA
 from common.LoggingConfig import init_logger
-from common.Utils import check_fields_in_dict
 from common.entities.Zookeeper import Zookeeper
-from system_launcher.KafkaDriver import KafkaDriver
+from system_launcher.KafkaDriverFactory import create_kafka_driver
+from system_launcher.ReconciliationPlanner import ReconciliationPlanner, TopicAction
+from system_launcher.ReconciliationExecutor import ReconciliationExecutor, AsyncReconciliationExecutor
+from system_launcher.LastAppliedState import LastAppliedState
+from system_launcher.ReplicationMonitor import ReplicationMonitor
+from system_launcher.ReconciliationDaemon import ReconciliationDaemon, TOPICS, RIGHTS, APPS
+from system_launcher.AppSupervisor import AppSupervisor
+from system_launcher.LatencyProbe import LatencyProbe
+from system_launcher.AclPlan import AclPlan, get_group_id_acls
 from common.KafkaIotException import KafkaIotException
 from common.entities.kafka.Topic import Topic
 from common.entities.kafka.KafkaRights import KafkaRights
+from common.RightsMatrix import compile_rights
 from common.entities.kafka.GroupId import GroupId
+from common.entities.kafka.KafkaBroker import KafkaBroker
 from common.entities.Application import Application
-from system_launcher.Utils import check_kafka_right_in_topic_name_list
+from system_launcher.Utils import LAUNCHER_PHASE_SECONDS
+from common.Metrics import METRICS, MetricsExporter
+
+logger = logging.getLogger(__name__)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def reconcile_topics(kafka, topic_executor, config_topics, broker_count, dry_run, last_applied_state=None, full=False):
+    """
+    Plan and apply the topic reconciliation
+    :param kafka: The kafka driver
+    :type kafka: KafkaDriver
+    :param topic_executor: The executor applying the reconciliation plan through the kafka driver
+    :type topic_executor: ReconciliationExecutor
+    :param config_topics: The topics as declared in the configuration file
+    :type config_topics: list[Topic]
+    :param broker_count: The number of available kafka brokers
+    :type broker_count: int
+    :param dry_run: Only log the reconciliation plan
+    :type dry_run: bool
+    :param last_applied_state: Only the topics changed since this state are reconciled. Every topic if None
+    :type last_applied_state: LastAppliedState
+    :param full: Reconcile every topic, the last applied state being updated and saved all the same
+    :type full: bool
+    """
+    logger.info("Planning topic reconciliation...")
+    with LAUNCHER_PHASE_SECONDS.time(phase="topic_planning"):
+        running_topics = kafka.describe_all_topics()
+        changed_topics = select_changed_topics(config_topics, running_topics, last_applied_state, full)
+        topic_actions = ReconciliationPlanner(broker_count).plan(changed_topics, running_topics)
+    log_topic_plan(topic_actions)
+
+    if dry_run:
+        log_config_plan(ReconciliationPlanner.plan_configs(changed_topics, running_topics))
+        logger.info("Dry run, the topic reconciliation plan is not applied")
+    else:
+        logger.info("Applying topic reconciliation plan...")
+        topic_errors = topic_executor.execute(topic_actions)
+
+        # Update existing topic info, only the altered topics make the cluster metadata snapshot being fetched again
+        running_topics = kafka.describe_all_topics()
+
+        # Configs are diffed once the topics exist, the created ones already got theirs at creation
+        config_changes = ReconciliationPlanner.plan_configs(changed_topics, running_topics)
+        log_config_plan(config_changes)
+        if len(config_changes) > 0:
+            merge_errors(topic_errors, kafka.alter_topic_configs(config_changes))
+            running_topics = kafka.describe_all_topics()
+        save_last_applied_state(last_applied_state, config_topics, running_topics, topic_errors)
+        check_topic_reconciliation(topic_errors, running_topics)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+async def reconcile_topics_async(kafka, topic_executor, config_topics, broker_count, dry_run, last_applied_state=None,
+                                 full=False):
+    """
+    Plan and apply the topic reconciliation with concurrent kafka operations
+    :param kafka: The asynchronous kafka driver
+    :type kafka: AsyncKafkaDriver
+    :param topic_executor: The executor applying the reconciliation plan through the asynchronous kafka driver
+    :type topic_executor: AsyncReconciliationExecutor
+    :param config_topics: The topics as declared in the configuration file
+    :type config_topics: list[Topic]
+    :param broker_count: The number of available kafka brokers
+    :type broker_count: int
+    :param dry_run: Only log the reconciliation plan
+    :type dry_run: bool
+    :param last_applied_state: Only the topics changed since this state are reconciled. Every topic if None
+    :type last_applied_state: LastAppliedState
+    :param full: Reconcile every topic, the last applied state being updated and saved all the same
+    :type full: bool
+    """
+    logger.info("Planning topic reconciliation...")
+    with LAUNCHER_PHASE_SECONDS.time(phase="topic_planning"):
+        running_topics = await kafka.describe_all_topics()
+        changed_topics = select_changed_topics(config_topics, running_topics, last_applied_state, full)
+        topic_actions = ReconciliationPlanner(broker_count).plan(changed_topics, running_topics)
+    log_topic_plan(topic_actions)
+
+    if dry_run:
+        log_config_plan(ReconciliationPlanner.plan_configs(changed_topics, running_topics))
+        logger.info("Dry run, the topic reconciliation plan is not applied")
+    else:
+        logger.info("Applying topic reconciliation plan...")
+        topic_errors = await topic_executor.execute(topic_actions)
+        running_topics = await kafka.describe_all_topics()
+        config_changes = ReconciliationPlanner.plan_configs(changed_topics, running_topics)
+        log_config_plan(config_changes)
+        if len(config_changes) > 0:
+            merge_errors(topic_errors, await kafka.alter_topic_configs(config_changes))
+            running_topics = await kafka.describe_all_topics()
+        save_last_applied_state(last_applied_state, config_topics, running_topics, topic_errors)
+        check_topic_reconciliation(topic_errors, running_topics)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def select_changed_topics(config_topics, running_topics, last_applied_state, full=False):
+    """
+    Select the configured topics which have to be reconciled
+    :param config_topics: The topics as declared in the configuration file
+    :type config_topics: list[Topic]
+    :param running_topics: The topics currently running in kafka by topic name
+    :type running_topics: dict[str, Topic]
+    :param last_applied_state: The state of the last reconciliation, every topic is selected if None
+    :type last_applied_state: LastAppliedState
+    :param full: Select every topic whatever the last applied state
+    :type full: bool
+    :return: The topics to be reconciled
+    :rtype: list[Topic]
+    """
+    if last_applied_state is None or full:
+        return config_topics
+
+    if last_applied_state.is_up_to_date(config_topics, running_topics):
+        logger.info("Neither the configuration nor the cluster changed since the last reconciliation")
+        return []
+
+    changed_topics = last_applied_state.changed_topics(config_topics, running_topics)
+    logger.info("%d topic(s) out of %d changed since the last reconciliation", len(changed_topics), len(config_topics))
+    return changed_topics
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def save_last_applied_state(last_applied_state, config_topics, running_topics, topic_errors):
+    """
+    Record the outcome of a reconciliation into the last applied state, if any
+    :param last_applied_state: The state to be updated, nothing is done if None
+    :type last_applied_state: LastAppliedState
+    :param config_topics: The topics as declared in the configuration file
+    :type config_topics: list[Topic]
+    :param running_topics: The topics running in kafka after the reconciliation by topic name
+    :type running_topics: dict[str, Topic]
+    :param topic_errors: For each reconciled topic, None if it succeeded, the raised exception otherwise
+    :type topic_errors: dict[str, Exception]
+    """
+    if last_applied_state is not None:
+        last_applied_state.update(config_topics, running_topics, topic_errors)
+        last_applied_state.save()
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def log_topic_plan(topic_actions):
+    """
+    Log a topic reconciliation plan
+    :param topic_actions: The reconciliation plan
+    :type topic_actions: list[TopicAction]
+    """
+    for topic_action in topic_actions:
+        if topic_action.action_type == TopicAction.NOOP:
+            logger.debug("Topic \"%s\" configuration (replication factor and partition number) is up to date",
+                         topic_action.topic_name)
+        else:
+            logger.info("Planned: %s", topic_action)
+    logger.info("Topic reconciliation plan: {%s}", ", ".join(
+        "%s: %d" % (action_type, count) for action_type, count in ReconciliationPlanner.count_actions(
+            topic_actions).items()))
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def log_config_plan(config_changes):
+    """
+    Log the topic config changes
+    :param config_changes: The config changes, one per topic
+    :type config_changes: list[TopicConfigChange]
+    """
+    for config_change in config_changes:
+        logger.info("Planned: %s", config_change)
+    logger.info("Topic config plan: %d topic(s) to alter", len(config_changes))
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def merge_errors(topic_errors, step_errors):
+    """
+    Merge the errors of a reconciliation step into the topic errors, a topic failing at any step being failed
+    :param topic_errors: For each reconciled topic, None if it succeeded, the raised exception otherwise
+    :type topic_errors: dict[str, Exception]
+    :param step_errors: For each topic of the step, None if it succeeded, the raised exception otherwise
+    :type step_errors: dict[str, Exception]
+    """
+    for topic_name, error in step_errors.items():
+        if topic_errors.get(topic_name) is None:
+            topic_errors[topic_name] = error
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def check_topic_reconciliation(topic_errors, existing_topics):
+    """
+    Log the topic reconciliation outcome and raise an exception if a topic failed to be reconciled
+    :param topic_errors: For each reconciled topic, None if it succeeded, the raised exception otherwise
+    :type topic_errors: dict[str, Exception]
+    :param existing_topics: The topics running in kafka after the reconciliation
+    :type existing_topics: dict[str, Topic]
+    """
+    logger.info("Available topic(s) is(are): [%s]", ", ".join(existing_topics.keys()))
+
+    failed_topic_names = [topic_name for topic_name, error in topic_errors.items() if error is not None]
+    if len(failed_topic_names) > 0:
+        raise KafkaIotException("%d topic(s) reconciliation failed: [%s]"
+                                % (len(failed_topic_names), ", ".join(failed_topic_names)))
+
+    logger.info("Topic reconciliation done!")
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def apply_acls(kafka, config_acls, managed_principals, batch_size, dry_run):
+    """
+    Diff the configured ACLs against the cluster ones and apply the difference
+    :param kafka: The kafka driver
+    :type kafka: KafkaDriver
+    :param config_acls: The ACLs the configuration grants
+    :type config_acls: set[Acl]
+    :param managed_principals: The principals whose ACLs are managed
+    :type managed_principals: set[str]
+    :param batch_size: Maximum number of resources per kafka-acls.sh invocation
+    :type batch_size: int
+    :param dry_run: Only log the ACL plan
+    :type dry_run: bool
+    """
+    acl_plan = AclPlan(config_acls, kafka.list_acls(), managed_principals)
+    log_acl_plan(acl_plan)
+
+    if dry_run:
+        logger.info("Dry run, the ACL plan is not applied")
+    elif not acl_plan.is_empty():
+        # ACLs are added first so that a right moved from one ACL to another is never missing in between
+        acl_errors = kafka.create_acls(acl_plan.to_add, batch_size)
+        acl_errors.update(kafka.delete_acls(acl_plan.to_remove, batch_size))
+        check_acl_application(acl_errors)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+async def apply_acls_async(kafka, config_acls, managed_principals, batch_size, dry_run):
+    """
+    Diff the configured ACLs against the cluster ones and apply the difference with concurrent kafka operations
+    :param kafka: The asynchronous kafka driver
+    :type kafka: AsyncKafkaDriver
+    :param config_acls: The ACLs the configuration grants
+    :type config_acls: set[Acl]
+    :param managed_principals: The principals whose ACLs are managed
+    :type managed_principals: set[str]
+    :param batch_size: Maximum number of resources per kafka-acls.sh invocation
+    :type batch_size: int
+    :param dry_run: Only log the ACL plan
+    :type dry_run: bool
+    """
+    acl_plan = AclPlan(config_acls, await kafka.list_acls(), managed_principals)
+    log_acl_plan(acl_plan)
+
+    if dry_run:
+        logger.info("Dry run, the ACL plan is not applied")
+    elif not acl_plan.is_empty():
+        acl_errors = await kafka.create_acls(acl_plan.to_add, batch_size)
+        acl_errors.update(await kafka.delete_acls(acl_plan.to_remove, batch_size))
+        check_acl_application(acl_errors)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def log_acl_plan(acl_plan):
+    """
+    Log an ACL plan
+    :param acl_plan: The ACL plan
+    :type acl_plan: AclPlan
+    """
+    for acl in acl_plan.to_add:
+        logger.info("Planned: ADD ACL %s", acl)
+    for acl in acl_plan.to_remove:
+        logger.info("Planned: REMOVE ACL %s", acl)
+    logger.info("ACL plan: {%s}", acl_plan)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def check_acl_application(acl_errors):
+    """
+    Raise an exception if a batch of ACLs failed to be applied
+    :param acl_errors: For each batch of ACLs, None if it succeeded, the raised exception otherwise
+    :type acl_errors: dict[str, Exception]
+    """
+    failed_batches = [batch for batch, error in acl_errors.items() if error is not None]
+    if len(failed_batches) > 0:
+        raise KafkaIotException("%d ACL batch(es) failed to be applied: [%s]"
+                                % (len(failed_batches), "; ".join(failed_batches)))
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def get_config_topics(sys_conf):
+    """
+    :param sys_conf: The system config
+    :type sys_conf: SystemConfig
+    :return: The topics as declared in the configuration file
+    :rtype: list[Topic]
+    """
+    return [Topic(name=topic_desc["NAME"],
+                  replication_factor=topic_desc["REPLICATION_FACTOR"],
+                  partition_number=topic_desc["PARTITION_NUMBER"],
+                  config=[],
+                  configs=({config_name: str(config_value)
+                            for config_name, config_value in topic_desc["CONFIGS"].items()}
+                           if "CONFIGS" in topic_desc else None))
+            for topic_desc in sys_conf.get("KAFKA.TOPIC_LIST")]
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def run_topic_phase(kafka, sys_conf, kafka_broker_list, last_applied_state, dry_run, rebalance=False, loop=None,
+                    full=False):
+    """
+    Reconcile the topics with the system config, then balance the partition leaders
+    :param kafka: The kafka driver, asynchronous if an event loop is given
+    :type kafka: KafkaDriver | AsyncKafkaDriver
+    :param sys_conf: The system config
+    :type sys_conf: SystemConfig
+    :param kafka_broker_list: The kafka brokers
+    :type kafka_broker_list: list[KafkaBroker]
+    :param last_applied_state: Only the topics changed since this state are reconciled. Every topic if None
+    :type last_applied_state: LastAppliedState
+    :param dry_run: Only log the plans
+    :type dry_run: bool
+    :param rebalance: Spread the replicas evenly over the brokers as well
+    :type rebalance: bool
+    :param loop: The event loop running the asynchronous kafka driver, None for the synchronous one
+    :type loop: asyncio.AbstractEventLoop
+    :param full: Reconcile every topic, the last applied state being updated and saved all the same
+    :type full: bool
+    """
+    config_topics = get_config_topics(sys_conf)
+    kafka_broker_id_list = [broker.id_number for broker in kafka_broker_list]
+    reassignment_settings = [sys_conf.get("KAFKA.REASSIGNMENT.THROTTLE"),
+                             sys_conf.get("KAFKA.REASSIGNMENT.POLL_INTERVAL"),
+                             sys_conf.get("KAFKA.REASSIGNMENT.TIMEOUT")]
+    leader_balance_settings = [sys_conf.get("KAFKA.LEADER_BALANCE.IMBALANCE_THRESHOLD"),
+                               sys_conf.get("KAFKA.LEADER_BALANCE.ELECTION_BATCH_SIZE"),
+                               sys_conf.get("KAFKA.LEADER_BALANCE.POLL_INTERVAL"),
+                               sys_conf.get("KAFKA.LEADER_BALANCE.TIMEOUT")]
+
+    if loop is not None:
+        topic_executor = AsyncReconciliationExecutor(kafka, kafka_broker_id_list, *reassignment_settings)
+        loop.run_until_complete(reconcile_topics_async(kafka, topic_executor, config_topics, len(kafka_broker_list),
+                                                       dry_run, last_applied_state, full))
+        if rebalance:
+            loop.run_until_complete(topic_executor.rebalance(dry_run))
+        loop.run_until_complete(topic_executor.balance_leaders(*leader_balance_settings, dry_run=dry_run))
+    else:
+        topic_executor = ReconciliationExecutor(kafka, kafka_broker_id_list, *reassignment_settings)
+        reconcile_topics(kafka, topic_executor, config_topics, len(kafka_broker_list), dry_run, last_applied_state,
+                         full)
+        if rebalance:
+            topic_executor.rebalance(dry_run)
+        topic_executor.balance_leaders(*leader_balance_settings, dry_run=dry_run)
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def read_group_ids(sys_conf):
+    """
+    :param sys_conf: The system config
+    :type sys_conf: SystemConfig
+    :return: The group ids, their rights being the inherited rights extended with their own ones
+    :rtype: list[GroupId]
+    """
+    config_rights_inheritance = sys_conf.get("KAFKA.KAFKA_RIGHTS_INHERITANCE")
+    group_id_list = []
+
+    logger.info("Reading group id configuration...")
+
+    for c_group_id in sys_conf.get("KAFKA.GROUP_ID_LIST"):
+        group_id_rights = KafkaRights(config_rights_inheritance["READ"] + c_group_id["KAFKA_RIGHTS"]["READ"],
+                                      config_rights_inheritance["WRITE"] + c_group_id["KAFKA_RIGHTS"]["WRITE"])
+        group_id = GroupId(c_group_id["NAME"], group_id_rights)
+        group_id_list.append(group_id)
+
+    logger.info("Loaded group id(s) is(are): [%s]", ", ".join([g_id.name for g_id in group_id_list]))
+    logger.info("Group id configuration reading done!")
+    return group_id_list
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def read_applications(sys_conf, group_id_list):
+    """
+    :param sys_conf: The system config
+    :type sys_conf: SystemConfig
+    :param group_id_list: The group ids
+    :type group_id_list: list[GroupId]
+    :return: The declared applications
+    :rtype: list[Application]
+    """
+    app_list = []
+
+    logger.info("Reading application list...")
+
+    group_id_by_name = dict((group_id.name, group_id) for group_id in group_id_list)
+    for c_app in sys_conf.get("APP_LIST"):
+        app_list.append(Application(c_app["NAME"], group_id_by_name[c_app["GROUP_ID"]], c_app.get("COMMAND"),
+                                    c_app.get("REPLICAS", 1), c_app.get("CPU_AFFINITY")))
+
+    logger.info("Loaded app(s) is(are): [%s]", ", ".join([app.name for app in app_list]))
+    logger.info("Application list reading done!")
+    return app_list
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def get_rights_matrix(sys_conf):
+    """
+    :param sys_conf: The system config
+    :type sys_conf: SystemConfig
+    :return: The compiled rights of the group ids and applications over the declared topics
+    :rtype: RightsMatrix
+    """
+    return compile_rights(sys_conf.get("KAFKA.KAFKA_RIGHTS_INHERITANCE"), sys_conf.get("KAFKA.GROUP_ID_LIST"),
+                          sys_conf.get("APP_LIST"),
+                          [topic_desc["NAME"] for topic_desc in sys_conf.get("KAFKA.TOPIC_LIST")])
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def run_rights_phase(kafka, sys_conf, dry_run, loop=None, last_applied_state=None):
+    """
+    Compile the group id rights of the system config and apply them as ACLs. The ACLs of the principals applied last
+    time are managed as well, so that the ACLs of a removed group id are removed
+    :param kafka: The kafka driver, asynchronous if an event loop is given
+    :type kafka: KafkaDriver | AsyncKafkaDriver
+    :param sys_conf: The system config
+    :type sys_conf: SystemConfig
+    :param dry_run: Only log the ACL plan
+    :type dry_run: bool
+    :param loop: The event loop running the asynchronous kafka driver, None for the synchronous one
+    :type loop: asyncio.AbstractEventLoop
+    :param last_applied_state: Holds the principals of the last applied ACLs, only the configured ones are managed if
+    None
+    :type last_applied_state: LastAppliedState
+    """
+    logger.info("Initializing kafka rights management...")
+    phase_timer = LAUNCHER_PHASE_SECONDS.time(phase="rights").start()
+    group_id_list = read_group_ids(sys_conf)
+
+    logger.info("Compiling rights...")
+    rights_matrix = get_rights_matrix(sys_conf)
+    logger.info("Rights compilation done!")
+
+    logger.info("Applying rights to group id...")
+    config_acls = get_group_id_acls(group_id_list, rights_matrix, sys_conf.get("KAFKA.ACL.PRINCIPAL_PREFIX"))
+    config_principals = set(acl.principal for acl in config_acls)
+    managed_principals = config_principals if last_applied_state is None else \
+        config_principals | last_applied_state.acl_principals
+    if loop is not None:
+        loop.run_until_complete(apply_acls_async(kafka, config_acls, managed_principals,
+                                                 sys_conf.get("KAFKA.ACL.BATCH_SIZE"), dry_run))
+    else:
+        apply_acls(kafka, config_acls, managed_principals, sys_conf.get("KAFKA.ACL.BATCH_SIZE"), dry_run)
+    if last_applied_state is not None and not dry_run:
+        last_applied_state.update_acl_principals(config_principals)
+        last_applied_state.save()
+    logger.info("Group id rights application done!")
+
+    phase_timer.stop()
+    logger.info("Kafka rights management initialization done!")
+
+
+# ----------------------------------------------------------------------------------------------------------------------
+def run_apps_phase(supervisor, sys_conf):
+    """
+    Start, restart or stop the supervised application processes according to the application list
+    :param supervisor: The application supervisor
+    :type supervisor: AppSupervisor
+    :param sys_conf: The system config
+    :type sys_conf: SystemConfig
+    """
+    supervisor.update(read_applications(sys_conf, read_group_ids(sys_conf)))
 
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Reconcile kafka with the system configuration")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Print the topic reconciliation plan without applying it")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="Reconcile topics with the asynchronous kafka driver")
+    parser.add_argument("--full", action="store_true",
+                        help="Reconcile every topic, even the ones unchanged since the last applied state")
+    parser.add_argument("--rebalance", action="store_true",
+                        help="Spread replicas and preferred leaders evenly over the brokers, e.g. after a broker "
+                             "addition or removal")
+    parser.add_argument("--monitor", action="store_true",
+                        help="Keep running and report under replicated and offline partitions")
+    parser.add_argument("--watch", action="store_true",
+                        help="Keep running with a warm kafka driver, reconciling again when the config file or the "
+                             "cluster topics change. Replication changes are reported on each cluster check with "
+                             "--monitor")
+    parser.add_argument("--supervise", action="store_true",
+                        help="Keep running the applications of APP_LIST having a COMMAND, restarting them when they "
+                             "exit")
+    parser.add_argument("--probe", action="store_true",
+                        help="Keep probing the end to end latency of every partition of the probe topic and report "
+                             "the degraded brokers")
+    parser.add_argument("--config", help="Json or yaml system config file, the config of config/SystemConfig.py "
+                                          "is used if not given")
+    args = parser.parse_args()
+    if args.watch and args.use_async:
+        parser.error("--watch is only available with the synchronous kafka driver")
+
     # ------------ #
     # LOGGER SETUP
     # ------------ #
-    sys_conf = SystemConfig()
+    sys_conf = SystemConfig(args.config)
     log_level = sys_conf.get("LOG_LEVEL")
     log_location = os.path.join(sys_conf.get("SYSTEM_LAUNCHER.PATH"), sys_conf.get("SYSTEM_LAUNCHER.LOG_DIRECTORY"))
     app_name = sys_conf.get("SYSTEM_LAUNCHER.APP_NAME")
     app_version = sys_conf.get("SYSTEM_LAUNCHER.VERSION")
-    init_logger(log_level, log_location, app_name)
-
-    logging.info("------------------------------")
-    logging.info("Starting %s V%s" % (app_name, app_version))
-    logging.info("------------------------------")
-
-    # ---------------------------------- #
-    # CONFIGURATION FILE FORMAT CHECKING
-    # ---------------------------------- #
-
-    logging.info("Checking configuration file format...")
-
-    check_fields_in_dict(sys_conf.get("ZOOKEEPER"), ["HOST", "PORT"], "ZOOKEEPER")
-    check_fields_in_dict(sys_conf.get("KAFKA"), ["PATH", "BROKER_LIST", "TOPIC_LIST", "KAFKA_RIGHTS_INHERITANCE",
-                                                 "GROUP_ID_LIST"], "KAFKA")
-    for broker in sys_conf.get("KAFKA.BROKER_LIST"):
-        check_fields_in_dict(broker, ["ID", "HOST", "PORT"], "KAFKA.BROKER_LIST")
-
-    for topic in sys_conf.get("KAFKA.TOPIC_LIST"):
-        check_fields_in_dict(topic, ["NAME", "REPLICATION_FACTOR", "PARTITION_NUMBER"], "KAFKA.TOPIC_LIST")
-
-    check_fields_in_dict(sys_conf.get("KAFKA.KAFKA_RIGHTS_INHERITANCE"), ["READ", "WRITE"],
-                         "KAFKA.KAFKA_RIGHTS_INHERITANCE")
-
-    for group_id in sys_conf.get("KAFKA.GROUP_ID_LIST"):
-        check_fields_in_dict(group_id, ["NAME", "KAFKA_RIGHTS"], "KAFKA.GROUP_ID_LIST")
-        check_fields_in_dict(group_id["KAFKA_RIGHTS"], ["READ", "WRITE"], "KAFKA.GROUP_ID_LIST.{NAME=%s}"
-                             % group_id["NAME"])
-
-    for app in sys_conf.get("APP_LIST"):
-        check_fields_in_dict(app, ["NAME", "GROUP_ID"], "APP_LIST")
-
-    logging.info("Configuration file format checking done!")
-
-    # ------------------------------------- #
-    # CONFIGURATION FILE COHERENCE CHECKING
-    # ------------------------------------- #
-
-    logging.info("Checking configuration file coherence...")
-
-    # check topics appear once
-    config_topic_name_list = [config_topic["NAME"] for config_topic in sys_conf.get("KAFKA.TOPIC_LIST")]
-    if len(set(config_topic_name_list)) != len(config_topic_name_list):
-        raise KafkaIotException("One or several topic(s) in topic list is(are) declared several times")
-
-    # check group ids appear once
-    config_group_id_name_list = [config_group_id["NAME"] for config_group_id in sys_conf.get("KAFKA.GROUP_ID_LIST")]
-    if len(set(config_group_id_name_list)) != len(config_group_id_name_list):
-        raise KafkaIotException("One or several group id(s) in group id list is(are) declared several times")
+    init_logger(log_level, log_location, app_name, sys_conf.get("LOG_FORMAT"), sys_conf.get("LOGGER_LEVELS"))
 
-    # check applications appear once
-    config_app_name_list = [config_app["NAME"] for config_app in sys_conf.get("APP_LIST")]
-    if len(set(config_app_name_list)) != len(config_app_name_list):
-        raise KafkaIotException("One or several app(s) in app list is(are) declared several times")
+    logger.info("------------------------------")
+    logger.info("Starting %s V%s", app_name, app_version)
+    logger.info("------------------------------")
 
-    # Check kafka rights use existing topics
-    check_kafka_right_in_topic_name_list(sys_conf.get("KAFKA.KAFKA_RIGHTS_INHERITANCE"), config_topic_name_list)
+    # ---------------------------- #
+    # CONFIGURATION FILE CHECKING
+    # ---------------------------- #
 
-    for config_group_id in sys_conf.get("KAFKA.GROUP_ID_LIST"):
-        check_kafka_right_in_topic_name_list(config_group_id["KAFKA_RIGHTS"], config_topic_name_list)
-
-    # Check applications use existing group id
-    config_group_id_name_list = [config_group_id["NAME"] for config_group_id in sys_conf.get("KAFKA.GROUP_ID_LIST")]
-
-    for config_app in sys_conf.get("APP_LIST"):
-        if config_app["GROUP_ID"] not in config_group_id_name_list:
-            raise KafkaIotException("Group id \"%s\" used in app \"%s\" is not declared in group id list"
-                                    % (config_app["GROUP_ID"], config_app["NAME"]))
-
-    logging.info("Configuration file coherence checking done!")
+    # Format and coherence are checked in a single pass, every violation being reported at once
+    logger.info("Checking configuration file format and coherence...")
+    phase_timer = LAUNCHER_PHASE_SECONDS.time(phase="config_check").start()
+    SYSTEM_CONFIG_SCHEMA.check(sys_conf.get())
+    if args.probe:
+        PROBE_CONFIG_SCHEMA.check(sys_conf.get())
+    phase_timer.stop()
+    logger.info("Configuration file checking done!")
 
     # ------------ #
     # KAFKA DRIVER
     # ------------ #
-    logging.info("Initializing kafka driver...")
+    logger.info("Initializing kafka driver...")
+    phase_timer = LAUNCHER_PHASE_SECONDS.time(phase="driver_init").start()
     kafka_path = sys_conf.get("KAFKA.PATH")
     zookeeper = Zookeeper(sys_conf.get("ZOOKEEPER.HOST"), sys_conf.get("ZOOKEEPER.PORT"))
-    kafka = KafkaDriver(kafka_path, zookeeper)
-    kafka_broker_list = sys_conf.get("KAFKA.BROKER_LIST")
-    logging.info("Kafka driver initialization done!")
-
-    # -------------- #
-    # TOPIC CREATION
-    # -------------- #
-    logging.info("Creating Kafka missing topics...")
-    existing_topics_name = set(kafka.list_topic_name())
-    config_topics = []
-
-    failed_topic_creation = 0
-    for topic_desc in sys_conf.get("KAFKA.TOPIC_LIST"):
-        if topic_desc["REPLICATION_FACTOR"] <= len(kafka_broker_list):
-            try:
-                kafka.create_topic(topic_desc["NAME"], topic_desc["REPLICATION_FACTOR"], topic_desc["PARTITION_NUMBER"])
-                logging.info("Topic \"%s\": {replication factor: %d, partition number: %d} created"
-                             % (topic_desc["NAME"], topic_desc["REPLICATION_FACTOR"], topic_desc["PARTITION_NUMBER"]))
-            except KafkaIotException:  # Topic already exists
-                failed_topic_creation += 1
-            finally:
-                config_topics.append(Topic(name=topic_desc["NAME"],
-                                           replication_factor=topic_desc["REPLICATION_FACTOR"],
-                                           partition_number=topic_desc["PARTITION_NUMBER"],
-                                           config=[]))
-        else:
-            raise KafkaIotException("Replication factor in configuration file for topic \"%s\" "
-                                    "is more than the number of available broker(s): %d > %d"
-                                    % (topic_desc["NAME"], topic_desc["REPLICATION_FACTOR"],
-                                       len(kafka_broker_list)))
-
-    existing_topics = []
-    for topic_name in kafka.list_topic_name():
-        existing_topics.append(kafka.describe_topic(topic_name))
-
-    logging.info("%d topic(s) created!" % (len(existing_topics) - failed_topic_creation))
-    logging.info("Available topic(s) is(are): [%s]" % ", ".join([topic.name for topic in existing_topics]))
-
-    # ---------------- #
-    # TOPIC ALTERATION
-    # ---------------- #
-
-    logging.info("Altering topic configuration...")
-
-    for c_topic in config_topics:
-        match_topic = [e_topic for e_topic in existing_topics if e_topic.name == c_topic.name]
-        if len(match_topic) == 1:
-            match_topic = match_topic[0]
-            if match_topic.replication_factor != c_topic.replication_factor:
-                if c_topic.replication_factor <= len(kafka_broker_list):
-                    kafka.delete_topic(match_topic.name)
-                    kafka.create_topic(c_topic.name, c_topic.replication_factor, c_topic.partition_number)
-                    logging.warning("Topic \"%s\" has been deleted and re-created in order to update its replication "
-                                    "factor from %d to %d. Partition number has been set to %s"
-                                    % (c_topic.name, match_topic.replication_factor, c_topic.replication_factor,
-                                       c_topic.partition_number))
-                else:
-                    raise KafkaIotException("Replication factor in configuration file for topic \"%s\" "
-                                            "is more than the number of available broker(s): %d > %d"
-                                            % (c_topic.name, c_topic.replication_factor, len(kafka_broker_list)))
-            elif match_topic.partition_number != c_topic.partition_number:
-                kafka.alter_topic(c_topic.name, c_topic.partition_number)
-                logging.info("Topic \"%s\" partition number has been updated from %d to %d"
-                             % (c_topic.name, match_topic.partition_number, c_topic.partition_number))
-            else:
-                logging.info("Topic \"%s\" configuration (replication factor and partition number) is up to date: "
-                             "{replication factor: %d, partition number: %d}"
-                             % (c_topic.name, c_topic.replication_factor, c_topic.partition_number))
-        else:
-            raise KafkaIotException("Topic \"%s\" listed in the configuration file is not currently running in Kafka"
-                                    % c_topic.name)
-
-    # Update existing topic info
-    existing_topics = []
-    for topic_name in kafka.list_topic_name():
-        existing_topics.append(kafka.describe_topic(topic_name))
-
-    logging.info("Topic configuration alteration done!")
+    kafka_broker_list = [KafkaBroker(broker["HOST"], int(broker["PORT"]), broker["ID"])
+                         for broker in sys_conf.get("KAFKA.BROKER_LIST")]
+    kafka = create_kafka_driver(sys_conf.get("KAFKA.DRIVER"), kafka_path, zookeeper, kafka_broker_list,
+                                sys_conf.get("KAFKA.ADMIN_CLIENT_TIMEOUT"), sys_conf.get("KAFKA.METADATA_TTL"),
+                                sys_conf.get("SYSTEM_LAUNCHER.MAX_PARALLEL_OPS"), args.use_async)
+    phase_timer.stop()
+    logger.info("Kafka driver initialization done!")
+
+    # -------------------- #
+    # TOPIC RECONCILIATION
+    # -------------------- #
+    # Also loaded with --full, which reconciles every topic but still saves the state and the ACL principals
+    last_applied_state = LastAppliedState(os.path.join(sys_conf.get("SYSTEM_LAUNCHER.PATH"),
+                                                       sys_conf.get("SYSTEM_LAUNCHER.STATE_FILE"))).load()
+
+    # The event loop is kept open for the monitoring
+    loop = asyncio.new_event_loop() if args.use_async else None
+    run_topic_phase(kafka, sys_conf, kafka_broker_list, last_applied_state, args.dry_run, args.rebalance, loop,
+                    args.full)
 
     # ----------------- #
     # RIGHTS MANAGEMENT
     # ----------------- #
-
-    logging.info("Initializing kafka rights management...")
-    config_rights_inheritance = sys_conf.get("KAFKA.KAFKA_RIGHTS_INHERITANCE")
-    rights_inheritance = None
-    config_group_id_list = sys_conf.get("KAFKA.GROUP_ID_LIST")
-    group_id_list = []
-    config_app_list = sys_conf.get("APP_LIST")
-    app_list = []
-
-    rights_inheritance = KafkaRights(config_rights_inheritance["READ"], config_rights_inheritance["WRITE"])
-
-    logging.info("Reading group id configuration...")
-
-    for c_group_id in config_group_id_list:
-        group_id_rights = copy.deepcopy(rights_inheritance)
-        group_id_rights.extend(KafkaRights(c_group_id["KAFKA_RIGHTS"]["READ"], c_group_id["KAFKA_RIGHTS"]["WRITE"]))
-        group_id = GroupId(c_group_id["NAME"], group_id_rights)
-        group_id_list.append(group_id)
-
-    logging.info("Loaded group id(s) is(are): [%s]" % ", ".join([g_id.name for g_id in group_id_list]))
-    logging.info("Group id configuration reading done!")
-
-    logging.info("Reading application list...")
-
-    for c_app in config_app_list:
-        app_group_id = [group_id for group_id in group_id_list if group_id.name == c_app["GROUP_ID"]][0]
-        app_list.append(Application(c_app["NAME"], app_group_id))
-
-    logging.info("Loaded app(s) is(are): [%s]" % ", ".join([app.name for app in app_list]))
-    logging.info("Application list reading done!")
-
-    logging.info("Applying rights to group id...")
-    # TODO
-    logging.info("Group id rights application done!")
-
-    logging.info("Kafka rights management initialization done!")
-    logging.info("------------------------------")
-    logging.info("End of %s execution" % app_name)
-    logging.info("------------------------------")
+    run_rights_phase(kafka, sys_conf, args.dry_run, loop, last_applied_state)
+
+    # ---------------------- #
+    # APPLICATION SUPERVISION
+    # ---------------------- #
+    supervisor = None
+    if args.supervise:
+        supervisor = AppSupervisor(sys_conf.get("SYSTEM_LAUNCHER.SUPERVISOR.CHECK_INTERVAL"),
+                                   sys_conf.get("SYSTEM_LAUNCHER.SUPERVISOR.SAMPLE_INTERVAL"),
+                                   sys_conf.get("SYSTEM_LAUNCHER.SUPERVISOR.RESTART_BACKOFF"),
+                                   sys_conf.get("SYSTEM_LAUNCHER.SUPERVISOR.MAX_RESTART_BACKOFF"),
+                                   sys_conf.get("SYSTEM_LAUNCHER.SUPERVISOR.STABLE_TIME"),
+                                   sys_conf.get("SYSTEM_LAUNCHER.SUPERVISOR.STOP_TIMEOUT"),
+                                   sys_conf.get("SYSTEM_LAUNCHER.SUPERVISOR.CPU_WARNING_PERCENT"),
+                                   sys_conf.get("SYSTEM_LAUNCHER.SUPERVISOR.GROWTH_SAMPLES"))
+        run_apps_phase(supervisor, sys_conf)
+        supervisor.start()
+
+    # ------------- #
+    # LATENCY PROBE
+    # ------------- #
+    latency_probe = None
+    if args.probe:
+        config_rights_inheritance = sys_conf.get("KAFKA.KAFKA_RIGHTS_INHERITANCE")
+        launcher_group_id = GroupId(sys_conf.get("SYSTEM_LAUNCHER.GROUP_ID"),
+                                    KafkaRights(config_rights_inheritance["READ"], config_rights_inheritance["WRITE"]))
+        probe_rights_matrix = get_rights_matrix(sys_conf)
+        if launcher_group_id.name not in [c_group_id["NAME"] for c_group_id in sys_conf.get("KAFKA.GROUP_ID_LIST")]:
+            probe_rights_matrix.set_group(launcher_group_id.name, [], [])  # Only the inherited rights
+        latency_probe = LatencyProbe(launcher_group_id, probe_rights_matrix,
+                                     kafka_broker_list, sys_conf.get("SYSTEM_LAUNCHER.PROBE.TOPIC"),
+                                     sys_conf.get("SYSTEM_LAUNCHER.PROBE.RATE"),
+                                     sys_conf.get("SYSTEM_LAUNCHER.PROBE.REPORT_INTERVAL"),
+                                     sys_conf.get("SYSTEM_LAUNCHER.PROBE.DEGRADED_FACTOR"),
+                                     sys_conf.get("SYSTEM_LAUNCHER.PROBE.MIN_SAMPLES"))
+        latency_probe.start()
+
+    # ---------- #
+    # MONITORING
+    # ---------- #
+
+    metrics_file = sys_conf.get("SYSTEM_LAUNCHER.METRICS.FILE")
+    metrics_exporter = MetricsExporter(METRICS, sys_conf.get("SYSTEM_LAUNCHER.METRICS.PORT"),
+                                       None if metrics_file is None else
+                                       os.path.join(sys_conf.get("SYSTEM_LAUNCHER.PATH"), metrics_file),
+                                       sys_conf.get("SYSTEM_LAUNCHER.METRICS.DUMP_INTERVAL"))
+
+    if args.watch:
+        # The cluster checks of the daemon feed the replication monitor, so that the cluster is fetched once
+        replication_monitor = ReplicationMonitor(kafka, sys_conf.get("SYSTEM_LAUNCHER.MONITOR_INTERVAL")) \
+            if args.monitor else None
+        daemon_phases = {
+            TOPICS: functools.partial(run_topic_phase, kafka, sys_conf, kafka_broker_list, last_applied_state,
+                                      args.dry_run),
+            RIGHTS: functools.partial(run_rights_phase, kafka, sys_conf, args.dry_run,
+                                      last_applied_state=last_applied_state)
+        }
+        if supervisor is not None:
+            daemon_phases[APPS] = functools.partial(run_apps_phase, supervisor, sys_conf)
+        daemon = ReconciliationDaemon(sys_conf, SYSTEM_CONFIG_SCHEMA, kafka, daemon_phases,
+                                      sys_conf.get("SYSTEM_LAUNCHER.WATCH.CONFIG_INTERVAL"),
+                                      sys_conf.get("SYSTEM_LAUNCHER.WATCH.CLUSTER_INTERVAL"),
+                                      sys_conf.get("SYSTEM_LAUNCHER.WATCH.DEBOUNCE"), replication_monitor)
+        metrics_exporter.start()
+        try:
+            daemon.run()
+        except KeyboardInterrupt:
+            logger.info("Watching stopped")
+    elif args.monitor:
+        replication_monitor = ReplicationMonitor(kafka, sys_conf.get("SYSTEM_LAUNCHER.MONITOR_INTERVAL"))
+        metrics_exporter.start()
+        try:
+            if args.use_async:
+                loop.run_until_complete(replication_monitor.run_async())
+            else:
+                replication_monitor.run()
+        except KeyboardInterrupt:
+            logger.info("Monitoring stopped")
+    elif supervisor is not None or latency_probe is not None:
+        metrics_exporter.start()
+        try:
+            for service in (supervisor, latency_probe):
+                if service is not None:
+                    service.join()
+        except KeyboardInterrupt:
+            logger.info("Supervision stopped")
+
+    if supervisor is not None:
+        supervisor.stop()
+    if latency_probe is not None:
+        latency_probe.stop()
+
+    if args.use_async:
+        loop.close()
+
+    # A one-shot run only gets the final metrics dump
+    metrics_exporter.stop()
+
+    logger.info("------------------------------")
+    logger.info("End of %s execution", app_name)
+    logger.info("------------------------------")